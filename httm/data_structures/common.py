@@ -24,6 +24,13 @@ Common data structures used in transformations of FITS images.
 
 from collections import namedtuple
 
+import numpy
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
 
 # noinspection PyUnresolvedReferences,PyClassHasNoInit,SpellCheckingInspection
 class ConversionMetaData(namedtuple('ConversionMetaData', ['origin_file_name', 'command', 'header'])):
@@ -52,3 +59,112 @@ class Slice(namedtuple('Slice', ['index', 'units', 'pixels'])):
     :type pixels: :py:class:`numpy.ndarray`
     """
     __slots__ = ()
+
+
+class SliceStack(Sequence):
+    """
+    All of the slices from a CCD, kept in one contiguous array of shape ``(number_of_slices, rows, columns)``.
+
+    As with :py:class:`~httm.data_structures.common.Slice` objects, odd slices are stored in readout orientation.
+
+    A :py:class:`~httm.data_structures.common.SliceStack` behaves like a tuple of
+    :py:class:`~httm.data_structures.common.Slice` objects whose pixels are views into the stacked array,
+    so it may be used in place of the ``slices`` of a converter.
+    Converter transformations then apply each stage to all of the slices at once, broadcasting per-slice
+    parameters such as ``video_scales`` along the first axis.
+
+    Construct using :py:func:`~httm.data_structures.common.stack_slices`.
+
+    :param units: Can be either `electrons` or `ADU`
+    :type units: str
+    :param pixels: The stacked slice image data
+    :type pixels: :py:class:`numpy.ndarray`
+    """
+    __slots__ = ('units', 'pixels')
+
+    def __init__(self, units, pixels):
+        self.units = units
+        self.pixels = pixels
+
+    def __len__(self):
+        return self.pixels.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Slice index out of range: {}".format(index))
+        return Slice(index=index, units=self.units, pixels=self.pixels[index])
+
+    def __repr__(self):
+        return "SliceStack(units={units!r}, pixels=<array of shape {shape}>)".format(units=self.units,
+                                                                                   shape=self.pixels.shape)
+
+    def _replace(self, **kwargs):
+        return SliceStack(units=kwargs.pop('units', self.units),
+                          pixels=kwargs.pop('pixels', self.pixels))
+
+
+def stack_slices(slices):
+    """
+    Stack a sequence of :py:class:`~httm.data_structures.common.Slice` objects into a
+    :py:class:`~httm.data_structures.common.SliceStack`.
+
+    The slices must be in index order and must all have the same units and shape.
+
+    :param slices: The slices to stack
+    :type slices: tuple of :py:class:`~httm.data_structures.common.Slice` objects
+    :rtype: :py:class:`~httm.data_structures.common.SliceStack`
+    """
+    if isinstance(slices, SliceStack):
+        return slices
+    assert len(slices) > 0, "There must be at least one slice to stack"
+    assert all(image_slice.index == index for index, image_slice in enumerate(slices)), \
+        "Slices must be in index order to be stacked"
+    units = slices[0].units
+    assert all(image_slice.units == units for image_slice in slices), "Slices must all have the same units"
+    return SliceStack(units=units, pixels=numpy.stack([image_slice.pixels for image_slice in slices]))
+
+
+class LazySlices(Sequence):
+    """
+    A sequence of :py:class:`~httm.data_structures.common.Slice` objects whose pixels are only read, for instance
+    from a memory mapped FITS file, when each slice is first accessed.
+
+    Each slice is constructed by calling ``slice_loader`` with the index of the slice the first time it is accessed,
+    and is then kept, so that later accesses return the same pixels.
+    A :py:class:`~httm.data_structures.common.LazySlices` behaves like a tuple of
+    :py:class:`~httm.data_structures.common.Slice` objects, so it may be used as the ``slices`` of a converter.
+
+    :param slice_loader: A function taking the index of a slice and returning that \
+    :py:class:`~httm.data_structures.common.Slice`
+    :type slice_loader: function
+    :param number_of_slices: The number of slices
+    :type number_of_slices: int
+    """
+    __slots__ = ('slice_loader', 'loaded_slices')
+
+    def __init__(self, slice_loader, number_of_slices):
+        self.slice_loader = slice_loader
+        self.loaded_slices = [None] * number_of_slices
+
+    def __len__(self):
+        return len(self.loaded_slices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Slice index out of range: {}".format(index))
+        if self.loaded_slices[index] is None:
+            self.loaded_slices[index] = self.slice_loader(index)
+        return self.loaded_slices[index]
+
+    def __repr__(self):
+        return "LazySlices(loaded={loaded}, number_of_slices={number_of_slices})".format(
+            loaded=[index for index, image_slice in enumerate(self.loaded_slices) if image_slice is not None],
+            number_of_slices=len(self))
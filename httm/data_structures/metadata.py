@@ -143,7 +143,9 @@ parameters = OrderedDict([
     ('random_seed', {
         'type': 'int',
         'documentation': 'The pseudo random number generator seed. '
-                         'The default value of ``-1`` creates a seed from the system clock.',
+                         'Each CCD, slice, frame and transformation draws from an independent stream derived '
+                         'from the seed, so a simulation is reproducible however it is scheduled. '
+                         'The default value of ``-1`` creates a seed from the entropy of the operating system.',
         'short_documentation': 'The pseudo random number generator seed',
         'default': -1,
         'standard_fits_keyword': 'RNGSEED',
@@ -171,6 +173,19 @@ parameters = OrderedDict([
         'alternate_fits_keywords': [],
         'required_keyword': False,
     }),
+    ('blooming_model', {
+        'type': 'str',
+        'documentation': 'How blooming is simulated. '
+                         '``diffusion`` repeatedly diffuses charge above the blooming threshold until no pixel is '
+                         'above the full well, while ``charge_spill`` spills the charge above the full well along '
+                         'each column in a single pass, at a cost that does not depend on the excess charge.',
+        'short_documentation': 'Blooming model: diffusion or charge_spill',
+        'default': 'diffusion',
+        'standard_fits_keyword': 'BLMMODEL',
+        'forbidden_fits_keywords': [],
+        'alternate_fits_keywords': [],
+        'required_keyword': False,
+    }),
     ('gain_loss', {
         'type': 'float',
         'documentation': 'The relative decrease in video gain over the total ADC range. '
@@ -197,6 +212,18 @@ parameters = OrderedDict([
         'alternate_fits_keywords': [],
         'required_keyword': False,
     }),
+    ('undershoot_inverse', {
+        'type': 'str',
+        'documentation': 'How undershoot is removed when calibrating. '
+                         '``approximate`` convolves each row with the kernel ``<1, undershoot_parameter>``, '
+                         'while ``exact`` solves the recursion that exactly inverts simulated undershoot.',
+        'short_documentation': 'Undershoot removal: approximate or exact',
+        'default': 'approximate',
+        'standard_fits_keyword': 'UNDRINV',
+        'forbidden_fits_keywords': [],
+        'alternate_fits_keywords': [],
+        'required_keyword': False,
+    }),
     ('single_frame_baseline_adus', {
         'type': 'float',
         'documentation': 'The mean ADU for a pixel with zero electrons for a single '
@@ -39,6 +39,7 @@ raw_converter_parameters = OrderedDict((k, parameters[k])
                                                  'smear_rows',
                                                  'gain_loss',
                                                  'undershoot_parameter',
+                                                 'undershoot_inverse',
                                                  'pattern_noise'
                                                  ])
 
@@ -0,0 +1,162 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.fits_utilities.compression``
+===================================
+
+This module contains functions for reading and writing tile compressed FITS files, in which each image is stored
+as a :py:class:`astropy.io.fits.CompImageHDU` extension after an empty primary HDU.
+
+Floating point images are quantized before they are compressed, with ``quantize_level`` setting the quantization
+step as a fraction of the noise of each tile, or, if negative, as an absolute step. Integer images are compressed
+losslessly.
+
+Compressed images are decompressed in bands of rows on a pool of threads, since the codecs of :py:mod:`astropy`
+release the GIL while they decompress a tile.
+"""
+
+from collections import OrderedDict
+
+import numpy
+from astropy.io.fits import CompImageHDU, HDUList, PrimaryHDU
+
+from .header_tools import is_image_header
+from ..transformations.common import slice_executor
+
+# The tile compression algorithms supported by :py:class:`astropy.io.fits.CompImageHDU`
+COMPRESSION_TYPES = ('RICE_1', 'GZIP_1', 'GZIP_2', 'HCOMPRESS_1')
+
+# The methods of quantizing floating point images, and their values in the FITS tile compression convention
+QUANTIZE_METHODS = OrderedDict([
+    ('no_dither', -1),
+    ('subtractive_dither_1', 1),
+    ('subtractive_dither_2', 2),
+])
+
+# Seed the dither of each tile from the checksum of its data, rather than from the clock,
+# so that an image always compresses to the same file
+DITHER_SEED_CHECKSUM = -1
+
+
+def compressed_header_data_unit(header_data_unit, compression, quantize_level=None, quantize_method=None):
+    """
+    Tile compress the image of an HDU.
+
+    :param header_data_unit: An HDU holding an image
+    :type header_data_unit: :py:class:`astropy.io.fits.PrimaryHDU` or :py:class:`astropy.io.fits.ImageHDU`
+    :param compression: The compression algorithm, one of \
+    :py:const:`~httm.fits_utilities.compression.COMPRESSION_TYPES`
+    :type compression: str
+    :param quantize_level: The quantization level of floating point images. If ``None``, the default of \
+    :py:class:`astropy.io.fits.CompImageHDU` is used
+    :type quantize_level: float
+    :param quantize_method: The quantization method of floating point images, one of \
+    :py:const:`~httm.fits_utilities.compression.QUANTIZE_METHODS`. If ``None``, the default of \
+    :py:class:`astropy.io.fits.CompImageHDU` is used
+    :type quantize_method: str
+    :rtype: :py:class:`astropy.io.fits.CompImageHDU`
+    """
+    assert compression in COMPRESSION_TYPES, \
+        "compression must be one of {}, not {}".format(list(COMPRESSION_TYPES), compression)
+    assert quantize_method is None or quantize_method in QUANTIZE_METHODS, \
+        "quantize_method must be one of {}, not {}".format(list(QUANTIZE_METHODS), quantize_method)
+    quantization = {}
+    if quantize_level is not None:
+        quantization['quantize_level'] = quantize_level
+    if quantize_method is not None:
+        quantization['quantize_method'] = QUANTIZE_METHODS[quantize_method]
+    return CompImageHDU(data=header_data_unit.data,
+                        header=header_data_unit.header,
+                        compression_type=compression,
+                        dither_seed=DITHER_SEED_CHECKSUM,
+                        **quantization)
+
+
+def is_compressed_image(header_data_unit):
+    """
+    Whether an HDU holds a tile compressed image.
+
+    :param header_data_unit: An HDU
+    :type header_data_unit: :py:class:`astropy.io.fits.hdu.base._BaseHDU`
+    :rtype: bool
+    """
+    return isinstance(header_data_unit, CompImageHDU)
+
+
+def decompressed_image_data(header_data_unit, workers=None):
+    """
+    Decompress the image of a tile compressed HDU, decompressing bands of its rows concurrently.
+
+    :param header_data_unit: An HDU holding a tile compressed image
+    :type header_data_unit: :py:class:`astropy.io.fits.CompImageHDU`
+    :param workers: The number of threads to decompress the image with. If ``None`` or ``1``, \
+    the image is decompressed in the calling thread
+    :type workers: int
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    assert is_compressed_image(header_data_unit), "The HDU must hold a tile compressed image"
+    executor = slice_executor(workers)
+    if executor is None:
+        return header_data_unit.data
+    row_count = header_data_unit.shape[-2]
+    band_size = -(-row_count // workers)
+    bands = [slice(start, min(start + band_size, row_count)) for start in range(0, row_count, band_size)]
+    section = header_data_unit.section
+    try:
+        # The first band is decompressed in the calling thread, which reads the table of compressed tiles
+        # before the other threads share it
+        first_band = section[..., bands[0], :]
+        return numpy.concatenate([first_band] + executor.map(lambda band: section[..., band, :], bands[1:]),
+                                 axis=-2)
+    finally:
+        executor.close()
+        executor.join()
+
+
+def compress_hdulist(header_data_unit_list, compression=None, quantize_level=None, quantize_method=None):
+    # type: (HDUList, str, float, str) -> HDUList
+    """
+    Tile compress each image of an HDU list, see
+    :py:func:`~httm.fits_utilities.compression.compressed_header_data_unit`.
+
+    An image in the primary HDU is moved to a compressed extension after an empty primary HDU,
+    since the primary HDU cannot be compressed. HDUs without an image are kept as they are.
+
+    :param header_data_unit_list: The HDU list to compress
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :param compression: The compression algorithm. If ``None``, the HDU list is returned uncompressed
+    :type compression: str
+    :param quantize_level: The quantization level of floating point images
+    :type quantize_level: float
+    :param quantize_method: The quantization method of floating point images
+    :type quantize_method: str
+    :rtype: :py:class:`astropy.io.fits.HDUList`
+    """
+    if compression is None:
+        return header_data_unit_list
+    compressed_header_data_units = []
+    for index, header_data_unit in enumerate(header_data_unit_list):
+        if not is_image_header(header_data_unit.header):
+            compressed_header_data_units.append(header_data_unit)
+            continue
+        if index == 0:
+            compressed_header_data_units.append(PrimaryHDU())
+        compressed_header_data_units.append(compressed_header_data_unit(header_data_unit, compression,
+                                                                        quantize_level=quantize_level,
+                                                                        quantize_method=quantize_method))
+    return HDUList(compressed_header_data_units)
@@ -32,11 +32,19 @@ import astropy
 import numpy
 from astropy.io.fits import HDUList, PrimaryHDU, Header
 
-from .header_tools import get_header_setting, set_header_settings
-from ..data_structures.common import Slice, ConversionMetaData
+from .compression import compress_hdulist
+from .compression import decompressed_image_data, is_compressed_image
+from .multi_extension import is_multi_extension, single_image_index, transform_extensions, \
+    write_multi_extension_fits
+from .header_tools import get_header_setting, set_header_settings, is_scaled_image
+from ..data_structures.common import Slice, ConversionMetaData, LazySlices, stack_slices
 from ..data_structures.electron_flux_converter import \
     SingleCCDElectronFluxConverterFlags, SingleCCDElectronFluxConverterParameters, \
     SingleCCDElectronFluxConverter, electron_flux_transformation_flags, electron_flux_converter_parameters
+from ..transformations.caching import TransformationCache
+from ..transformations.common import slice_executor
+from ..transformations.constants import TRANSFORMATION_CACHE_SIZE
+from ..transformations.profiling import Profiler
 from ..transformations.electron_flux_converters_to_raw import transform_electron_flux_converter
 
 
@@ -48,12 +56,14 @@ def make_slice_from_electron_flux_data(
         late_dark_pixel_columns,
         final_dark_pixel_rows,
         smear_rows,
-        index):
-    # type: (numpy.ndarray, int, int, int, int, int) -> Slice
+        index,
+        dtype=None):
+    # type: (numpy.ndarray, int, int, int, int, int, numpy.dtype) -> Slice
     """
     Construct a slice from an array of electron flux pixel data given a specified index.
 
     Result is in *electron counts*.
+    The pixels may have leading axes, such as the frame axis of a cube of frames.
 
     :param pixels: Image pixels from the electron flux data
     :type pixels: :py:class:`numpy.ndarray`
@@ -67,18 +77,22 @@ def make_slice_from_electron_flux_data(
     :type smear_rows: int
     :param index: The index of the slice to construct
     :type index: int
+    :param dtype: The floating point type of the pixels of the slice; if ``None``, double precision
+    :type dtype: :py:class:`numpy.dtype`
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
-    image_and_smear_and_final_dark_pixels = numpy.vstack(
-        [pixels,
-         numpy.zeros((final_dark_pixel_rows + smear_rows, pixels.shape[1]))])
-    row_count = image_and_smear_and_final_dark_pixels.shape[0]
-    early_dark_pixels = numpy.zeros((row_count, early_dark_pixel_columns))
-    late_dark_pixels = numpy.zeros((row_count, late_dark_pixel_columns))
-    pixel_data = numpy.hstack([early_dark_pixels, image_and_smear_and_final_dark_pixels, late_dark_pixels]) \
-        if index % 2 == 0 else numpy.fliplr(numpy.hstack([late_dark_pixels,
-                                                          image_and_smear_and_final_dark_pixels,
-                                                          early_dark_pixels]))
+    pixels = numpy.asarray(pixels, dtype=dtype)
+    image_and_smear_and_final_dark_pixels = numpy.concatenate(
+        [pixels, numpy.zeros(pixels.shape[:-2] + (final_dark_pixel_rows + smear_rows, pixels.shape[-1]), dtype=dtype)],
+        axis=-2)
+    leading_and_row_shape = image_and_smear_and_final_dark_pixels.shape[:-1]
+    early_dark_pixels = numpy.zeros(leading_and_row_shape + (early_dark_pixel_columns,), dtype=dtype)
+    late_dark_pixels = numpy.zeros(leading_and_row_shape + (late_dark_pixel_columns,), dtype=dtype)
+    pixel_data = numpy.concatenate([early_dark_pixels, image_and_smear_and_final_dark_pixels, late_dark_pixels],
+                                   axis=-1) \
+        if index % 2 == 0 else numpy.concatenate([late_dark_pixels,
+                                                  image_and_smear_and_final_dark_pixels,
+                                                  early_dark_pixels], axis=-1)[..., ::-1]
     return Slice(
         pixels=pixel_data,
         index=index,
@@ -144,33 +158,54 @@ def electron_flux_converter_parameters_from_fits_header(fits_header, parameter_o
     )
 
 
+def integer_adu_dtype(maximum_adu):
+    # type: (float) -> numpy.dtype
+    """
+    The smallest integer data type that holds the ADU values of a simulated raw image, as flight data does:
+    :py:class:`numpy.uint16`, written with ``BZERO`` set to 32768, for a single exposure,
+    or :py:class:`numpy.int32` for the sum of many exposures.
+
+    :param maximum_adu: The largest ADU value in the image, such as the clip level of its stacked exposures
+    :type maximum_adu: float
+    :rtype: :py:class:`numpy.dtype`
+    """
+    assert maximum_adu <= numpy.iinfo(numpy.int32).max, \
+        "ADU values up to {} do not fit in a 32 bit integer".format(maximum_adu)
+    return numpy.dtype(numpy.uint16) if maximum_adu <= numpy.iinfo(numpy.uint16).max else numpy.dtype(numpy.int32)
+
+
 # noinspection SpellCheckingInspection
-def electron_flux_converter_to_simulated_raw_hdulist(converter):
-    # type: (SingleCCDElectronFluxConverter) -> HDUList
+def electron_flux_converter_to_simulated_raw_hdulist(converter, integer_adu=False):
+    # type: (SingleCCDElectronFluxConverter, bool) -> HDUList
     """
     This function converts a :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     into an :py:class:`astropy.io.fits.HDUList` object, suitable for writing out to a simulated raw FITS file.
+    Slices with a leading frame axis are laid out as a cube of frames.
 
     :param converter: An electron flux converter object
     :type converter: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param integer_adu: Whether to round the pixels, which must be in ADU, to integers \
+    clipped to the clip level of the stacked exposures, and write them in the smallest integer data type that \
+    holds them, see :py:func:`~httm.fits_utilities.electron_flux_fits.integer_adu_dtype`
+    :type integer_adu: bool
     :rtype: :py:class:`astropy.io.fits.HDUList`
     """
     early_dark_pixel_columns = converter.parameters.early_dark_pixel_columns  # type: int
     late_dark_pixel_columns = converter.parameters.late_dark_pixel_columns  # type: int
     # noinspection PyUnresolvedReferences
-    left_dark_parts = [image_slice.pixels[:, :early_dark_pixel_columns]
+    left_dark_parts = [image_slice.pixels[..., :early_dark_pixel_columns]
                        for image_slice in converter.slices]  # type: list
     # noinspection PyUnresolvedReferences
-    right_dark_parts = [image_slice.pixels[:, -late_dark_pixel_columns:]
+    right_dark_parts = [image_slice.pixels[..., -late_dark_pixel_columns:]
                         for image_slice in converter.slices]  # type: list
     # noinspection PyUnresolvedReferences
-    image_parts = [image_slice.pixels[:, early_dark_pixel_columns:-late_dark_pixel_columns]
+    image_parts = [image_slice.pixels[..., early_dark_pixel_columns:-late_dark_pixel_columns]
                    for image_slice in converter.slices]  # type: list
 
     for i in range(1, len(converter.slices), 2):
-        left_dark_parts[i] = numpy.fliplr(left_dark_parts[i])
-        right_dark_parts[i] = numpy.fliplr(right_dark_parts[i])
-        image_parts[i] = numpy.fliplr(image_parts[i])
+        left_dark_parts[i] = left_dark_parts[i][..., ::-1]
+        right_dark_parts[i] = right_dark_parts[i][..., ::-1]
+        image_parts[i] = image_parts[i][..., ::-1]
     header_with_parameters = set_header_settings(
         converter.parameters,
         electron_flux_converter_parameters,
@@ -181,14 +216,23 @@ def electron_flux_converter_to_simulated_raw_hdulist(converter):
         header_with_parameters)
     if converter.conversion_metadata.command is not None:
         header_with_transformation_flags.add_history(converter.conversion_metadata.command)
-    return HDUList(PrimaryHDU(header=header_with_transformation_flags,
-                              data=numpy.hstack(left_dark_parts + image_parts + right_dark_parts)))
+    image_data = numpy.concatenate(left_dark_parts + image_parts + right_dark_parts, axis=-1)
+    if integer_adu:
+        assert all(image_slice.units == 'ADU' for image_slice in converter.slices), \
+            "Only pixels in ADU can be written as integers"
+        maximum_adu = converter.parameters.clip_level_adu * converter.parameters.number_of_exposures
+        # The concatenated image is a new array, so it is rounded and clipped in place
+        numpy.rint(image_data, out=image_data)
+        numpy.clip(image_data, 0, maximum_adu, out=image_data)
+        image_data = image_data.astype(integer_adu_dtype(maximum_adu))
+    return HDUList(PrimaryHDU(header=header_with_transformation_flags, data=image_data))
 
 
 # TODO: Documentation
 # noinspection SpellCheckingInspection
-def write_electron_flux_converter_to_simulated_raw_fits(converter, output_file, checksum=True):
-    # type: (SingleCCDElectronFluxConverter, str) -> None
+def write_electron_flux_converter_to_simulated_raw_fits(converter, output_file, checksum=True, compression=None,
+                                                        quantize_level=None, quantize_method=None, integer_adu=False):
+    # type: (SingleCCDElectronFluxConverter, str, bool, str, float, str, bool) -> None
     """
     Write a :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     to a simulated raw FITS file.
@@ -201,9 +245,22 @@ def write_electron_flux_converter_to_simulated_raw_fits(converter, output_file,
     :type output_file: str
     :param checksum:
     :type checksum: bool
+    :param compression: If specified, tile compress the image with this algorithm, \
+    see :py:func:`~httm.fits_utilities.compression.compress_hdulist`
+    :type compression: str
+    :param quantize_level: The quantization level of a compressed floating point image
+    :type quantize_level: float
+    :param quantize_method: The quantization method of a compressed floating point image
+    :type quantize_method: str
+    :param integer_adu: Whether to write the pixels as integer ADU values, \
+    see :py:func:`~httm.fits_utilities.electron_flux_fits.electron_flux_converter_to_simulated_raw_hdulist`
+    :type integer_adu: bool
     :rtype: NoneType
     """
-    hdulist = electron_flux_converter_to_simulated_raw_hdulist(converter)
+    hdulist = compress_hdulist(electron_flux_converter_to_simulated_raw_hdulist(converter, integer_adu=integer_adu),
+                               compression=compression,
+                               quantize_level=quantize_level,
+                               quantize_method=quantize_method)
 
     try:
         os.remove(output_file)
@@ -220,7 +277,12 @@ def electron_flux_converter_from_hdulist(
         command=None,
         origin_file_name=None,
         flag_overrides=None,
-        parameter_overrides=None):
+        parameter_overrides=None,
+        stacked=False,
+        lazy=False,
+        dtype=None,
+        extension=None,
+        workers=None):
     """
     TODO: Document me
 
@@ -231,29 +293,66 @@ def electron_flux_converter_from_hdulist(
     :type flag_overrides: :py:class:`object` or :py:class:`dict`
     :param parameter_overrides:
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param stacked: Whether to store the slices in a single :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param lazy: Whether to read the pixels of each slice only when it is first accessed, \
+    see :py:class:`~httm.data_structures.common.LazySlices`; the HDU list must stay open until then. \
+    Stacked slices are always read.
+    :type lazy: bool
+    :param dtype: The floating point type of the pixels of each slice, such as :py:class:`numpy.float32`; \
+    if ``None``, double precision
+    :type dtype: :py:class:`numpy.dtype`
+    :param extension: The index of the HDU to read from a multi-extension FITS file; \
+    if ``None``, the FITS file must hold a single image, \
+    see :py:func:`~httm.fits_utilities.multi_extension.single_image_index`
+    :type extension: int
+    :param workers: The number of threads to decompress a tile compressed image with, \
+    see :py:func:`~httm.fits_utilities.compression.decompressed_image_data`
+    :type workers: int
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    if extension is None:
+        extension = single_image_index(header_data_unit_list)
+        assert extension is not None, \
+            "Only a single image per FITS file is supported, unless an extension is specified"
+    header_data_unit = header_data_unit_list[extension]
     conversion_metadata = ConversionMetaData(command=command,
                                              origin_file_name=origin_file_name,
-                                             header=header_data_unit_list[0].header)  # type: ConversionMetaData
+                                             header=header_data_unit.header)  # type: ConversionMetaData
     flag_overrides = electron_flux_converter_flags_from_fits_header(conversion_metadata.header,
                                                                     flag_overrides=flag_overrides)
     parameters = electron_flux_converter_parameters_from_fits_header(conversion_metadata.header,
                                                                      parameter_overrides=parameter_overrides)
-    assert len(header_data_unit_list) == 1, "Only a single image per FITS file is supported"
-    assert header_data_unit_list[0].data.shape[1] % parameters.number_of_slices == 0, \
+    assert len(header_data_unit.shape) in (2, 3), "The image must be a single frame or a cube of frames"
+    column_count = header_data_unit.shape[-1]
+    assert column_count % parameters.number_of_slices == 0, \
         "Image did not have the specified number of slices"
+
+    # The pixels of memory mapped data are only read when they are touched, but scaled and tile compressed data
+    # is read in full as soon as it is accessed, so it is read through sections that only cover the pixels
+    # (and so only decompress the tiles) of a slice
+    if lazy and (is_scaled_image(header_data_unit.header) or is_compressed_image(header_data_unit)):
+        image_data = header_data_unit.section
+    elif is_compressed_image(header_data_unit):
+        image_data = decompressed_image_data(header_data_unit, workers=workers)
+    else:
+        image_data = header_data_unit.data
+    slice_column_count = column_count // parameters.number_of_slices
+
+    def load_slice(index):
+        return make_slice_from_electron_flux_data(
+            image_data[..., index * slice_column_count:(index + 1) * slice_column_count],
+            parameters.early_dark_pixel_columns,
+            parameters.late_dark_pixel_columns,
+            parameters.final_dark_pixel_rows,
+            parameters.smear_rows,
+            index,
+            dtype=dtype)
+
+    slices = LazySlices(load_slice, parameters.number_of_slices) if lazy \
+        else tuple(map(load_slice, range(parameters.number_of_slices)))
     return SingleCCDElectronFluxConverter(
-        slices=tuple(
-            map(lambda pixel_data, index:
-                make_slice_from_electron_flux_data(pixel_data,
-                                                   parameters.early_dark_pixel_columns,
-                                                   parameters.late_dark_pixel_columns,
-                                                   parameters.final_dark_pixel_rows,
-                                                   parameters.smear_rows,
-                                                   index),
-                numpy.hsplit(header_data_unit_list[0].data, parameters.number_of_slices),
-                range(parameters.number_of_slices))),
+        slices=stack_slices(slices) if stacked else slices,
         conversion_metadata=conversion_metadata,
         parameters=parameters,
         flags=flag_overrides,
@@ -266,12 +365,15 @@ def electron_flux_converter_from_fits(
         command=None,
         checksum=True,
         flag_overrides=None,
-        parameter_overrides=None):
+        parameter_overrides=None,
+        stacked=False,
+        lazy=False,
+        dtype=None):
     """
     TODO: Document me
 
-    :param input_file:
-    :type input_file: str
+    :param input_file: A FITS file name, or an open :py:class:`astropy.io.fits.HDUList`
+    :type input_file: :py:class:`str` or :py:class:`astropy.io.fits.HDUList`
     :param command:
     :type command: str
     :param checksum:
@@ -280,14 +382,24 @@ def electron_flux_converter_from_fits(
     :type flag_overrides: :py:class:`object` or :py:class:`dict`
     :param parameter_overrides:
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param stacked: Whether to store the slices in a single :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param lazy: Whether to read the pixels of each slice from the memory mapped file only when it is first \
+    accessed, see :py:class:`~httm.data_structures.common.LazySlices`
+    :type lazy: bool
+    :param dtype: The data type of the pixels of each slice, such as :py:class:`numpy.float32`
+    :type dtype: :py:class:`numpy.dtype`
     :rtype:
     """
     return electron_flux_converter_from_hdulist(
-        astropy.io.fits.open(input_file, checksum=checksum),
+        input_file if isinstance(input_file, HDUList) else astropy.io.fits.open(input_file, checksum=checksum),
         command=command,
-        origin_file_name=input_file,
+        origin_file_name=input_file.filename() if isinstance(input_file, HDUList) else input_file,
         flag_overrides=flag_overrides,
         parameter_overrides=parameter_overrides,
+        stacked=stacked,
+        lazy=lazy,
+        dtype=dtype,
     )
 
 
@@ -298,13 +410,39 @@ def electron_flux_fits_to_raw(
         checksum=True,
         flag_overrides=None,
         parameter_overrides=None,
-        transformation_settings=None):
+        transformation_settings=None,
+        stacked=False,
+        in_place=False,
+        lazy=False,
+        dtype=None,
+        workers=None,
+        profile_output=None,
+        profile_header=False,
+        compression=None,
+        quantize_level=None,
+        quantize_method=None,
+        integer_adu=False,
+        cache_directory=None,
+        cache_size=None,
+        fuse=True):
     """
     Read an electron flux FITS file in as input, with units specified in electron counts,
     run a series of transformations over it, and output the results to a specified file.
 
-    :param fits_input_file: A FITS file with electron counts
-    :type fits_input_file: str
+    The image may be a single frame, or a cube of frames with shape ``(frames, rows, columns)``. Each transformation
+    runs over all of the frames at once, with the same pattern noise and ringing applied to every frame and
+    a separate random baseline and noise drawn for each, and the output is a simulated raw cube.
+
+    A multi-extension FITS file is simulated one image extension at a time, each with the parameters in its own
+    header, on a pool of ``workers`` threads, and written to a single multi-extension FITS file in the same order,
+    see :py:func:`~httm.fits_utilities.multi_extension.transform_extensions`. The random numbers of each extension
+    are keyed by its camera and CCD numbers, see :py:func:`~httm.transformations.common.slice_seed_sequences`,
+    so a seeded simulation is reproducible with any number of workers, and extensions should record distinct
+    camera and CCD numbers to draw independent noise.
+
+    :param fits_input_file: A FITS file with electron counts, which may be gzip (``.fits.gz``) \
+    or tile (``.fits.fz``) compressed, or an open :py:class:`astropy.io.fits.HDUList`
+    :type fits_input_file: :py:class:`str` or :py:class:`astropy.io.fits.HDUList`
     :param fits_output_file: A FITS file to use as output; will be clobbered if it exists
     :type fits_output_file: str
     :param command: The command issued to be recorded in the ``HISTORY`` header keyword in the output
@@ -319,16 +457,140 @@ def electron_flux_fits_to_raw(
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
     :param transformation_settings: An object which specifies which transformations should run, rather than the defaults
     :type transformation_settings: object
+    :param stacked: Whether to process the slices stacked in a single array, \
+    see :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param in_place: Whether to run the transformations in place on a single working buffer, \
+    see :py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter`
+    :type in_place: bool
+    :param lazy: Whether to read the pixels of each slice from the memory mapped input file only when it is \
+    first transformed, see :py:class:`~httm.data_structures.common.LazySlices`. \
+    The extensions of a multi-extension FITS file are always read before they are transformed.
+    :type lazy: bool
+    :param dtype: The data type to process the pixels in, such as :py:class:`numpy.float32`, \
+    which is also the data type of the output
+    :type dtype: :py:class:`numpy.dtype`
+    :param workers: The number of threads to transform the slices of each transformation with, \
+    see :py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter`, \
+    and to decompress a tile compressed input with, \
+    or, for a multi-extension FITS file, the number of threads to transform the extensions with
+    :type workers: int
+    :param profile_output: If specified, append the wall time, CPU time, peak allocated memory and pixel shapes and \
+    data types of each transformation and each of its slices as a line of JSON to this file, or to the standard \
+    output if ``-``, see :py:class:`~httm.transformations.profiling.Profiler`. \
+    The profiles of each extension of a multi-extension FITS file are appended as a separate line.
+    :type profile_output: str
+    :param profile_header: Whether to record the same profiles as ``HISTORY`` cards in the output header
+    :type profile_header: bool
+    :param compression: If specified, tile compress the output with this algorithm, one of \
+    :py:const:`~httm.fits_utilities.compression.COMPRESSION_TYPES`, see \
+    :py:func:`~httm.fits_utilities.compression.compress_hdulist`
+    :type compression: str
+    :param quantize_level: The quantization level of a compressed floating point output
+    :type quantize_level: float
+    :param quantize_method: The quantization method of a compressed floating point output, one of \
+    :py:const:`~httm.fits_utilities.compression.QUANTIZE_METHODS`
+    :type quantize_method: str
+    :param integer_adu: Whether to round the simulated pixels and write them as integer ADU values, \
+    as :py:class:`numpy.uint16` for a single exposure or :py:class:`numpy.int32` for many, \
+    see :py:func:`~httm.fits_utilities.electron_flux_fits.integer_adu_dtype`
+    :type integer_adu: bool
+    :param cache_directory: If specified, keep the intermediate states of the simulation in this directory, \
+    and resume from the latest state already kept for the same image and parameters, \
+    see :py:class:`~httm.transformations.caching.TransformationCache`
+    :type cache_directory: str
+    :param cache_size: The largest total size in bytes of the states kept in ``cache_directory``, \
+    defaulting to :py:const:`~httm.transformations.constants.TRANSFORMATION_CACHE_SIZE`
+    :type cache_size: int
+    :param fuse: Whether to fuse neighbouring transformations into single passes over the pixels; if ``False``, \
+    each transformation runs in its own pass, so that its profile is recorded under its own name, \
+    see :py:func:`~httm.transformations.plans.transformation_plan`
+    :type fuse: bool
     """
-    single_ccd_electron_flux_converter = electron_flux_converter_from_fits(
-        fits_input_file,
-        command=command,
-        checksum=checksum,
-        flag_overrides=flag_overrides,
-        parameter_overrides=parameter_overrides)
-    write_electron_flux_converter_to_simulated_raw_fits(
-        transform_electron_flux_converter(
+    header_data_unit_list = fits_input_file if isinstance(fits_input_file, HDUList) \
+        else astropy.io.fits.open(fits_input_file, checksum=checksum)
+    origin_file_name = header_data_unit_list.filename() if isinstance(fits_input_file, HDUList) else fits_input_file
+
+    def read_extension(extension, **keyword_arguments):
+        return electron_flux_converter_from_hdulist(
+            header_data_unit_list,
+            command=command,
+            origin_file_name=origin_file_name,
+            flag_overrides=flag_overrides,
+            parameter_overrides=parameter_overrides,
+            stacked=stacked,
+            dtype=dtype,
+            extension=extension,
+            **keyword_arguments)
+
+    profiling = profile_output is not None or profile_header
+    cache = None if cache_directory is None \
+        else TransformationCache(cache_directory, maximum_bytes=cache_size or TRANSFORMATION_CACHE_SIZE)
+    if is_multi_extension(header_data_unit_list):
+        extension_profilers = {}
+
+        def simulate_extension(extension, electron_flux_converter):
+            profiler = extension_profilers[extension] = Profiler() if profiling else None
+            simulated_raw_converter = transform_electron_flux_converter(
+                electron_flux_converter,
+                transformation_settings=transformation_settings,
+                in_place=in_place,
+                profiler=profiler,
+                cache=cache,
+                fuse=fuse)
+            if profile_header:
+                simulated_raw_converter = profiler.converter_with_profiled_header(simulated_raw_converter)
+            return electron_flux_converter_to_simulated_raw_hdulist(simulated_raw_converter, integer_adu=integer_adu)
+
+        # Memory is traced for all of the extensions at once
+        memory_tracer = Profiler()
+        try:
+            if profiling:
+                memory_tracer.trace_memory()
+            simulated_raw_hdulist = transform_extensions(read_extension, simulate_extension, header_data_unit_list,
+                                                         workers=workers)
+        finally:
+            memory_tracer.trace_memory(False)
+        write_multi_extension_fits(simulated_raw_hdulist, fits_output_file, checksum=checksum,
+                                   compression=compression,
+                                   quantize_level=quantize_level,
+                                   quantize_method=quantize_method)
+        if profile_output is not None:
+            for extension in sorted(extension_profilers):
+                extension_profilers[extension].write_json(profile_output,
+                                                          input_file=origin_file_name,
+                                                          output_file=fits_output_file,
+                                                          extension=extension)
+        return
+
+    single_ccd_electron_flux_converter = read_extension(None, lazy=lazy, workers=workers)
+    profiler = Profiler() if profiling else None
+    executor = slice_executor(workers)
+    try:
+        if profiler is not None:
+            profiler.trace_memory()
+        simulated_raw_converter = transform_electron_flux_converter(
             single_ccd_electron_flux_converter,
-            transformation_settings=transformation_settings),
-        fits_output_file,
-        checksum=checksum)
+            transformation_settings=transformation_settings,
+            in_place=in_place,
+            executor=executor,
+            profiler=profiler,
+            cache=cache,
+            fuse=fuse)
+    finally:
+        if profiler is not None:
+            profiler.trace_memory(False)
+        if executor is not None:
+            executor.close()
+            executor.join()
+    if profile_header:
+        simulated_raw_converter = profiler.converter_with_profiled_header(simulated_raw_converter)
+    write_electron_flux_converter_to_simulated_raw_fits(simulated_raw_converter, fits_output_file, checksum=checksum,
+                                                        compression=compression,
+                                                        quantize_level=quantize_level,
+                                                        quantize_method=quantize_method,
+                                                        integer_adu=integer_adu)
+    if profile_output is not None:
+        profiler.write_json(profile_output,
+                            input_file=single_ccd_electron_flux_converter.conversion_metadata.origin_file_name,
+                            output_file=fits_output_file)
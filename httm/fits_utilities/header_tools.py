@@ -25,10 +25,14 @@ such as parameters, flags, or history from a FITS file header.
 
 import logging
 
+import numpy
 from astropy.io.fits import Header
 
 logger = logging.getLogger(__name__)
 
+# Punctuation between the digits and letters, which the ASCII encoding of a checksum avoids
+CHECKSUM_EXCLUDED_CHARACTERS = tuple(map(ord, ':;<=>?@[\\]^_`'))
+
 
 # TODO: Documentation
 def set_header_settings(settings, setting_dictionary, fits_header):
@@ -129,3 +133,88 @@ def get_header_setting(key_name, setting_dictionary, fits_header, override_value
 
     else:
         raise Exception("Cannot handle fits keyword (invalid format): {}".format(fits_keyword))
+
+
+def is_scaled_image(fits_header):
+    # type: (Header) -> bool
+    """
+    Check if the image data described by a FITS header is scaled using the ``BSCALE`` and ``BZERO`` keywords,
+    as unsigned integer images are.
+
+    :param fits_header: The header of an image HDU
+    :type fits_header: :py:class:`astropy.io.fits.Header`
+    :rtype: bool
+    """
+    return fits_header.get('BSCALE', 1) != 1 or fits_header.get('BZERO', 0) != 0
+
+
+def is_image_header(fits_header):
+    # type: (Header) -> bool
+    """
+    Check if a FITS header describes an image, or a cube of frames, rather than an empty HDU or a table.
+    The header of a tile compressed image describes the image it holds.
+
+    :param fits_header: The header of an HDU
+    :type fits_header: :py:class:`astropy.io.fits.Header`
+    :rtype: bool
+    """
+    return fits_header.get('XTENSION', 'IMAGE').strip() == 'IMAGE' and fits_header.get('NAXIS', 0) >= 2
+
+
+def ones_complement_checksum(data, checksum=0):
+    # type: (numpy.ndarray, int) -> int
+    """
+    Add data to a 32 bit ones' complement checksum, as recorded by the ``DATASUM`` and ``CHECKSUM`` keywords
+    of a FITS file. The checksum of data written a piece at a time can be accumulated a piece at a time.
+
+    :param data: The data, laid out as it is written to the FITS file, which must be a whole number of 32 bit words; \
+    zero padding does not change the checksum
+    :type data: :py:class:`numpy.ndarray`
+    :param checksum: The checksum of the preceding data
+    :type checksum: int
+    :rtype: int
+    """
+    data = numpy.ascontiguousarray(data).reshape(-1)
+    assert data.nbytes % 4 == 0, "Data must be a whole number of 32 bit words"
+    checksum += int(numpy.sum(data.view('>u4'), dtype=numpy.uint64))
+    while checksum >> 32:
+        checksum = (checksum & 0xFFFFFFFF) + (checksum >> 32)
+    return checksum
+
+
+def header_checksum(fits_header, datasum):
+    # type: (Header, int) -> str
+    """
+    Compute the value of the ``CHECKSUM`` keyword of an HDU from its header and the ``DATASUM`` of its data,
+    encoded as 16 ASCII characters following the FITS checksum convention.
+
+    The ``CHECKSUM`` keyword of the header is taken to be zeros while computing the checksum, and the header
+    should already record the ``DATASUM``.
+
+    :param fits_header: The header of the HDU
+    :type fits_header: :py:class:`astropy.io.fits.Header`
+    :param datasum: The checksum of the data of the HDU, see :py:func:`ones_complement_checksum`
+    :type datasum: int
+    :rtype: str
+    """
+    header = Header(fits_header, copy=True)
+    header['CHECKSUM'] = '0' * 16
+    checksum = ~ones_complement_checksum(numpy.frombuffer(header.tostring().encode('ascii'), dtype=numpy.uint8),
+                                         datasum) & 0xFFFFFFFF
+    characters = [0] * 16
+    for byte_index in range(4):
+        byte = (checksum >> (24 - 8 * byte_index)) & 0xFF
+        codes = [byte // 4 + ord('0') + byte % 4] + [byte // 4 + ord('0')] * 3
+        adjusted = True
+        while adjusted:
+            adjusted = False
+            for excluded in CHECKSUM_EXCLUDED_CHARACTERS:
+                for pair in (0, 2):
+                    if excluded in codes[pair:pair + 2]:
+                        codes[pair] += 1
+                        codes[pair + 1] -= 1
+                        adjusted = True
+        for code_index, code in enumerate(codes):
+            characters[4 * code_index + byte_index] = code
+    # The encoded checksum is rotated right by one character
+    return ''.join(chr(characters[(index + 15) % 16]) for index in range(16))
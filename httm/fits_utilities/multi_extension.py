@@ -0,0 +1,163 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.fits_utilities.multi_extension``
+=======================================
+
+This module contains functions for transforming multi-extension FITS files, in which each image extension
+is an independent CCD frame with its own header parameters.
+
+A FITS file holding a single image after an empty primary HDU, as a tile compressed FITS file does,
+is transformed as a single image rather than as a multi-extension FITS file.
+
+The image extensions are transformed concurrently on a pool of threads, and written back to a single
+multi-extension FITS file in the same order. Extensions without an image, such as an empty primary HDU or a table,
+are copied to the output unchanged.
+"""
+
+import os
+import threading
+
+from astropy.io.fits import HDUList, ImageHDU
+
+from .compression import compress_hdulist
+from .header_tools import is_image_header
+from ..transformations.common import slice_executor
+
+
+def is_multi_extension(header_data_unit_list):
+    # type: (HDUList) -> bool
+    """
+    Whether a FITS file does not hold a single image, see
+    :py:func:`~httm.fits_utilities.multi_extension.single_image_index`, and so should be transformed one image
+    extension at a time.
+
+    :param header_data_unit_list: An open FITS file
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :rtype: bool
+    """
+    return single_image_index(header_data_unit_list) is None
+
+
+def image_extension_indices(header_data_unit_list):
+    # type: (HDUList) -> list
+    """
+    The indices of the HDUs of a FITS file that hold an image, or a cube of frames.
+
+    :param header_data_unit_list: An open FITS file
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :rtype: list of int
+    """
+    return [index for index, header_data_unit in enumerate(header_data_unit_list)
+            if is_image_header(header_data_unit.header)]
+
+
+def single_image_index(header_data_unit_list):
+    # type: (HDUList) -> int
+    """
+    The index of the image of a FITS file that holds a single image, either in its only HDU, or in the only
+    extension after an empty primary HDU, as in a tile compressed FITS file.
+
+    :param header_data_unit_list: An open FITS file
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :return: The index of the image, or ``None`` if the FITS file does not hold a single image
+    :rtype: :py:class:`int` or ``NoneType``
+    """
+    indices = image_extension_indices(header_data_unit_list)
+    if len(indices) != 1 or len(header_data_unit_list) != indices[0] + 1 or len(header_data_unit_list) > 2:
+        return None
+    return indices[0]
+
+
+def transform_extensions(read_extension, transform_extension, header_data_unit_list, workers=None):
+    """
+    Transform each image extension of a multi-extension FITS file, and assemble the results into
+    a multi-extension HDU list in the same order.
+
+    The extensions are read in turn, since the threads share the input file, and transformed concurrently.
+
+    :param read_extension: Reads the converter of the extension with the given index, \
+    such as :py:func:`~httm.fits_utilities.raw_fits.raw_converter_from_hdulist`
+    :type read_extension: function
+    :param transform_extension: Transforms the converter of the extension with the given index, returning an \
+    :py:class:`astropy.io.fits.HDUList` holding the transformed image in its primary HDU
+    :type transform_extension: function
+    :param header_data_unit_list: An open multi-extension FITS file
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :param workers: The number of threads to transform the extensions with. If ``None`` or ``1``, \
+    the extensions are transformed in turn
+    :type workers: int
+    :rtype: :py:class:`astropy.io.fits.HDUList`
+    """
+    indices = image_extension_indices(header_data_unit_list)
+    assert len(indices) > 0, "The FITS file must contain at least one image"
+    read_lock = threading.Lock()
+
+    def read_and_transform_extension(index):
+        with read_lock:
+            converter = read_extension(index)
+        return transform_extension(index, converter)[0]
+
+    executor = slice_executor(workers)
+    try:
+        transformed_header_data_units = dict(zip(
+            indices,
+            map(read_and_transform_extension, indices) if executor is None
+            else executor.map(read_and_transform_extension, indices)))
+    finally:
+        if executor is not None:
+            executor.close()
+            executor.join()
+    return HDUList([header_data_unit if index not in transformed_header_data_units
+                    else transformed_header_data_units[index] if index == 0
+                    else ImageHDU(data=transformed_header_data_units[index].data,
+                                  header=transformed_header_data_units[index].header)
+                    for index, header_data_unit in enumerate(header_data_unit_list)])
+
+
+def write_multi_extension_fits(header_data_unit_list, output_file, checksum=True, compression=None,
+                               quantize_level=None, quantize_method=None):
+    # type: (HDUList, str, bool, str, float, str) -> None
+    """
+    Write a transformed multi-extension HDU list to a FITS file, clobbering it if it exists.
+
+    :param header_data_unit_list: The transformed HDU list, see \
+    :py:func:`~httm.fits_utilities.multi_extension.transform_extensions`
+    :type header_data_unit_list: :py:class:`astropy.io.fits.HDUList`
+    :param output_file: The name of the output file
+    :type output_file: str
+    :param checksum: Whether to write checksums
+    :type checksum: bool
+    :param compression: If specified, tile compress each image with this algorithm, \
+    see :py:func:`~httm.fits_utilities.compression.compress_hdulist`
+    :type compression: str
+    :param quantize_level: The quantization level of compressed floating point images
+    :type quantize_level: float
+    :param quantize_method: The quantization method of compressed floating point images
+    :type quantize_method: str
+    :rtype: NoneType
+    """
+    try:
+        os.remove(output_file)
+    except OSError:
+        pass
+
+    compress_hdulist(header_data_unit_list,
+                     compression=compression,
+                     quantize_level=quantize_level,
+                     quantize_method=quantize_method).writeto(output_file, checksum=checksum)
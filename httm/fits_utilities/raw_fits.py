@@ -29,41 +29,65 @@ from collections import namedtuple
 
 import astropy
 import numpy
-from astropy.io.fits import HDUList, PrimaryHDU
-
-from .header_tools import get_header_setting, set_header_settings
-from ..data_structures.common import Slice, ConversionMetaData
+from astropy.io.fits import HDUList, PrimaryHDU, StreamingHDU
+
+from .compression import compress_hdulist
+from .compression import decompressed_image_data, is_compressed_image
+from .multi_extension import is_multi_extension, single_image_index, transform_extensions, \
+    write_multi_extension_fits
+from .header_tools import get_header_setting, set_header_settings, is_scaled_image, ones_complement_checksum, \
+    header_checksum
+from ..data_structures.common import Slice, ConversionMetaData, LazySlices, stack_slices
 from ..data_structures.raw_converter import SingleCCDRawConverterFlags, SingleCCDRawConverter, \
     raw_transformation_flags, SingleCCDRawConverterParameters, raw_converter_parameters
+from ..transformations.common import slice_executor
+from ..transformations.profiling import Profiler
+from ..transformations.raw_bands_to_calibrated import calibrate_raw_bands
 from ..transformations.raw_converters_to_calibrated import transform_raw_converter
 
 
-# TODO: Documentation
-
-def raw_converter_to_calibrated_hdulist(converter):
-    # type: (SingleCCDRawConverter) -> HDUList
+def raw_converter_to_calibrated_image_data(converter):
+    # type: (SingleCCDRawConverter) -> numpy.ndarray
     """
-    TODO: Document me
+    Lay the slices of a :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` out as the image data
+    of a calibrated FITS file, undoing the readout orientation of odd slices.
+    Slices with a leading frame axis are laid out as a cube of frames.
 
     :param converter:
+    :type converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`numpy.ndarray`
     """
     early_dark_pixel_columns = converter.parameters.early_dark_pixel_columns  # type: int
     late_dark_pixel_columns = converter.parameters.late_dark_pixel_columns  # type: int
     # noinspection PyUnresolvedReferences
-    left_dark_parts = [raw_slice.pixels[:, :early_dark_pixel_columns]
+    left_dark_parts = [raw_slice.pixels[..., :early_dark_pixel_columns]
                        for raw_slice in converter.slices]  # type: list
     # noinspection PyUnresolvedReferences
-    right_dark_parts = [raw_slice.pixels[:, -late_dark_pixel_columns:]
+    right_dark_parts = [raw_slice.pixels[..., -late_dark_pixel_columns:]
                         for raw_slice in converter.slices]  # type: list
     # noinspection PyUnresolvedReferences
-    image_parts = [raw_slice.pixels[:, early_dark_pixel_columns:-late_dark_pixel_columns]
+    image_parts = [raw_slice.pixels[..., early_dark_pixel_columns:-late_dark_pixel_columns]
                    for raw_slice in converter.slices]  # type: list
 
     for i in range(1, len(converter.slices), 2):
-        left_dark_parts[i] = numpy.fliplr(left_dark_parts[i])
-        right_dark_parts[i] = numpy.fliplr(right_dark_parts[i])
-        image_parts[i] = numpy.fliplr(image_parts[i])
+        left_dark_parts[i] = left_dark_parts[i][..., ::-1]
+        right_dark_parts[i] = right_dark_parts[i][..., ::-1]
+        image_parts[i] = image_parts[i][..., ::-1]
+
+    # `+` concatenates python lists
+    return numpy.concatenate(left_dark_parts + image_parts + right_dark_parts, axis=-1)
+
+
+def raw_converter_to_calibrated_header(converter):
+    # type: (SingleCCDRawConverter) -> astropy.io.fits.Header
+    """
+    Construct the header of a calibrated FITS file, recording the parameters and transformation flags of a
+    :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` and the command that produced it.
 
+    :param converter:
+    :type converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`astropy.io.fits.Header`
+    """
     header_with_parameters = set_header_settings(
         converter.parameters,
         raw_converter_parameters,
@@ -74,16 +98,27 @@ def raw_converter_to_calibrated_hdulist(converter):
         header_with_parameters)
     if converter.conversion_metadata.command is not None:
         header_with_transformation_flags.add_history(converter.conversion_metadata.command)
+    return header_with_transformation_flags
+
+
+# TODO: Documentation
 
+def raw_converter_to_calibrated_hdulist(converter):
+    # type: (SingleCCDRawConverter) -> HDUList
+    """
+    TODO: Document me
+
+    :param converter:
+    """
     return HDUList(PrimaryHDU(
-        header=header_with_transformation_flags,
-        # `+` concatenates python lists
-        data=numpy.hstack(left_dark_parts + image_parts + right_dark_parts)))
+        header=raw_converter_to_calibrated_header(converter),
+        data=raw_converter_to_calibrated_image_data(converter)))
 
 
 # TODO: Documentation
-def write_raw_converter_to_calibrated_fits(converter, output_file, checksum=True):
-    # type: (SingleCCDRawConverter, str, bool) -> None
+def write_raw_converter_to_calibrated_fits(converter, output_file, checksum=True, compression=None,
+                                           quantize_level=None, quantize_method=None):
+    # type: (SingleCCDRawConverter, str, bool, str, float, str) -> None
     """
     Write a completed :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     to a calibrated FITS file.
@@ -94,9 +129,19 @@ def write_raw_converter_to_calibrated_fits(converter, output_file, checksum=True
     :type output_file: :py:class:`file` or :py:class:`str`
     :param checksum:
     :type checksum: bool
+    :param compression: If specified, tile compress the image with this algorithm, \
+    see :py:func:`~httm.fits_utilities.compression.compress_hdulist`
+    :type compression: str
+    :param quantize_level: The quantization level of a compressed floating point image
+    :type quantize_level: float
+    :param quantize_method: The quantization method of a compressed floating point image
+    :type quantize_method: str
     :rtype: NoneType
     """
-    hdulist = raw_converter_to_calibrated_hdulist(converter)
+    hdulist = compress_hdulist(raw_converter_to_calibrated_hdulist(converter),
+                               compression=compression,
+                               quantize_level=quantize_level,
+                               quantize_method=quantize_method)
 
     try:
         os.remove(output_file)
@@ -106,6 +151,57 @@ def write_raw_converter_to_calibrated_fits(converter, output_file, checksum=True
     hdulist.writeto(output_file, checksum=checksum)
 
 
+def write_raw_bands_to_calibrated_fits(band_converters, number_of_rows, output_file, checksum=True):
+    """
+    Write the bands of rows of a calibrated image to a calibrated FITS file as each band is generated,
+    so that only one band is held in memory at a time.
+
+    :param band_converters: The calibrated bands of the image in order, \
+    see :py:func:`~httm.transformations.raw_bands_to_calibrated.calibrate_raw_bands`
+    :type band_converters: iterable of :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param output_file:
+    :type output_file: :py:class:`str`
+    :param checksum:
+    :type checksum: bool
+    :rtype: NoneType
+    """
+    streaming_hdu = None
+    header = None
+    header_size = 0
+    datasum = 0
+    for band_converter in band_converters:
+        image_data = raw_converter_to_calibrated_image_data(band_converter)
+        if streaming_hdu is None:
+            # The header of the image is that of its first band, with every row
+            header = PrimaryHDU(header=raw_converter_to_calibrated_header(band_converter), data=image_data).header
+            header['NAXIS2'] = number_of_rows
+            if checksum:
+                # Reserve the checksum keywords, so that filling them in leaves the header the same size
+                header['CHECKSUM'] = '0' * 16
+                header['DATASUM'] = '0'
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+            header_size = len(header.tostring())
+            streaming_hdu = StreamingHDU(output_file, header)
+        if checksum:
+            datasum = ones_complement_checksum(
+                numpy.asarray(image_data, dtype=image_data.dtype.newbyteorder('>')), datasum)
+        streaming_hdu.write(image_data)
+    streaming_hdu.close()
+
+    if checksum:
+        header['DATASUM'] = str(datasum)
+        header['CHECKSUM'] = header_checksum(header, datasum)
+        header_bytes = header.tostring().encode('ascii')
+        assert len(header_bytes) == header_size, "The header with checksums must be the size of the header written"
+        with open(output_file, 'r+b') as fits_file:
+            fits_file.write(header_bytes)
+
+
 # TODO: Documentation
 def raw_converter_flags_from_fits_header(fits_header, flag_overrides=None):
     """
@@ -164,12 +260,14 @@ def make_slice_from_raw_data(
         image_and_smear_pixels,
         index,
         early_dark_pixels,
-        late_dark_pixels):
-    # type: (numpy.ndarray, int, numpy.ndarray, numpy.ndarray) -> Slice
+        late_dark_pixels,
+        dtype=None):
+    # type: (numpy.ndarray, int, numpy.ndarray, numpy.ndarray, numpy.dtype) -> Slice
     """
     Construct a slice from raw pixel data given a specified index.
 
     Result is in *Analogue to Digital Converter Units* (ADU).
+    The pixels may have leading axes, such as the frame axis of a cube of frames.
 
     :param image_and_smear_pixels: Image pixels from the raw FITS data.
     :type image_and_smear_pixels: :py:class:`numpy.ndarray`
@@ -181,12 +279,17 @@ def make_slice_from_raw_data(
     :param late_dark_pixels: The rightmost columns are dark pixels, to be placed on the \
     right of the slice.
     :type late_dark_pixels: :py:class:`numpy.ndarray`
+    :param dtype: The data type of the pixels of the slice; if ``None``, the data type of the raw FITS data is kept
+    :type dtype: :py:class:`numpy.dtype`
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
-    pixel_data = numpy.hstack([early_dark_pixels, image_and_smear_pixels, late_dark_pixels]) \
-        if index % 2 == 0 else numpy.fliplr(numpy.hstack([late_dark_pixels,
-                                                          image_and_smear_pixels,
-                                                          early_dark_pixels]))
+    image_and_smear_pixels = numpy.asarray(image_and_smear_pixels, dtype=dtype)
+    early_dark_pixels = numpy.asarray(early_dark_pixels, dtype=dtype)
+    late_dark_pixels = numpy.asarray(late_dark_pixels, dtype=dtype)
+    pixel_data = numpy.concatenate([early_dark_pixels, image_and_smear_pixels, late_dark_pixels], axis=-1) \
+        if index % 2 == 0 else numpy.concatenate([late_dark_pixels,
+                                                  image_and_smear_pixels,
+                                                  early_dark_pixels], axis=-1)[..., ::-1]
     # TODO: Document this in layout.rst
     return Slice(
         pixels=pixel_data,
@@ -199,7 +302,13 @@ def raw_converter_from_hdulist(header_data_unit_list,
                                command=None,
                                origin_file_name=None,
                                flag_overrides=None,
-                               parameter_overrides=None, ):
+                               parameter_overrides=None,
+                               stacked=False,
+                               lazy=False,
+                               dtype=None,
+                               rows=None,
+                               extension=None,
+                               workers=None):
     """
     TODO: Document this
 
@@ -210,38 +319,82 @@ def raw_converter_from_hdulist(header_data_unit_list,
     :type flag_overrides: :py:class:`object` or :py:class:`dict`
     :param parameter_overrides:
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param stacked: Whether to store the slices in a single :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param lazy: Whether to read the pixels of each slice only when it is first accessed, \
+    see :py:class:`~httm.data_structures.common.LazySlices`; the HDU list must stay open until then. \
+    Stacked slices are always read.
+    :type lazy: bool
+    :param dtype: The data type of the pixels of each slice, such as :py:class:`numpy.float32`; \
+    if ``None``, the data type of the FITS data is kept
+    :type dtype: :py:class:`numpy.dtype`
+    :param rows: If specified, only read this band of rows of each slice, \
+    see :py:func:`~httm.transformations.raw_bands_to_calibrated.calibrate_raw_bands`
+    :type rows: slice
+    :param extension: The index of the HDU to read from a multi-extension FITS file; \
+    if ``None``, the FITS file must hold a single image, \
+    see :py:func:`~httm.fits_utilities.multi_extension.single_image_index`
+    :type extension: int
+    :param workers: The number of threads to decompress a tile compressed image with, \
+    see :py:func:`~httm.fits_utilities.compression.decompressed_image_data`
+    :type workers: int
     :rtype: SingleCCDRawConverter
     """
+    if extension is None:
+        extension = single_image_index(header_data_unit_list)
+        assert extension is not None, \
+            "Only a single image per FITS file is supported, unless an extension is specified"
+    header_data_unit = header_data_unit_list[extension]
     conversion_metadata = ConversionMetaData(
         origin_file_name=origin_file_name,
         command=command,
-        header=header_data_unit_list[0].header)  # type: ConversionMetaData
+        header=header_data_unit.header)  # type: ConversionMetaData
     flag_overrides = raw_converter_flags_from_fits_header(
         conversion_metadata.header,
         flag_overrides=flag_overrides)
     parameters = raw_converter_parameters_from_fits_header(
         conversion_metadata.header,
         parameter_overrides=parameter_overrides)
-    assert len(header_data_unit_list) == 1, "Only a single image per FITS file is supported"
-    assert header_data_unit_list[0].data.shape[1] % parameters.number_of_slices == 0, \
+    assert len(header_data_unit.shape) in (2, 3), "The image must be a single frame or a cube of frames"
+    assert rows is None or len(header_data_unit.shape) == 2, \
+        "Bands of rows can only be read from a single frame"
+    column_count = header_data_unit.shape[-1]
+    assert column_count % parameters.number_of_slices == 0, \
         "Image did not have the specified number of slices"
 
+    # The pixels of memory mapped data are only read when they are touched, but scaled and tile compressed data
+    # is read in full as soon as it is accessed, so it is read through sections that only cover the pixels
+    # (and so only decompress the tiles) of a slice or band
+    if (lazy or rows is not None) and \
+            (is_scaled_image(header_data_unit.header) or is_compressed_image(header_data_unit)):
+        image_data = header_data_unit.section
+    elif is_compressed_image(header_data_unit):
+        image_data = decompressed_image_data(header_data_unit, workers=workers)
+    else:
+        image_data = header_data_unit.data
+    if rows is not None:
+        image_data = image_data[rows]
     early_dark_pixel_count = parameters.number_of_slices * parameters.early_dark_pixel_columns
     late_dark_pixel_count = parameters.number_of_slices * parameters.late_dark_pixel_columns
-    sliced_image_smear_and_dark_pixels = numpy.hsplit(
-        header_data_unit_list[0].data[:, early_dark_pixel_count:-late_dark_pixel_count],
-        parameters.number_of_slices)
-    sliced_early_dark_pixels = numpy.hsplit(header_data_unit_list[0].data[:, :early_dark_pixel_count],
-                                            parameters.number_of_slices)
-    sliced_late_dark_pixels = numpy.hsplit(header_data_unit_list[0].data[:, -late_dark_pixel_count:],
-                                           parameters.number_of_slices)
+    image_smear_and_dark_pixel_columns = \
+        (column_count - early_dark_pixel_count - late_dark_pixel_count) // parameters.number_of_slices
+
+    def load_slice(index):
+        image_start = early_dark_pixel_count + index * image_smear_and_dark_pixel_columns
+        early_dark_start = index * parameters.early_dark_pixel_columns
+        late_dark_start = column_count - late_dark_pixel_count + index * parameters.late_dark_pixel_columns
+        return make_slice_from_raw_data(
+            image_data[..., image_start:image_start + image_smear_and_dark_pixel_columns],
+            index,
+            image_data[..., early_dark_start:early_dark_start + parameters.early_dark_pixel_columns],
+            image_data[..., late_dark_start:late_dark_start + parameters.late_dark_pixel_columns],
+            dtype=dtype)
+
+    slices = LazySlices(load_slice, parameters.number_of_slices) if lazy \
+        else tuple(map(load_slice, range(parameters.number_of_slices)))
 
     return SingleCCDRawConverter(
-        slices=tuple(map(make_slice_from_raw_data,
-                         sliced_image_smear_and_dark_pixels,
-                         range(parameters.number_of_slices),
-                         sliced_early_dark_pixels,
-                         sliced_late_dark_pixels)),
+        slices=stack_slices(slices) if stacked else slices,
         conversion_metadata=conversion_metadata,
         parameters=parameters,
         flags=flag_overrides,
@@ -254,26 +407,40 @@ def raw_converter_from_fits(
         command=None,
         checksum=True,
         flag_overrides=None,
-        parameter_overrides=None):
+        parameter_overrides=None,
+        stacked=False,
+        lazy=False,
+        dtype=None):
     """
     TODO: Document this
 
 
-    :param input_file:
+    :param input_file: A FITS file name, or an open :py:class:`astropy.io.fits.HDUList`
+    :type input_file: :py:class:`str` or :py:class:`astropy.io.fits.HDUList`
     :param command:
     :param checksum:
     :param flag_overrides:
     :type flag_overrides: :py:class:`object` or :py:class:`dict`
     :param parameter_overrides:
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param stacked: Whether to store the slices in a single :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param lazy: Whether to read the pixels of each slice from the memory mapped file only when it is first \
+    accessed, see :py:class:`~httm.data_structures.common.LazySlices`
+    :type lazy: bool
+    :param dtype: The data type of the pixels of each slice, such as :py:class:`numpy.float32`
+    :type dtype: :py:class:`numpy.dtype`
     :rtype:
     """
     return raw_converter_from_hdulist(
-        astropy.io.fits.open(input_file, checksum=checksum),
+        input_file if isinstance(input_file, HDUList) else astropy.io.fits.open(input_file, checksum=checksum),
         command=command,
-        origin_file_name=input_file,
+        origin_file_name=input_file.filename() if isinstance(input_file, HDUList) else input_file,
         flag_overrides=flag_overrides,
         parameter_overrides=parameter_overrides,
+        stacked=stacked,
+        lazy=lazy,
+        dtype=dtype,
     )
 
 
@@ -284,13 +451,33 @@ def raw_fits_to_calibrated(
         checksum=True,
         flag_overrides=None,
         parameter_overrides=None,
-        transformation_settings=None):
+        transformation_settings=None,
+        stacked=False,
+        in_place=False,
+        lazy=False,
+        dtype=None,
+        row_band_size=None,
+        workers=None,
+        profile_output=None,
+        profile_header=False,
+        compression=None,
+        quantize_level=None,
+        quantize_method=None,
+        fuse=True):
     """
     Read a raw FITS file in as input, with units specified in *Analogue to Digital Converter Units* (ADU),
     run a series of transformations over it, and output the results to a specified file.
 
-    :param fits_input_file: A raw FITS file to use as input
-    :type fits_input_file: str
+    The image may be a single frame, or a cube of frames with shape ``(frames, rows, columns)``, such as the frames
+    of a cadence. Each transformation runs over all of the frames at once, and the output is a calibrated cube.
+
+    A multi-extension FITS file is calibrated one image extension at a time, each with the parameters in its own
+    header, on a pool of ``workers`` threads, and written to a single multi-extension FITS file in the same order,
+    see :py:func:`~httm.fits_utilities.multi_extension.transform_extensions`.
+
+    :param fits_input_file: A raw FITS file to use as input, which may be gzip (``.fits.gz``) \
+    or tile (``.fits.fz``) compressed, or an open :py:class:`astropy.io.fits.HDUList`
+    :type fits_input_file: :py:class:`str` or :py:class:`astropy.io.fits.HDUList`
     :param fits_output_file: A FITS file to use as output; will be clobbered if it exists
     :type fits_output_file: str
     :param command: The command issued to be recorded in the ``HISTORY`` header keyword in the output
@@ -305,16 +492,149 @@ def raw_fits_to_calibrated(
     :type parameter_overrides: :py:class:`object` or :py:class:`dict`
     :param transformation_settings: An object which specifies which transformations should run, rather than the defaults
     :type transformation_settings: object
+    :param stacked: Whether to process the slices stacked in a single array, \
+    see :py:class:`~httm.data_structures.common.SliceStack`
+    :type stacked: bool
+    :param in_place: Whether to run the transformations in place on a single working buffer, \
+    see :py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter`
+    :type in_place: bool
+    :param lazy: Whether to read the pixels of each slice from the memory mapped input file only when it is \
+    first transformed, see :py:class:`~httm.data_structures.common.LazySlices`. \
+    The extensions of a multi-extension FITS file are always read before they are transformed.
+    :type lazy: bool
+    :param dtype: The data type to process the pixels in, such as :py:class:`numpy.float32`, \
+    which is also the data type of the output
+    :type dtype: :py:class:`numpy.dtype`
+    :param row_band_size: If specified, calibrate the image this many rows at a time in two passes over the \
+    input file, writing each band as it is calibrated, see \
+    :py:func:`~httm.transformations.raw_bands_to_calibrated.calibrate_raw_bands`. \
+    ``stacked``, ``in_place``, ``lazy`` and ``fuse`` do not apply, the output cannot be compressed, \
+    and it cannot be combined with ``workers`` or the profiling options, which raise :py:class:`ValueError`.
+    :type row_band_size: int
+    :param workers: The number of threads to transform the slices of each transformation with, \
+    see :py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter`, \
+    and to decompress a tile compressed input with, \
+    or, for a multi-extension FITS file, the number of threads to transform the extensions with
+    :type workers: int
+    :param profile_output: If specified, append the wall time, CPU time, peak allocated memory and pixel shapes and \
+    data types of each transformation and each of its slices as a line of JSON to this file, or to the standard \
+    output if ``-``, see :py:class:`~httm.transformations.profiling.Profiler`. \
+    The profiles of each extension of a multi-extension FITS file are appended as a separate line.
+    :type profile_output: str
+    :param profile_header: Whether to record the same profiles as ``HISTORY`` cards in the output header
+    :type profile_header: bool
+    :param compression: If specified, tile compress the output with this algorithm, one of \
+    :py:const:`~httm.fits_utilities.compression.COMPRESSION_TYPES`, see \
+    :py:func:`~httm.fits_utilities.compression.compress_hdulist`
+    :type compression: str
+    :param quantize_level: The quantization level of a compressed floating point output
+    :type quantize_level: float
+    :param quantize_method: The quantization method of a compressed floating point output, one of \
+    :py:const:`~httm.fits_utilities.compression.QUANTIZE_METHODS`
+    :type quantize_method: str
+    :param fuse: Whether to fuse neighbouring transformations into single passes over the pixels; if ``False``, \
+    each transformation runs in its own pass, so that its profile is recorded under its own name, \
+    see :py:func:`~httm.transformations.plans.transformation_plan`
+    :type fuse: bool
     """
-    single_ccd_raw_converter = raw_converter_from_fits(
-        fits_input_file,
-        command=command,
-        checksum=checksum,
-        flag_overrides=flag_overrides,
-        parameter_overrides=parameter_overrides)
-    write_raw_converter_to_calibrated_fits(
-        transform_raw_converter(
+    if row_band_size is not None and (workers is not None or profile_output is not None or profile_header):
+        raise ValueError("Bands of rows cannot be calibrated with workers or profiled")
+    header_data_unit_list = fits_input_file if isinstance(fits_input_file, HDUList) \
+        else astropy.io.fits.open(fits_input_file, checksum=checksum)
+    origin_file_name = header_data_unit_list.filename() if isinstance(fits_input_file, HDUList) else fits_input_file
+
+    def read_extension(extension, **keyword_arguments):
+        return raw_converter_from_hdulist(
+            header_data_unit_list,
+            command=command,
+            origin_file_name=origin_file_name,
+            flag_overrides=flag_overrides,
+            parameter_overrides=parameter_overrides,
+            dtype=dtype,
+            extension=extension,
+            **keyword_arguments)
+
+    if row_band_size is not None:
+        assert not is_multi_extension(header_data_unit_list), "Bands of rows can only be read from a single image"
+        assert compression is None, "Bands of rows can only be written to an uncompressed image"
+        number_of_rows = header_data_unit_list[single_image_index(header_data_unit_list)].shape[0]
+        write_raw_bands_to_calibrated_fits(
+            calibrate_raw_bands(
+                lambda rows: read_extension(None, rows=rows),
+                number_of_rows,
+                transformation_settings=transformation_settings,
+                row_band_size=row_band_size),
+            number_of_rows,
+            fits_output_file,
+            checksum=checksum)
+        return
+
+    profiling = profile_output is not None or profile_header
+    if is_multi_extension(header_data_unit_list):
+        extension_profilers = {}
+
+        def calibrate_extension(extension, raw_converter):
+            profiler = extension_profilers[extension] = Profiler() if profiling else None
+            calibrated_converter = transform_raw_converter(
+                raw_converter,
+                transformation_settings=transformation_settings,
+                in_place=in_place,
+                profiler=profiler,
+                fuse=fuse)
+            if profile_header:
+                calibrated_converter = profiler.converter_with_profiled_header(calibrated_converter)
+            return raw_converter_to_calibrated_hdulist(calibrated_converter)
+
+        # Memory is traced for all of the extensions at once
+        memory_tracer = Profiler()
+        try:
+            if profiling:
+                memory_tracer.trace_memory()
+            calibrated_hdulist = transform_extensions(
+                lambda extension: read_extension(extension, stacked=stacked),
+                calibrate_extension,
+                header_data_unit_list,
+                workers=workers)
+        finally:
+            memory_tracer.trace_memory(False)
+        write_multi_extension_fits(calibrated_hdulist, fits_output_file, checksum=checksum,
+                                   compression=compression,
+                                   quantize_level=quantize_level,
+                                   quantize_method=quantize_method)
+        if profile_output is not None:
+            for extension in sorted(extension_profilers):
+                extension_profilers[extension].write_json(profile_output,
+                                                          input_file=origin_file_name,
+                                                          output_file=fits_output_file,
+                                                          extension=extension)
+        return
+
+    single_ccd_raw_converter = read_extension(None, stacked=stacked, lazy=lazy, workers=workers)
+    profiler = Profiler() if profiling else None
+    executor = slice_executor(workers)
+    try:
+        if profiler is not None:
+            profiler.trace_memory()
+        calibrated_converter = transform_raw_converter(
             single_ccd_raw_converter,
-            transformation_settings=transformation_settings),
-        fits_output_file,
-        checksum=checksum)
+            transformation_settings=transformation_settings,
+            in_place=in_place,
+            executor=executor,
+            profiler=profiler,
+            fuse=fuse)
+    finally:
+        if profiler is not None:
+            profiler.trace_memory(False)
+        if executor is not None:
+            executor.close()
+            executor.join()
+    if profile_header:
+        calibrated_converter = profiler.converter_with_profiled_header(calibrated_converter)
+    write_raw_converter_to_calibrated_fits(calibrated_converter, fits_output_file, checksum=checksum,
+                                           compression=compression,
+                                           quantize_level=quantize_level,
+                                           quantize_method=quantize_method)
+    if profile_output is not None:
+        profiler.write_json(profile_output,
+                            input_file=single_ccd_raw_converter.conversion_metadata.origin_file_name,
+                            output_file=fits_output_file)
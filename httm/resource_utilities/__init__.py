@@ -22,6 +22,7 @@
 This module contains functions for dealing with package data.
 """
 
+import gzip
 import io
 import os
 import pkgutil
@@ -30,12 +31,66 @@ import re
 import numpy
 from numpy import ndarray
 
+# The first bytes of a gzip compressed file
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Resources already loaded by this process, by loading function and file name, see load_shared_resource
+shared_resources = {}
+
 
 def get_file_resource(file_name):
+    # type: (str) -> object
+    """
+    Find a file, or a resource in the ``package_data`` directory if the file's name starts with ``"built-in "``
+    and no such file exists.
+
+    A resource may be stored gzip compressed, either under its own name or with a ``.gz`` suffix,
+    in which case it is decompressed. Tile compressed FITS resources are read as they are.
+
+    :param file_name: A file name, or ``"built-in "`` followed by the name of a resource
+    :type file_name: :py:class:`str`
+    :return: The file name, or a file object holding the resource
+    :rtype: :py:class:`str` or :py:class:`io.BytesIO`
+    """
     match = re.match(r'^built-in (.*)', file_name)
-    # Note: This CANNOT handle GZIPed FITS files in package_data
-    return io.BytesIO(pkgutil.get_data('httm', os.path.join('/data', match.group(1)))) \
-        if ((not os.path.isfile(file_name)) and match) else file_name
+    if os.path.isfile(file_name) or not match:
+        return file_name
+    resource_name = os.path.join('/data', match.group(1))
+    try:
+        resource = pkgutil.get_data('httm', resource_name)
+    except IOError:
+        resource = pkgutil.get_data('httm', resource_name + '.gz')
+    if resource[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        resource = gzip.GzipFile(fileobj=io.BytesIO(resource)).read()
+    return io.BytesIO(resource)
+
+
+def load_shared_resource(load_function, file_name):
+    """
+    Load a resource from a file once per process, so that converters for many CCDs, and worker threads, share
+    one read only copy rather than each reading the file again.
+
+    A file is loaded again if it has been modified since it was loaded. File objects are never shared.
+
+    Arrays in the resource are made read only, as they are shared.
+
+    :param load_function: A function taking a file name or file object and returning a resource, \
+    which may be an array or a tuple of arrays
+    :type load_function: function
+    :param file_name: A file name or file object to read data from
+    :type file_name: :py:class:`str`
+    :rtype: The resource returned by ``load_function``
+    """
+    if not isinstance(file_name, str):
+        return load_function(file_name)
+    key = (load_function.__name__, file_name)
+    modification_time = os.path.getmtime(file_name) if os.path.isfile(file_name) else None
+    if key not in shared_resources or shared_resources[key][0] != modification_time:
+        resource = load_function(file_name)
+        for array in (resource if isinstance(resource, tuple) else (resource,)):
+            array.flags.writeable = False
+        shared_resources[key] = (modification_time, resource)
+    return shared_resources[key][1]
 
 
 # noinspection SpellCheckingInspection
@@ -69,3 +124,24 @@ def load_pattern_noise(file_name):
     from .. import fits_utilities
     slices = fits_utilities.raw_converter_from_fits(get_file_resource(file_name)).slices
     return tuple(s.pixels for s in slices)
+
+
+def pattern_noise_row_reader(file_name):
+    """
+    This function opens a pattern noise file, as specified to :py:func:`load_pattern_noise`,
+    to be read a band of rows at a time.
+
+    :param file_name: A file name or file object to read data from
+    :type file_name: :py:class:`str`
+    :rtype: A function taking a :py:class:`slice` of rows and returning a tuple of the pattern noise of each \
+    slice over those rows
+    """
+    import astropy.io.fits
+    from ..fits_utilities.raw_fits import raw_converter_from_hdulist
+    header_data_unit_list = astropy.io.fits.open(get_file_resource(file_name))
+
+    def read_rows(rows):
+        slices = raw_converter_from_hdulist(header_data_unit_list, rows=rows).slices
+        return tuple(s.pixels for s in slices)
+
+    return read_rows
@@ -0,0 +1,234 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.system.batch``
+=====================
+
+This module contains utilities for running a FITS transformation, such as
+:py:func:`~httm.fits_utilities.raw_fits.raw_fits_to_calibrated` or
+:py:func:`~httm.fits_utilities.electron_flux_fits.electron_flux_fits_to_raw`,
+over many input files using a pool of worker processes.
+"""
+
+import argparse
+import glob
+import logging
+import os
+import traceback
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyUnresolvedReferences,PyClassHasNoInit
+class BatchResult(namedtuple('BatchResult', ['input_file', 'output_file', 'error'])):
+    """
+    The outcome of transforming a single file in a batch.
+
+    :param input_file: The name of the FITS file used as input
+    :type input_file: str
+    :param output_file: The name of the FITS file used as output
+    :type output_file: str
+    :param error: A formatted traceback if the transformation failed, otherwise ``None``
+    :type error: str
+    """
+    __slots__ = ()
+
+
+def expand_input_file_names(input_patterns, input_list_file=None):
+    """
+    Expand a sequence of file names and glob patterns, and optionally a file listing one file name
+    or glob pattern per line, into a list of input file names.
+
+    Patterns that do not match any file are kept as they are, so that they are reported as failures
+    rather than silently dropped.
+
+    Blank lines and lines starting with ``#`` in the ``input_list_file`` are skipped.
+
+    :param input_patterns: File names or glob patterns
+    :type input_patterns: list of str
+    :param input_list_file: A file containing one file name or glob pattern per line
+    :type input_list_file: str
+    :rtype: list of str
+    """
+    patterns = list(input_patterns)
+    if input_list_file is not None:
+        with open(input_list_file, 'r') as f:
+            patterns.extend(line.strip() for line in f
+                            if line.strip() != '' and not line.strip().startswith('#'))
+    input_file_names = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        input_file_names.extend(matches if len(matches) > 0 else [pattern])
+    return input_file_names
+
+
+def is_output_template(output):
+    # type: (str) -> bool
+    """
+    Check if an output specification is a directory or a file name template, rather than a single file name.
+
+    :param output: Output specification
+    :type output: str
+    :rtype: bool
+    """
+    return os.path.isdir(output) or '{' in output
+
+
+def derive_output_file_name(input_file_name, output, index=0, **fields):
+    # type: (str, str, int, dict) -> str
+    """
+    Derive the name of an output file from the name of an input file and an output specification.
+
+    If ``output`` is a directory, the output file has the same base name as the input file, in that directory.
+
+    Otherwise ``output`` is a template, formatted with the following fields:
+
+      - ``{name}``, the base name of the input file, for instance ``frame.fits``
+      - ``{stem}``, the base name of the input file without its FITS extension, for instance ``frame``
+      - ``{index}``, the position of the input file in the batch
+      - any further ``fields``, such as the ``{camera}`` and ``{ccd}`` numbers of
+        :py:func:`~httm.system.focal_plane.transform_focal_plane`
+
+    :param input_file_name: Name of the input file
+    :type input_file_name: str
+    :param output: An output directory or file name template
+    :type output: str
+    :param index: The position of the input file in the batch
+    :type index: int
+    :param fields: Further fields of the template
+    :rtype: str
+    """
+    name = os.path.basename(input_file_name)
+    if os.path.isdir(output):
+        return os.path.join(output, name)
+    stem = name
+    for extension in ('.gz', '.fz', '.fits', '.fit', '.fts'):
+        if stem.lower().endswith(extension):
+            stem = stem[:-len(extension)]
+    return output.format(name=name, stem=stem, index=index, **fields)
+
+
+def picklable_settings(settings):
+    """
+    Convert a settings object, such as the ``namedtuple`` returned by
+    :py:func:`~httm.system.config_file.parse_config`, into an :py:class:`argparse.Namespace`
+    that can be sent to worker processes.
+
+    :param settings: An object containing settings as attributes
+    :type settings: object
+    :rtype: :py:class:`argparse.Namespace`
+    """
+    if settings is None or isinstance(settings, argparse.Namespace):
+        return settings
+    return argparse.Namespace(**(settings._asdict() if hasattr(settings, '_asdict') else vars(settings)))
+
+
+def run_batch_job(job):
+    """
+    Internal helper function that runs a transformation over a single file of a batch,
+    catching any exception so that one failure does not stop the rest of the batch.
+
+    :param job: A tuple containing the transformation function, input file, output file and keyword arguments
+    :type job: tuple
+    :rtype: :py:class:`~httm.system.batch.BatchResult`
+    """
+    transformation_function, input_file, output_file, keyword_arguments = job
+    try:
+        transformation_function(input_file, output_file, **keyword_arguments)
+        return BatchResult(input_file=input_file, output_file=output_file, error=None)
+    except Exception:
+        return BatchResult(input_file=input_file, output_file=output_file, error=traceback.format_exc())
+
+
+def run_batch_jobs(jobs, processes=None, pool=None, threads=False):
+    """
+    Internal helper function that runs the jobs of a batch, see :py:func:`~httm.system.batch.run_batch_job`,
+    using a pool of workers, and logs the outcome of each job.
+
+    :param jobs: Tuples containing a transformation function, input file, output file and keyword arguments
+    :type jobs: list of tuple
+    :param processes: The number of workers to use if no ``pool`` is given. If ``None``, one per CPU is used. \
+    If ``1``, jobs are run in the calling process.
+    :type processes: int
+    :param pool: A pool of workers to reuse, such as one made by \
+    :py:func:`~httm.system.focal_plane.focal_plane_pool`, rather than starting a new pool for these jobs
+    :type pool: :py:class:`multiprocessing.pool.Pool`
+    :param threads: Whether to start a pool of threads, rather than of processes, if no ``pool`` is given; \
+    threads can share inputs that cannot be sent to other processes, such as open HDU lists
+    :type threads: bool
+    :rtype: list of :py:class:`~httm.system.batch.BatchResult`
+    """
+    if pool is not None:
+        results = pool.map(run_batch_job, jobs, chunksize=1)
+    elif processes == 1 or len(jobs) <= 1:
+        results = [run_batch_job(job) for job in jobs]
+    else:
+        from multiprocessing import Pool
+        from multiprocessing.pool import ThreadPool
+        pool = (ThreadPool if threads else Pool)(processes)
+        try:
+            results = pool.map(run_batch_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for result in results:
+        if result.error is not None:
+            logger.error('Failed to transform "{input_file}":\n{error}'.format(input_file=result.input_file,
+                                                                               error=result.error))
+        else:
+            logger.info('Transformed "{input_file}" to "{output_file}"'.format(input_file=result.input_file,
+                                                                               output_file=result.output_file))
+    return results
+
+
+def run_batch(transformation_function, input_file_names, output, processes=None, pool=None, **keyword_arguments):
+    """
+    Run a FITS transformation function, such as :py:func:`~httm.fits_utilities.raw_fits.raw_fits_to_calibrated`,
+    over many input files using a pool of worker processes.
+
+    The output file names are derived using :py:func:`~httm.system.batch.derive_output_file_name`.
+
+    Failures are logged and reported in the results; they do not stop the rest of the batch.
+
+    :param transformation_function: A module level function taking an input file name, an output file name \
+    and keyword arguments
+    :type transformation_function: function
+    :param input_file_names: The input files
+    :type input_file_names: list of str
+    :param output: An output directory or file name template
+    :type output: str
+    :param processes: The number of worker processes to use. If ``None``, one per CPU is used. \
+    If ``1``, files are processed in the calling process.
+    :type processes: int
+    :param pool: A pool of worker processes to reuse, rather than starting a new pool for this batch
+    :type pool: :py:class:`multiprocessing.pool.Pool`
+    :param keyword_arguments: Keyword arguments passed to every call of ``transformation_function``; \
+    these must be picklable
+    :rtype: list of :py:class:`~httm.system.batch.BatchResult`
+    """
+    assert len(input_file_names) <= 1 or is_output_template(output), \
+        "Several inputs need an output directory or a template containing {name}, {stem} or {index}"
+    output_file_names = [derive_output_file_name(input_file_name, output, index)
+                         for index, input_file_name in enumerate(input_file_names)]
+    assert len(set(output_file_names)) == len(output_file_names), \
+        "Output file names must be distinct, use a template such as '{index}_{name}' to disambiguate them"
+    jobs = [(transformation_function, input_file_name, output_file_name, keyword_arguments)
+            for input_file_name, output_file_name in zip(input_file_names, output_file_names)]
+    return run_batch_jobs(jobs, processes=processes, pool=pool)
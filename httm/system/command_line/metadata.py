@@ -35,5 +35,89 @@ command_line_options = OrderedDict([
     }),
     ('help', {
         'documentation': 'Print the help message for this command line tool.'
-    })
+    }),
+    ('input_list', {
+        'type': 'str',
+        'documentation': 'Set an optional file listing input FITS files or glob patterns, one per line. '
+                         'Implies batch mode.'
+    }),
+    ('processes', {
+        'type': 'int',
+        'documentation': 'Set the number of worker processes used in batch mode. '
+                         'Defaults to one per CPU.'
+    }),
+    ('stacked', {
+        'documentation': 'Process all of the slices of a CCD together as a single stacked array, '
+                         'rather than one slice at a time.'
+    }),
+    ('in_place', {
+        'documentation': 'Run the transformations in place on a single working copy of the image, '
+                         'rather than allocating new pixels for each transformation.'
+    }),
+    ('lazy', {
+        'documentation': 'Read the pixels of each slice from the memory mapped input file only when it is first '
+                         'transformed, rather than reading the whole image up front.'
+    }),
+    ('dtype', {
+        'type': 'str',
+        'documentation': 'Set the floating point type the pixels are processed in, and written out in: '
+                         'float32 or float64. Defaults to float64 for electron flux images, while raw images '
+                         'are processed in float64 once converted to electrons.'
+    }),
+    ('row_band_size', {
+        'type': 'int',
+        'documentation': 'Calibrate each image this many rows at a time, in two passes over the input file, '
+                         'so that the memory used is set by the number of rows rather than by the size of the image. '
+                         'Cannot be combined with --workers, --profile or --profile-header.'
+    }),
+    ('workers', {
+        'type': 'int',
+        'documentation': 'Set the number of threads used to transform the slices of each image concurrently. '
+                         'The results are identical to transforming the slices in turn.'
+    }),
+    ('profile', {
+        'type': 'str',
+        'documentation': 'Append the wall time, CPU time, peak allocated memory and pixel shapes and data types of '
+                         'each transformation, and of each slice, as a line of JSON per image to this file, '
+                         'or to the standard output if -.'
+    }),
+    ('cache_directory', {
+        'type': 'str',
+        'documentation': 'Keep the intermediate states of each simulation in this directory, and resume from the '
+                         'latest state already kept for the same image and parameters, so that rerunning with only '
+                         'the parameters of later transformations changed skips the earlier transformations.'
+    }),
+    ('cache_size', {
+        'type': 'int',
+        'documentation': 'Set the largest total size in bytes of the states kept in the cache directory; '
+                         'the least recently used states are removed first. Defaults to 1 GiB.'
+    }),
+    ('profile_header', {
+        'documentation': 'Record the wall time, CPU time, peak allocated memory and pixel shapes and data types of '
+                         'each transformation, and of each slice, as HISTORY cards in the output header.'
+    }),
+    ('no_fuse', {
+        'documentation': 'Run each transformation in its own pass over the pixels, rather than fusing neighbouring '
+                         'transformations that act on each row on their own into a single pass, so that profiles '
+                         'are recorded for each transformation. The results are identical.'
+    }),
+    ('compression', {
+        'type': 'str',
+        'documentation': 'Tile compress the output image with this algorithm: RICE_1, GZIP_1, GZIP_2 or HCOMPRESS_1. '
+                         'The image is written to an extension after an empty primary HDU.'
+    }),
+    ('quantize_level', {
+        'type': 'float',
+        'documentation': 'Set the quantization level of a compressed floating point output image, as a fraction of '
+                         'the noise of each tile, or, if negative, as an absolute quantization step.'
+    }),
+    ('quantize_method', {
+        'type': 'str',
+        'documentation': 'Set the quantization method of a compressed floating point output image: no_dither, '
+                         'subtractive_dither_1 or subtractive_dither_2.'
+    }),
+    ('integer_adu', {
+        'documentation': 'Round the simulated raw pixels and write them as integer ADU values, as flight data is: '
+                         '16 bit unsigned integers for a single exposure, or 32 bit integers for many.'
+    }),
 ])
@@ -27,7 +27,12 @@ import json
 import os
 import re
 import sys
-from collections import namedtuple, Iterable
+from collections import namedtuple
+
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
 
 import toml
 
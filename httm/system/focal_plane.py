@@ -0,0 +1,273 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.system.focal_plane``
+===========================
+
+This module contains entry points for transforming the images of every CCD of a camera, or of the whole focal plane,
+at once.
+
+Each TESS camera has ``CCDS_PER_CAMERA`` CCDs, and the focal plane has ``NUMBER_OF_CAMERAS`` cameras.
+The CCDs are transformed in parallel on a pool of workers, which may be kept with
+:py:func:`~httm.system.focal_plane.focal_plane_pool` and reused from one cadence to the next.
+Resources such as the pattern noise are loaded once per worker, and once in total if they are loaded before the pool
+is started, so a cadence of the focal plane takes about as long as its slowest CCD.
+"""
+
+import argparse
+import os
+from collections import namedtuple
+
+from astropy.io.fits import HDUList
+
+from .batch import derive_output_file_name, picklable_settings, run_batch_jobs
+
+# The number of CCDs in each camera
+CCDS_PER_CAMERA = 4
+
+# The number of cameras in the focal plane
+NUMBER_OF_CAMERAS = 4
+
+
+# noinspection PyUnresolvedReferences,PyClassHasNoInit
+class CCDInput(namedtuple('CCDInput', ['image', 'camera_number', 'ccd_number'])):
+    """
+    The image of one CCD of a camera or of the focal plane.
+
+    :param image: A FITS file name, or an open :py:class:`astropy.io.fits.HDUList`
+    :type image: :py:class:`str` or :py:class:`astropy.io.fits.HDUList`
+    :param camera_number: The number of the camera that took the image; \
+    if ``None``, the number recorded in the image is used
+    :type camera_number: int
+    :param ccd_number: The number of the CCD that took the image; if ``None``, the number recorded in the image is used
+    :type ccd_number: int
+    """
+    __slots__ = ()
+
+
+def camera_inputs(images, camera_number=None):
+    """
+    Construct the inputs for the CCDs of a camera, numbering the CCDs from one in order.
+
+    :param images: The image of each CCD of the camera, in order
+    :type images: list of :py:class:`str` or :py:class:`astropy.io.fits.HDUList` objects
+    :param camera_number: The number of the camera; if ``None``, the number recorded in each image is used
+    :type camera_number: int
+    :rtype: tuple of :py:class:`~httm.system.focal_plane.CCDInput`
+    """
+    assert len(images) <= CCDS_PER_CAMERA, "A camera has at most {} CCDs".format(CCDS_PER_CAMERA)
+    return tuple(CCDInput(image=image, camera_number=camera_number, ccd_number=index + 1)
+                 for index, image in enumerate(images))
+
+
+def focal_plane_inputs(camera_images):
+    """
+    Construct the inputs for the CCDs of the focal plane, numbering the cameras, and the CCDs of each camera,
+    from one in order.
+
+    :param camera_images: For each camera in order, the image of each of its CCDs in order
+    :type camera_images: list of lists of :py:class:`str` or :py:class:`astropy.io.fits.HDUList` objects
+    :rtype: tuple of :py:class:`~httm.system.focal_plane.CCDInput`
+    """
+    assert len(camera_images) <= NUMBER_OF_CAMERAS, \
+        "The focal plane has at most {} cameras".format(NUMBER_OF_CAMERAS)
+    return tuple(ccd_input for index, images in enumerate(camera_images)
+                 for ccd_input in camera_inputs(images, camera_number=index + 1))
+
+
+def ccd_parameter_overrides(parameter_overrides, ccd_input):
+    """
+    Internal helper function that adds the camera and CCD numbers of a
+    :py:class:`~httm.system.focal_plane.CCDInput` to the parameter overrides shared by every CCD.
+
+    :param parameter_overrides: An object or dictionary specifying values parameters should take \
+    rather than their defaults
+    :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param ccd_input: The CCD
+    :type ccd_input: :py:class:`~httm.system.focal_plane.CCDInput`
+    :rtype: :py:class:`argparse.Namespace`
+    """
+    overrides = dict(parameter_overrides) if isinstance(parameter_overrides, dict) \
+        else vars(picklable_settings(parameter_overrides)) if parameter_overrides is not None else {}
+    for key in ('camera_number', 'ccd_number'):
+        if getattr(ccd_input, key) is not None:
+            overrides[key] = getattr(ccd_input, key)
+    return argparse.Namespace(**overrides)
+
+
+def ccd_output_file_name(ccd_input, output, index):
+    # type: (CCDInput, str, int) -> str
+    """
+    Internal helper function that derives the name of the output file for a CCD, see
+    :py:func:`~httm.system.batch.derive_output_file_name`.
+    The ``{camera}`` and ``{ccd}`` fields of a template are the numbers of the CCD input.
+
+    Open HDU lists without a file name are named after their camera and CCD in an output directory.
+
+    :param ccd_input: The CCD
+    :type ccd_input: :py:class:`~httm.system.focal_plane.CCDInput`
+    :param output: An output directory or file name template
+    :type output: str
+    :param index: The position of the CCD in the inputs
+    :type index: int
+    :rtype: str
+    """
+    input_file_name = ccd_input.image.filename() if isinstance(ccd_input.image, HDUList) else ccd_input.image
+    if input_file_name is None:
+        input_file_name = 'camera{camera}_ccd{ccd}.fits'.format(camera=ccd_input.camera_number,
+                                                                 ccd=ccd_input.ccd_number)
+    return derive_output_file_name(input_file_name, output, index,
+                                   camera=ccd_input.camera_number, ccd=ccd_input.ccd_number)
+
+
+def preload_resources(parameter_overrides=None):
+    """
+    Load the pattern noise and start of line ringing named by the parameter overrides, or their defaults,
+    into the resources shared by this process, see :py:func:`~httm.resource_utilities.load_shared_resource`.
+
+    Worker processes started from this process afterwards share these resources rather than each loading them.
+
+    :param parameter_overrides: An object or dictionary specifying values parameters should take \
+    rather than their defaults
+    :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :rtype: NoneType
+    """
+    from .. import resource_utilities
+    from ..data_structures.metadata import parameters
+    overrides = ccd_parameter_overrides(parameter_overrides, CCDInput(image=None, camera_number=None,
+                                                                      ccd_number=None))
+    for name, load_function in (('pattern_noise', resource_utilities.load_pattern_noise),
+                                ('start_of_line_ringing', resource_utilities.load_npz)):
+        file_name = getattr(overrides, name, None)
+        resource_utilities.load_shared_resource(load_function,
+                                                file_name if file_name is not None else parameters[name]['default'])
+
+
+def focal_plane_pool(processes=None, threads=False, parameter_overrides=None):
+    """
+    Start a pool of workers to transform the CCDs of a camera or of the focal plane, which can be passed to
+    :py:func:`~httm.system.focal_plane.transform_focal_plane` for each cadence in turn.
+
+    The shared resources are loaded with :py:func:`~httm.system.focal_plane.preload_resources` first,
+    so that worker processes share them with this process.
+
+    The caller should close and join the pool once done with it.
+
+    :param processes: The number of workers. If ``None``, one per CPU is used
+    :type processes: int
+    :param threads: Whether the workers are threads, which are needed to transform open HDU lists, \
+    rather than processes
+    :type threads: bool
+    :param parameter_overrides: The parameter overrides naming the resources to load
+    :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :rtype: :py:class:`multiprocessing.pool.Pool`
+    """
+    from multiprocessing import Pool
+    from multiprocessing.pool import ThreadPool
+    preload_resources(parameter_overrides)
+    return (ThreadPool if threads else Pool)(processes)
+
+
+def transform_focal_plane(transformation_function, ccd_inputs, output, processes=None, pool=None,
+                          parameter_overrides=None, **keyword_arguments):
+    """
+    Run a FITS transformation function, such as :py:func:`~httm.fits_utilities.raw_fits.raw_fits_to_calibrated`,
+    over the images of the CCDs of a camera or of the focal plane in parallel.
+
+    The camera and CCD numbers of each input override those recorded in its image.
+    If any image is an open HDU list, the CCDs are transformed on a pool of threads rather than processes.
+
+    Failures are logged and reported in the results; they do not stop the other CCDs.
+
+    :param transformation_function: A module level function taking an input file name or HDU list, \
+    an output file name and keyword arguments
+    :type transformation_function: function
+    :param ccd_inputs: The CCDs to transform, see :py:func:`~httm.system.focal_plane.camera_inputs` and \
+    :py:func:`~httm.system.focal_plane.focal_plane_inputs`
+    :type ccd_inputs: list of :py:class:`~httm.system.focal_plane.CCDInput`
+    :param output: An output directory or file name template, which may contain the fields ``{camera}`` and \
+    ``{ccd}``, see :py:func:`~httm.system.batch.derive_output_file_name`
+    :type output: str
+    :param processes: The number of workers to use if no ``pool`` is given. If ``None``, one per CPU is used. \
+    If ``1``, the CCDs are transformed in the calling process.
+    :type processes: int
+    :param pool: A pool of workers to reuse, see :py:func:`~httm.system.focal_plane.focal_plane_pool`
+    :type pool: :py:class:`multiprocessing.pool.Pool`
+    :param parameter_overrides: An object or dictionary specifying values parameters should take \
+    rather than their defaults, for every CCD
+    :type parameter_overrides: :py:class:`object` or :py:class:`dict`
+    :param keyword_arguments: Keyword arguments passed to every call of ``transformation_function``
+    :rtype: list of :py:class:`~httm.system.batch.BatchResult`
+    """
+    assert os.path.isdir(output) or '{' in output, "The output must be a directory or a file name template"
+    output_file_names = [ccd_output_file_name(ccd_input, output, index) for index, ccd_input in enumerate(ccd_inputs)]
+    assert len(set(output_file_names)) == len(output_file_names), \
+        "Output file names must be distinct, use a template such as 'camera{camera}_ccd{ccd}.fits' to " \
+        "disambiguate them"
+    jobs = [(transformation_function, ccd_input.image, output_file_name,
+             dict(keyword_arguments, parameter_overrides=ccd_parameter_overrides(parameter_overrides, ccd_input)))
+            for ccd_input, output_file_name in zip(ccd_inputs, output_file_names)]
+    threads = any(isinstance(ccd_input.image, HDUList) for ccd_input in ccd_inputs)
+    if pool is None and processes != 1 and len(jobs) > 1:
+        preload_resources(parameter_overrides)
+    return run_batch_jobs(jobs, processes=processes, pool=pool, threads=threads)
+
+
+def raw_focal_plane_to_calibrated(ccd_inputs, output, processes=None, pool=None, **keyword_arguments):
+    """
+    Calibrate the raw images of the CCDs of a camera or of the focal plane in parallel, using
+    :py:func:`~httm.system.focal_plane.transform_focal_plane` to run
+    :py:func:`~httm.fits_utilities.raw_fits.raw_fits_to_calibrated` over each CCD.
+
+    :param ccd_inputs: The CCDs to calibrate
+    :type ccd_inputs: list of :py:class:`~httm.system.focal_plane.CCDInput`
+    :param output: An output directory or file name template
+    :type output: str
+    :param processes: The number of workers to use if no ``pool`` is given
+    :type processes: int
+    :param pool: A pool of workers to reuse
+    :type pool: :py:class:`multiprocessing.pool.Pool`
+    :param keyword_arguments: Keyword arguments of :py:func:`~httm.fits_utilities.raw_fits.raw_fits_to_calibrated`
+    :rtype: list of :py:class:`~httm.system.batch.BatchResult`
+    """
+    from ..fits_utilities.raw_fits import raw_fits_to_calibrated
+    return transform_focal_plane(raw_fits_to_calibrated, ccd_inputs, output, processes=processes, pool=pool,
+                                 **keyword_arguments)
+
+
+def electron_flux_focal_plane_to_raw(ccd_inputs, output, processes=None, pool=None, **keyword_arguments):
+    """
+    Simulate raw images from the electron flux images of the CCDs of a camera or of the focal plane in parallel,
+    using :py:func:`~httm.system.focal_plane.transform_focal_plane` to run
+    :py:func:`~httm.fits_utilities.electron_flux_fits.electron_flux_fits_to_raw` over each CCD.
+
+    :param ccd_inputs: The CCDs to simulate
+    :type ccd_inputs: list of :py:class:`~httm.system.focal_plane.CCDInput`
+    :param output: An output directory or file name template
+    :type output: str
+    :param processes: The number of workers to use if no ``pool`` is given
+    :type processes: int
+    :param pool: A pool of workers to reuse
+    :type pool: :py:class:`multiprocessing.pool.Pool`
+    :param keyword_arguments: Keyword arguments of \
+    :py:func:`~httm.fits_utilities.electron_flux_fits.electron_flux_fits_to_raw`
+    :rtype: list of :py:class:`~httm.system.batch.BatchResult`
+    """
+    from ..fits_utilities.electron_flux_fits import electron_flux_fits_to_raw
+    return transform_focal_plane(electron_flux_fits_to_raw, ccd_inputs, output, processes=processes, pool=pool,
+                                 **keyword_arguments)
@@ -0,0 +1,245 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.transformations.caching``
+================================
+
+An on-disk cache of the states of a converter between the steps of a
+:py:class:`~httm.transformations.plans.TransformationPlan`, so that rerunning a simulation or calibration with only
+the parameters of its later transformations changed resumes from the longest prefix of steps already run, rather
+than, for instance, simulating blooming again when only the pattern noise has changed.
+
+A :py:class:`~httm.transformations.caching.TransformationCache` is passed as the ``cache`` argument of
+:py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter` or
+:py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter`.
+
+The state after each step is keyed by a hash of the pixels, units and flags of the input converter, followed by,
+for each step up to it, the names of its transformations and the values of the converter parameters they depend on,
+as listed in :py:mod:`~httm.transformations.metadata`. A parameter naming a file is also keyed by the modification
+time of the file. States after a transformation drawing fresh random numbers, with a ``random_seed`` of ``-1``,
+are not cached.
+
+Each state is kept in its own directory as a ``.npy`` file of the pixels of each slice, which are memory mapped
+when the state is read back, alongside a JSON file of the units, indices and flags. States are read and written
+by directory renames, so processes may share a cache. When the states kept exceed the size of the cache, the least
+recently used are removed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from .constants import TRANSFORMATION_CACHE_SIZE
+from ..data_structures.common import Slice, SliceStack
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = 'state.json'
+
+
+class TransformationCache(object):
+    """
+    A size bounded, least recently used, cache of converter states kept in a directory.
+
+    :param directory: The directory the states are kept in, which is created if it does not exist
+    :type directory: str
+    :param maximum_bytes: The largest total size of the states kept, in bytes
+    :type maximum_bytes: int
+    """
+
+    def __init__(self, directory, maximum_bytes=TRANSFORMATION_CACHE_SIZE):
+        # type: (str, int) -> None
+        self.directory = directory
+        self.maximum_bytes = maximum_bytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def step_keys(self, converter, steps, transformations):
+        """
+        The keys of the states of a converter after each step of a plan, or ``None`` for those that are not cached.
+
+        :param converter: The converter before the first step
+        :type converter: :py:class:`object`
+        :param steps: The names of the transformations of each step, see \
+        :py:class:`~httm.transformations.plans.TransformationPlan`
+        :type steps: tuple of tuples of str
+        :param transformations: The metadata of the transformations, see :py:mod:`~httm.transformations.metadata`
+        :type transformations: dict
+        :rtype: tuple of str
+        """
+        key = converter_digest(converter)
+        keys = ()
+        for step in steps:
+            for name in step:
+                parameter_names = transformations[name]['parameters']
+                if key is not None and 'random_seed' in parameter_names and converter.parameters.random_seed == -1:
+                    key = None
+                if key is not None:
+                    key = hashlib.sha256(json.dumps(
+                        [key, name, [parameter_key(getattr(converter.parameters, parameter_name))
+                                     for parameter_name in parameter_names]]).encode('utf-8')).hexdigest()
+            keys += (key,)
+        return keys
+
+    def resume(self, keys, converter):
+        """
+        Read back the latest state of a converter that is cached.
+
+        :param keys: The keys of the states after each step, see \
+        :py:meth:`~httm.transformations.caching.TransformationCache.step_keys`
+        :type keys: tuple of str
+        :param converter: The converter before the first step
+        :type converter: :py:class:`object`
+        :return: The number of steps already run, and the converter after them
+        :rtype: tuple of an int and a converter
+        """
+        for step_index in reversed(range(len(keys))):
+            cached_converter = self.load(keys[step_index], converter)
+            if cached_converter is not None:
+                logger.info('Resuming from the cached state after {} of {} steps'.format(step_index + 1, len(keys)))
+                return step_index + 1, cached_converter
+        return 0, converter
+
+    def load(self, key, converter):
+        """
+        Read back a cached state of a converter, with its pixels memory mapped, marking it as recently used.
+
+        :param key: The key of the state
+        :type key: str
+        :param converter: The converter before the first step, whose parameters and conversion metadata are kept
+        :type converter: :py:class:`object`
+        :return: The converter in the cached state, or ``None`` if it is not cached
+        :rtype: :py:class:`object`
+        """
+        if key is None:
+            return None
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, STATE_FILE_NAME)) as state_file:
+                state = json.load(state_file)
+            pixels = [numpy.load(os.path.join(entry, file_name), mmap_mode='r') for file_name in state['pixels']]
+            os.utime(entry, None)
+        except (IOError, OSError, ValueError):
+            return None
+        if state['stacked']:
+            slices = SliceStack(units=state['units'][0], pixels=pixels[0])
+        else:
+            slices = tuple(Slice(index=index, units=units, pixels=slice_pixels)
+                           for index, units, slice_pixels in zip(state['indices'], state['units'], pixels))
+        # noinspection PyProtectedMember
+        return converter._replace(slices=slices, flags=converter.flags._replace(**state['flags']))
+
+    def store(self, key, converter):
+        """
+        Write a state of a converter to the cache, unless it is already cached, then remove the least recently used
+        states until the cache is within its size.
+
+        :param key: The key of the state
+        :type key: str
+        :param converter: The converter in the state
+        :type converter: :py:class:`object`
+        """
+        if key is None or os.path.isdir(os.path.join(self.directory, key)):
+            return
+        stacked = isinstance(converter.slices, SliceStack)
+        pixels = (converter.slices.pixels,) if stacked else tuple(image_slice.pixels
+                                                                   for image_slice in converter.slices)
+        state = {
+            'stacked': stacked,
+            'units': [converter.slices.units] if stacked else [image_slice.units for image_slice in converter.slices],
+            'indices': None if stacked else [image_slice.index for image_slice in converter.slices],
+            # noinspection PyProtectedMember
+            'flags': dict(converter.flags._asdict()),
+            'pixels': ['pixels_{}.npy'.format(index) for index in range(len(pixels))],
+        }
+        # The state is written to a hidden directory, then renamed, so that it is never read half written
+        staging = tempfile.mkdtemp(prefix='.', dir=self.directory)
+        try:
+            for file_name, slice_pixels in zip(state['pixels'], pixels):
+                numpy.save(os.path.join(staging, file_name), slice_pixels)
+            with open(os.path.join(staging, STATE_FILE_NAME), 'w') as state_file:
+                json.dump(state, state_file)
+            os.rename(staging, os.path.join(self.directory, key))
+        except OSError:
+            # Another process cached the same state first
+            pass
+        finally:
+            if os.path.isdir(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used states until the total size of the states kept is within the size of the cache.
+        """
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = os.path.join(self.directory, key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                entries.append((os.path.getmtime(entry),
+                                sum(os.path.getsize(os.path.join(entry, file_name))
+                                    for file_name in os.listdir(entry)),
+                                entry))
+            except OSError:
+                # Removed by another process
+                continue
+        total_bytes = sum(entry_bytes for _, entry_bytes, _ in entries)
+        for _, entry_bytes, entry in sorted(entries):
+            if total_bytes <= self.maximum_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total_bytes -= entry_bytes
+
+
+def converter_digest(converter):
+    """
+    Internal helper function returning a hash of the pixels, units and flags of the slices of a converter.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: str
+    """
+    digest = hashlib.sha256(repr((isinstance(converter.slices, SliceStack), tuple(converter.flags))).encode('utf-8'))
+    slices = (Slice(index=None, units=converter.slices.units, pixels=converter.slices.pixels),) \
+        if isinstance(converter.slices, SliceStack) else converter.slices
+    for image_slice in slices:
+        pixels = numpy.ascontiguousarray(image_slice.pixels)
+        digest.update(repr((image_slice.index, image_slice.units, pixels.dtype.str, pixels.shape)).encode('utf-8'))
+        digest.update(pixels.view(numpy.uint8).reshape(-1))
+    return digest.hexdigest()
+
+
+def parameter_key(value):
+    """
+    Internal helper function returning the part of a cache key for the value of a converter parameter, with the
+    modification time of the file a parameter names, such as a pattern noise file.
+
+    :param value: The value of a parameter
+    :type value: object
+    :rtype: str
+    """
+    if isinstance(value, str) and os.path.isfile(value):
+        return repr((value, os.path.getmtime(value)))
+    return repr(value)
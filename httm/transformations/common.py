@@ -24,6 +24,14 @@ and :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFl
 """
 
 import logging
+from collections import namedtuple
+from functools import partial
+
+import numpy
+
+from .constants import PIXEL_BLOCK_SIZE
+from .profiling import measure_call, thread_cpu_time
+from ..data_structures.common import Slice, SliceStack
 
 logger = logging.getLogger(__name__)
 
@@ -77,3 +85,592 @@ def derive_transformation_function_list(transformation_settings,
     return tuple(transformation_functions[k]
                  for k in default_settings.keys() if
                  check_if_specified_or_default(k))
+
+
+def per_slice_values(values, image_slices):
+    # type: (tuple, SliceStack) -> numpy.ndarray
+    """
+    Internal helper function for stacking per-slice values, such as ``video_scales`` or pattern noise arrays,
+    so that they broadcast against the pixels of a :py:class:`~httm.data_structures.common.SliceStack`.
+
+    The slice axis of the result is aligned with the first axis of the stacked pixels, and the axes of each value
+    are aligned with the last axes of the stacked pixels.
+
+    :param values: One value per slice; there may be more values than slices
+    :type values: tuple
+    :param image_slices: The stacked slices the values will be broadcast against
+    :type image_slices: :py:class:`~httm.data_structures.common.SliceStack`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    number_of_slices = len(image_slices)
+    assert len(values) >= number_of_slices, "There should be at least as many values as slices"
+    stacked_values = numpy.array([numpy.asarray(value) for value in values[:number_of_slices]])
+    padding = image_slices.pixels.ndim - stacked_values.ndim
+    assert padding >= 0, "Per-slice values have more dimensions than the slices"
+    return stacked_values.reshape((number_of_slices,) + (1,) * padding + stacked_values.shape[1:])
+
+
+def apply_slice_function(slice_function_and_arguments):
+    """
+    Internal helper function that calls a slice function with its keyword arguments.
+
+    It is defined at module level so that it can be pickled and sent to the workers of a process pool.
+
+    :param slice_function_and_arguments: A slice function and a dictionary of its keyword arguments
+    :type slice_function_and_arguments: tuple
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    slice_function, keyword_arguments = slice_function_and_arguments
+    return slice_function(**keyword_arguments)
+
+
+def apply_measured_slice_function(slice_function_and_arguments):
+    """
+    Internal helper function that calls a slice function with its keyword arguments and measures the call,
+    see :py:func:`~httm.transformations.profiling.measure_call`.
+
+    :param slice_function_and_arguments: A slice function and a dictionary of its keyword arguments
+    :type slice_function_and_arguments: tuple
+    :rtype: tuple of the transformed :py:class:`~httm.data_structures.common.Slice`, the wall time, the CPU time \
+    and the allocated bytes
+    """
+    return measure_call(thread_cpu_time, apply_slice_function, slice_function_and_arguments)
+
+
+def map_slices(slice_function, image_slices, executor=None, profiler=None, **per_slice_arguments):
+    """
+    Internal helper function for applying a slice transformation to each slice of a converter.
+
+    For each slice, ``slice_function`` is called with the slice as the ``image_slice`` keyword argument,
+    and with the slice's entry from each of the ``per_slice_arguments`` as keyword arguments.
+
+    If an ``executor`` is given, the slices are dispatched to it with its ``map`` method, so any
+    :py:class:`concurrent.futures.Executor` or :py:class:`multiprocessing.pool.Pool` may be used.
+    The slices are returned in order, so the results are identical to transforming them in turn.
+    A process pool requires ``slice_function`` to be picklable, and returns new pixels even when transforming in place.
+
+    If ``image_slices`` is a :py:class:`~httm.data_structures.common.SliceStack`, ``slice_function`` is instead called
+    once over all of the stacked pixels, with the per-slice arguments stacked using
+    :py:func:`~httm.transformations.common.per_slice_values` so that they broadcast along the slice axis.
+
+    :param slice_function: A slice transformation, usually partially applied to its scalar parameters
+    :type slice_function: function
+    :param image_slices: The slices to transform
+    :type image_slices: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :param per_slice_arguments: Sequences of keyword arguments with one entry per slice, such as ``video_scale``
+    :rtype: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    """
+    if isinstance(image_slices, SliceStack):
+        stacked_arguments = dict(
+            image_slice=Slice(index=tuple(range(len(image_slices))),
+                              units=image_slices.units,
+                              pixels=image_slices.pixels),
+            **{key: per_slice_values(values, image_slices) for key, values in per_slice_arguments.items()})
+        stacked_slice = slice_function(**stacked_arguments) if profiler is None \
+            else profiler.record_slice(*measure_call(thread_cpu_time, slice_function, **stacked_arguments))
+        return SliceStack(units=stacked_slice.units, pixels=stacked_slice.pixels)
+    for values in per_slice_arguments.values():
+        assert len(values) >= len(image_slices), "There should be at least as many values as slices"
+    slice_functions_and_arguments = (
+        (slice_function, dict(image_slice=image_slice,
+                              **{key: values[index] for key, values in per_slice_arguments.items()}))
+        for index, image_slice in enumerate(image_slices))
+    if profiler is not None:
+        measured_slices = map(apply_measured_slice_function, slice_functions_and_arguments) if executor is None \
+            else executor.map(apply_measured_slice_function, list(slice_functions_and_arguments))
+        return tuple(profiler.record_slice(*measured_slice) for measured_slice in measured_slices)
+    if executor is None:
+        return tuple(map(apply_slice_function, slice_functions_and_arguments))
+    return tuple(executor.map(apply_slice_function, list(slice_functions_and_arguments)))
+
+
+class RowTransformation(namedtuple('RowTransformation', ['units', 'transform_rows'])):
+    """
+    A slice transformation prepared to be applied a block of whole rows at a time, see
+    :py:func:`~httm.transformations.common.transform_slice_rows`.
+
+    ``transform_rows`` is called as ``transform_rows(values, window, out)``, where ``window`` is an index tuple of
+    the pixels of the slice, either a block generated by :py:func:`~httm.transformations.common.pixel_blocks` or a
+    pair of row and column indices spanning every leading axis, and ``values`` holds the pixels in the window as
+    transformed by the preceding row transformations. It returns the transformed values, written to ``out`` if that
+    is not ``None``; ``out`` may be ``values`` itself.
+
+    :param units: The units of the transformed slice
+    :type units: str
+    :param transform_rows: The transformation of a window of the pixels, or ``None`` if the pixels are left unchanged
+    :type transform_rows: function
+    """
+    __slots__ = ()
+
+
+class TransformedPixels(object):
+    """
+    The pixels of a slice as transformed by a sequence of row transformations, see
+    :py:class:`~httm.transformations.common.RowTransformation`, that are only computed for the windows that are read.
+
+    This stands in for the pixels of the slice passed to a row transformation that follows others in a fused pass,
+    so that it can estimate its parameters from a few rows or columns without the preceding transformations being
+    applied to every pixel first. Windows are read with ``pixels[...]``, ``pixels[..., columns]`` or
+    ``pixels[..., rows, columns]``.
+
+    :param pixels: The pixels of the slice
+    :type pixels: :py:class:`numpy.ndarray`
+    :param transforms: The ``transform_rows`` functions of the row transformations, in order
+    :type transforms: tuple of functions
+    """
+
+    def __init__(self, pixels, transforms):
+        # type: (numpy.ndarray, tuple) -> None
+        self.pixels = pixels
+        self.transforms = transforms
+
+    @property
+    def shape(self):
+        return self.pixels.shape
+
+    @property
+    def ndim(self):
+        return self.pixels.ndim
+
+    @property
+    def size(self):
+        return self.pixels.size
+
+    @property
+    def dtype(self):
+        """
+        The data type of the transformed pixels, found by transforming an empty block.
+        """
+        first_block = next(pixel_blocks(self.shape))
+        return self.transform_window(first_block[:-2] + (slice(0, 0), slice(None))).dtype
+
+    def transform_window(self, window):
+        """
+        Transform a window of the pixels, see :py:class:`~httm.transformations.common.RowTransformation`.
+
+        :param window: An index tuple of the pixels
+        :type window: tuple
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        values = self.pixels[window if len(window) == self.ndim else (Ellipsis,) + window]
+        for transform in self.transforms:
+            transformed_values = transform(values, window, None)
+            if numpy.issubdtype(transformed_values.dtype, numpy.floating):
+                # Round as a pass over the pixels does, holding single precision pixels in single precision
+                transformed_values = transformed_values.astype(numpy.result_type(values, 1.0), copy=False)
+            values = transformed_values
+        return values
+
+    def __getitem__(self, key):
+        window = key[1:] if isinstance(key, tuple) else ()
+        assert (key[0] if isinstance(key, tuple) else key) is Ellipsis and len(window) <= 2, \
+            "Transformed pixels are read with pixels[...], pixels[..., columns] or pixels[..., rows, columns]"
+        return self.transform_window((slice(None),) * (2 - len(window)) + window)
+
+
+def transform_slice_rows(image_slice, row_functions, in_place=False):
+    # type: (Slice, tuple, bool) -> Slice
+    """
+    Internal helper function that applies a sequence of row transformations to a slice in a single pass over its
+    pixels, a block of rows at a time.
+
+    Each of the ``row_functions`` is called with the slice as its ``image_slice`` keyword argument, and returns a
+    :py:class:`~httm.transformations.common.RowTransformation`. The first is passed the pixels of the slice, and each
+    one after it a :py:class:`~httm.transformations.common.TransformedPixels` standing in for the pixels transformed by
+    the ones before it, so that any parameters it estimates from the pixels are estimated before the pass.
+    Each block of rows is then transformed by every row transformation in turn while it is in the processor cache.
+
+    If the pixels remain integers, they are transformed all at once and kept as integers, unless transforming in place.
+
+    :param image_slice: The slice to transform
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param row_functions: Functions returning the row transformations of the slice, in order
+    :type row_functions: tuple of functions
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    pixels = image_slice.pixels
+    units = image_slice.units
+    transforms = ()
+    for row_function in row_functions:
+        # noinspection PyProtectedMember
+        row_transformation = row_function(image_slice=image_slice._replace(
+            units=units, pixels=TransformedPixels(pixels, transforms) if transforms else pixels))
+        units = row_transformation.units
+        if row_transformation.transform_rows is not None:
+            transforms += (row_transformation.transform_rows,)
+    if not transforms:
+        # noinspection PyProtectedMember
+        return image_slice._replace(units=units)
+    transformed_pixels = TransformedPixels(pixels, transforms)
+    if not in_place and numpy.issubdtype(pixels.dtype, numpy.integer) \
+            and numpy.issubdtype(transformed_pixels.dtype, numpy.integer):
+        # noinspection PyProtectedMember
+        return image_slice._replace(units=units, pixels=transformed_pixels[...])
+    transformed = output_pixels(pixels, in_place)
+    for block in pixel_blocks(pixels.shape):
+        block_out = transformed[block]
+        values = pixels[block]
+        for transform in transforms:
+            values = transform(values, block, block_out)
+        if values is not block_out:
+            block_out[...] = values
+    # noinspection PyProtectedMember
+    return image_slice._replace(units=units, pixels=transformed)
+
+
+def apply_slice_rows(row_functions, image_slice, in_place=False, **per_slice_arguments):
+    """
+    Internal helper function that calls :py:func:`~httm.transformations.common.transform_slice_rows` from
+    :py:func:`~httm.transformations.common.map_slices`. Each per-slice argument is keyed by the position of the row
+    function it is passed to, followed by a dot and its name, as in ``"1.video_scale"``.
+
+    It is defined at module level so that it can be pickled and sent to the workers of a process pool.
+
+    :param row_functions: Functions returning the row transformations of the slice, in order
+    :type row_functions: tuple of functions
+    :param image_slice: The slice to transform
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :param per_slice_arguments: The entries for this slice of the per-slice arguments of each row function
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    keyword_arguments = [{} for _ in row_functions]
+    for key, value in per_slice_arguments.items():
+        position, name = key.split('.', 1)
+        keyword_arguments[int(position)][name] = value
+    return transform_slice_rows(image_slice,
+                                tuple(partial(row_function, **arguments)
+                                      for row_function, arguments in zip(row_functions, keyword_arguments)),
+                                in_place=in_place)
+
+
+class RowStage(namedtuple('RowStage', ['row_function', 'per_slice_arguments', 'flags'])):
+    """
+    A converter transformation described as a row transformation of each of its slices, so that it can be fused
+    with neighbouring transformations into a single pass over the pixels, see
+    :py:func:`~httm.transformations.common.map_slice_rows`.
+
+    :param row_function: A function taking a slice as its ``image_slice`` keyword argument, along with the
+    per-slice arguments, and returning a :py:class:`~httm.transformations.common.RowTransformation`; usually \
+    partially applied to its scalar parameters
+    :type row_function: function
+    :param per_slice_arguments: Sequences of keyword arguments with one entry per slice, such as ``video_scale``
+    :type per_slice_arguments: dict
+    :param flags: The flags of the converter after the transformation
+    :type flags: object
+    """
+    __slots__ = ()
+
+
+def map_slice_rows(row_stages, image_slices, in_place=False, executor=None, profiler=None):
+    """
+    Internal helper function that applies the row transformations of a sequence of
+    :py:class:`~httm.transformations.common.RowStage` objects to each slice of a converter in a single pass,
+    see :py:func:`~httm.transformations.common.map_slices` and
+    :py:func:`~httm.transformations.common.transform_slice_rows`.
+
+    :param row_stages: The stages to apply, in order
+    :type row_stages: tuple of :py:class:`~httm.transformations.common.RowStage` objects
+    :param image_slices: The slices to transform
+    :type image_slices: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :rtype: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    """
+    return map_slices(partial(apply_slice_rows, tuple(row_stage.row_function for row_stage in row_stages),
+                              in_place=in_place),
+                      image_slices, executor=executor, profiler=profiler,
+                      **{'{}.{}'.format(position, name): values
+                         for position, row_stage in enumerate(row_stages)
+                         for name, values in row_stage.per_slice_arguments.items()})
+
+
+def transform_converter_rows(converter, row_stage_function, in_place=False, executor=None, profiler=None):
+    """
+    Internal helper function that runs a converter transformation described by a
+    :py:class:`~httm.transformations.common.RowStage`, see :py:func:`~httm.transformations.common.map_slice_rows`.
+
+    :param converter: The converter to transform
+    :type converter: :py:class:`object`
+    :param row_stage_function: A function taking the converter and returning its
+    :py:class:`~httm.transformations.common.RowStage`
+    :type row_stage_function: function
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :rtype: :py:class:`object`
+    """
+    row_stage = row_stage_function(converter)
+    # noinspection PyProtectedMember
+    return converter._replace(slices=map_slice_rows((row_stage,), converter.slices, in_place=in_place,
+                                                    executor=executor, profiler=profiler),
+                              flags=row_stage.flags)
+
+
+def slice_executor(workers):
+    """
+    Internal helper function that starts a pool of threads for transforming the slices of a converter concurrently,
+    see :py:func:`~httm.transformations.common.map_slices`. The caller should close and join the pool once done.
+
+    :param workers: The number of threads. If ``None`` or ``1``, no pool is started
+    :type workers: int
+    :rtype: :py:class:`multiprocessing.pool.ThreadPool` or ``None``
+    """
+    assert workers is None or workers >= 1, "The number of workers must be at least 1, not {}".format(workers)
+    if workers is None or workers == 1:
+        return None
+    from multiprocessing.pool import ThreadPool
+    return ThreadPool(workers)
+
+
+def copy_slices(image_slices):
+    """
+    Internal helper function that copies the pixels of a sequence of slices into freshly allocated,
+    native floating point arrays, so that the slices can then be transformed in place without affecting the
+    caller's data. Single precision pixels are kept in single precision, other pixels are copied to double precision.
+
+    :param image_slices: The slices to copy
+    :type image_slices: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    :rtype: tuple of :py:class:`~httm.data_structures.common.Slice` objects \
+    or :py:class:`~httm.data_structures.common.SliceStack`
+    """
+    if isinstance(image_slices, SliceStack):
+        return image_slices._replace(pixels=numpy.array(image_slices.pixels,
+                                                        dtype=numpy.result_type(image_slices.pixels, 1.0)))
+    # noinspection PyProtectedMember
+    return tuple(image_slice._replace(pixels=numpy.array(image_slice.pixels,
+                                                         dtype=numpy.result_type(image_slice.pixels, 1.0)))
+                 for image_slice in image_slices)
+
+
+def pixel_blocks(shape, axis=-2, block_size=PIXEL_BLOCK_SIZE):
+    """
+    Internal helper function that partitions an array of pixels into blocks of whole rows (``axis=-2``)
+    or whole columns (``axis=-1``), so that a transformation can be applied a block at a time while only
+    allocating block sized temporary arrays.
+
+    Leading axes, such as the slice axis of a :py:class:`~httm.data_structures.common.SliceStack`, are iterated
+    over in order and kept with length one, so that each block keeps the dimensions of the array.
+    Blocks of rows are therefore generated in C order, frame by frame.
+
+    :param shape: The shape of the array of pixels
+    :type shape: tuple of int
+    :param axis: ``-2`` for blocks of rows, ``-1`` for blocks of columns
+    :type axis: int
+    :param block_size: The number of rows or columns in each block
+    :type block_size: int
+    :rtype: generator of index tuples
+    """
+    assert axis in (-2, -1), "Blocks must be made of rows or columns"
+    for leading_index in numpy.ndindex(*shape[:-2]):
+        leading_block = tuple(slice(index, index + 1) for index in leading_index)
+        for start in range(0, shape[axis], block_size):
+            block = slice(start, start + block_size)
+            yield leading_block + ((block, slice(None)) if axis == -2 else (slice(None), block))
+
+
+def block_values(values, block):
+    """
+    Internal helper function that selects the part of a per-slice parameter, such as a ``video_scale``,
+    that applies to a block generated by :py:func:`~httm.transformations.common.pixel_blocks`.
+
+    Scalars apply to every block; parameters stacked by :py:func:`~httm.transformations.common.per_slice_values`
+    are indexed along their leading axes, except for axes of length one, such as the frame axis of a cube of frames,
+    which they broadcast along.
+
+    :param values: A scalar, or per-slice values stacked along leading axes
+    :type values: :py:class:`float` or :py:class:`numpy.ndarray`
+    :param block: An index tuple generated by :py:func:`~httm.transformations.common.pixel_blocks`
+    :type block: tuple
+    :rtype: :py:class:`float` or :py:class:`numpy.ndarray`
+    """
+    if numpy.ndim(values) == 0:
+        return values
+    return values[tuple(index if length > 1 else slice(None)
+                        for index, length in zip(block[:-2], numpy.shape(values)))]
+
+
+def block_pixel_values(values, block):
+    """
+    Internal helper function that selects the part of an array broadcast against the pixels of a slice, such as a
+    pattern of noise, a row, or an estimate for each frame, that applies to a block generated by
+    :py:func:`~httm.transformations.common.pixel_blocks`, or to a window of rows and columns spanning every leading
+    axis, see :py:class:`~httm.transformations.common.RowTransformation`.
+
+    The axes of the array are aligned with the last axes of the pixels, as by
+    :py:func:`~httm.transformations.common.per_slice_values`, and axes of length one are broadcast along.
+
+    :param values: A scalar, or an array broadcast against the pixels
+    :type values: :py:class:`float` or :py:class:`numpy.ndarray`
+    :param block: An index tuple of the pixels
+    :type block: tuple
+    :rtype: :py:class:`float` or :py:class:`numpy.ndarray`
+    """
+    if numpy.ndim(values) == 0:
+        return values
+    values = numpy.asarray(values)
+    indices = tuple(block[-values.ndim:]) if values.ndim <= len(block) \
+        else (slice(None),) * (values.ndim - len(block)) + tuple(block)
+    return values[tuple(index if length > 1 else slice(None) for index, length in zip(indices, values.shape))]
+
+
+def slice_seed_sequences(parameters, stream, number_of_slices):
+    """
+    Internal helper function that derives a :py:class:`numpy.random.SeedSequence` for each slice of a converter,
+    for a transformation drawing random numbers from one of the streams in :py:mod:`~httm.transformations.constants`.
+
+    Each seed is keyed by the ``random_seed``, ``camera_number`` and ``ccd_number`` parameters, the stream and the
+    index of the slice, so that every CCD, transformation and slice draws independent random numbers, whatever order
+    they are transformed in. A ``random_seed`` of ``-1`` draws fresh entropy from the operating system; other
+    negative seeds are rejected.
+
+    :param parameters: The parameters of the converter
+    :type parameters: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverterParameters`
+    :param stream: The stream of the transformation, such as :py:const:`~httm.transformations.constants.BASELINE_STREAM`
+    :type stream: int
+    :param number_of_slices: The number of slices
+    :type number_of_slices: int
+    :rtype: tuple of :py:class:`numpy.random.SeedSequence`
+    """
+    assert parameters.random_seed >= -1, \
+        "Random seed must be -1, to seed from the operating system, or non-negative, not {}".format(
+            parameters.random_seed)
+    entropy = numpy.random.SeedSequence(None if parameters.random_seed == -1 else parameters.random_seed).entropy
+    # Spawn keys hold only non-negative numbers, so camera and CCD numbers are offset by one to hold the ``-1`` of
+    # an unknown number, and any lower number, such as the ``-100`` of a test image, is wrapped to 32 bits
+    key = ((parameters.camera_number + 1) & 0xffffffff, (parameters.ccd_number + 1) & 0xffffffff, stream)
+    return tuple(numpy.random.SeedSequence(entropy, spawn_key=key + (index,)) for index in range(number_of_slices))
+
+
+def frame_random_generators(seed_sequences, shape):
+    """
+    Internal helper function that creates a counter based random number generator for each frame of the pixels of a
+    slice, from the seeds derived by :py:func:`~httm.transformations.common.slice_seed_sequences`.
+
+    Frames are indexed by the leading axes of the pixels, after the slice axis of a
+    :py:class:`~httm.data_structures.common.SliceStack`. The generator of a frame is keyed by its index, so a slice
+    draws the same random numbers whether or not it is stacked.
+
+    :param seed_sequences: The seed of a slice, or the seeds of stacked slices, stacked by \
+    :py:func:`~httm.transformations.common.per_slice_values`; if ``None``, fresh entropy is drawn
+    :type seed_sequences: :py:class:`numpy.random.SeedSequence` or :py:class:`numpy.ndarray`
+    :param shape: The shape of the pixels
+    :type shape: tuple of int
+    :return: An array of :py:class:`numpy.random.Generator` objects, one for each leading index of the pixels, \
+    see :py:func:`~httm.transformations.common.block_random_generator`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    seed_sequences = numpy.asarray(numpy.random.SeedSequence() if seed_sequences is None else seed_sequences)
+    generators = numpy.empty(shape[:-2], dtype=object)
+    for leading_index in numpy.ndindex(*shape[:-2]):
+        seed_sequence, frame_index = (seed_sequences.flat[leading_index[0]], leading_index[1:]) \
+            if seed_sequences.ndim > 0 else (seed_sequences, leading_index)
+        # Stacked seeds are held in zero dimensional arrays, see per_slice_values
+        seed_sequence = numpy.asarray(seed_sequence)[()]
+        generators[leading_index] = numpy.random.Generator(numpy.random.Philox(numpy.random.SeedSequence(
+            seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + frame_index)))
+    return generators
+
+
+def block_random_generator(generators, block):
+    """
+    Internal helper function that selects the random number generator, created by
+    :py:func:`~httm.transformations.common.frame_random_generators`, of the frame a block generated by
+    :py:func:`~httm.transformations.common.pixel_blocks` belongs to.
+
+    Since the blocks of a frame are generated in order, drawing random numbers for each block in turn yields the same
+    values as drawing them for the whole frame at once.
+
+    :param generators: The random number generator of each frame
+    :type generators: :py:class:`numpy.ndarray`
+    :param block: An index tuple generated by :py:func:`~httm.transformations.common.pixel_blocks`
+    :type block: tuple
+    :rtype: :py:class:`numpy.random.Generator`
+    """
+    return generators[tuple(index.start for index in block[:-2])]
+
+
+def block_standard_normals(generators, shape, block_size=PIXEL_BLOCK_SIZE):
+    """
+    Internal helper function that generates the blocks of rows of an array of pixels, see
+    :py:func:`~httm.transformations.common.pixel_blocks`, each with standard normal random numbers drawn for it from
+    the generator of its frame, see :py:func:`~httm.transformations.common.block_random_generator`.
+
+    The random numbers are drawn in single precision with the ziggurat method of
+    :py:meth:`numpy.random.Generator.standard_normal`, into a buffer that is allocated once and reused for every block,
+    so they must be used, for instance scaled in place and added to the pixels, before the next block is generated.
+
+    :param generators: The random number generator of each frame, see \
+    :py:func:`~httm.transformations.common.frame_random_generators`
+    :type generators: :py:class:`numpy.ndarray`
+    :param shape: The shape of the array of pixels
+    :type shape: tuple of int
+    :param block_size: The number of rows in each block
+    :type block_size: int
+    :rtype: generator of tuples of an index tuple and a :py:class:`numpy.ndarray`
+    """
+    draw_standard_normals = standard_normal_drawer(generators, shape, block_size=block_size)
+    for block in pixel_blocks(shape, block_size=block_size):
+        yield block, draw_standard_normals(block)
+
+
+def standard_normal_drawer(generators, shape, block_size=PIXEL_BLOCK_SIZE):
+    """
+    Internal helper function returning a function that draws standard normal random numbers for a block of rows
+    of an array of pixels, as :py:func:`~httm.transformations.common.block_standard_normals` does, for a
+    transformation that is handed its blocks one at a time. The blocks of each frame must be drawn for in order.
+
+    :param generators: The random number generator of each frame, see \
+    :py:func:`~httm.transformations.common.frame_random_generators`
+    :type generators: :py:class:`numpy.ndarray`
+    :param shape: The shape of the array of pixels
+    :type shape: tuple of int
+    :param block_size: The largest number of rows in a block
+    :type block_size: int
+    :rtype: function taking a block and returning a :py:class:`numpy.ndarray`
+    """
+    buffer = numpy.empty((1,) * (len(shape) - 2) + (min(block_size, shape[-2]), shape[-1]), dtype=numpy.float32)
+
+    def draw_standard_normals(block):
+        standard_normals = buffer[..., :min(block[-2].stop, shape[-2]) - block[-2].start, :]
+        block_random_generator(generators, block).standard_normal(dtype=numpy.float32, out=standard_normals)
+        return standard_normals
+
+    return draw_standard_normals
+
+
+def output_pixels(pixels, in_place):
+    # type: (numpy.ndarray, bool) -> numpy.ndarray
+    """
+    Internal helper function returning the array a transformation should write its result to:
+    ``pixels`` itself if transforming in place, otherwise a new floating point array of the same shape.
+
+    :param pixels: The input pixels
+    :type pixels: :py:class:`numpy.ndarray`
+    :param in_place: Whether the transformation is in place
+    :type in_place: bool
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    if in_place:
+        return pixels
+    return numpy.empty(pixels.shape, dtype=numpy.result_type(pixels, 1.0))
@@ -24,3 +24,31 @@ This module contains constants used in transformation functions.
 
 # The maximum number of Analogue to Digital Converter Units a pixel can contain in a RAW image
 FPE_MAX_ADU = 65535
+
+# The number of rows or columns processed at a time by transformations that need temporary arrays
+PIXEL_BLOCK_SIZE = 64
+
+# The number of columns solved together by each matrix product in the exact undershoot inverse
+UNDERSHOOT_SCAN_SIZE = 32
+
+# The number of rows added each way around the excess charge of a column to the window of rows it is bloomed over,
+# see :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_blooming_on_slice`
+BLOOMING_MARGIN = 32
+
+# The largest number of entries in a table converting integer ADU to electrons,
+# see :py:func:`~httm.transformations.raw_slices_to_calibrated.convert_slice_adu_to_electrons`
+ADU_LOOKUP_TABLE_SIZE = 1 << 20
+
+# The number of rows in each band when calibrating a raw image a band of rows at a time
+ROW_BAND_SIZE = 256
+
+# The default largest total size in bytes of the converter states kept in a transformation cache,
+# see :py:class:`~httm.transformations.caching.TransformationCache`
+TRANSFORMATION_CACHE_SIZE = 1 << 30
+
+# The independent streams of random numbers drawn by each simulation transformation,
+# see :py:func:`~httm.transformations.common.slice_seed_sequences`
+SHOT_NOISE_STREAM = 0
+READOUT_NOISE_STREAM = 1
+BASELINE_STREAM = 2
+SHOT_AND_READOUT_NOISE_STREAM = 3
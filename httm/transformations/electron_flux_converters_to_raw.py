@@ -23,18 +23,28 @@ Transformation functions for processing
 :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter` objects so that
 they are suitable  for writing to a simulated raw FITS file.
 
+Each transformation that acts on each row on its own is described by a
+:py:class:`~httm.transformations.common.RowStage`, such as
+:py:func:`~httm.transformations.electron_flux_converters_to_raw.add_readout_noise_row_stage`, so that
+:py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter` can fuse
+neighbouring transformations into a single pass over the pixels, see :py:mod:`~httm.transformations.plans`.
+
 """
 from collections import OrderedDict
-
-from .common import derive_transformation_function_list
-from .electron_flux_slices_to_raw import introduce_smear_rows_to_slice, add_shot_noise_to_slice, \
-    simulate_blooming_on_slice, add_baseline_to_slice, add_readout_noise_to_slice, simulate_undershoot_on_slice, \
-    simulate_start_of_line_ringing_to_slice, add_pattern_noise_to_slice, convert_slice_electrons_to_adu
+from functools import partial
+
+from .common import derive_transformation_function_list, map_slices, copy_slices, slice_seed_sequences, RowStage, \
+    transform_converter_rows
+from .constants import SHOT_NOISE_STREAM, READOUT_NOISE_STREAM, BASELINE_STREAM, SHOT_AND_READOUT_NOISE_STREAM
+from .electron_flux_slices_to_raw import introduce_smear_rows_to_slice, add_shot_noise_to_rows, \
+    simulate_blooming_on_slice, simulate_charge_spill_blooming_on_slice, add_baseline_to_rows, \
+    add_readout_noise_to_rows, add_shot_and_readout_noise_to_rows, simulate_undershoot_on_rows, \
+    simulate_start_of_line_ringing_on_rows, add_pattern_noise_to_rows, convert_rows_electrons_to_adu
 from ..data_structures.electron_flux_converter import SingleCCDElectronFluxConverter
 
 
-def introduce_smear_rows(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def introduce_smear_rows(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Add *smear rows* to a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -46,6 +56,12 @@ def introduce_smear_rows(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
     assert electron_flux_converter.flags.smear_rows_present is False, "Smear rows must not be flagged as present"
@@ -57,15 +73,14 @@ def introduce_smear_rows(electron_flux_converter):
     image_slices = electron_flux_converter.slices
     # noinspection PyProtectedMember
     return electron_flux_converter._replace(
-        slices=tuple(introduce_smear_rows_to_slice(smear_ratio, early_dark_pixel_columns,
-                                                   late_dark_pixel_columns,
-                                                   final_dark_pixel_rows, smear_rows, image_slice)
-                     for image_slice in image_slices),
+        slices=map_slices(partial(introduce_smear_rows_to_slice, smear_ratio, early_dark_pixel_columns,
+                                  late_dark_pixel_columns, final_dark_pixel_rows, smear_rows, in_place=in_place),
+                          image_slices, executor=executor, profiler=profiler),
         flags=electron_flux_converter.flags._replace(smear_rows_present=True))
 
 
-def add_shot_noise(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def add_shot_noise(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Add *shot noise* to each pixel in each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -76,45 +91,86 @@ def add_shot_noise(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently; \
+    each slice draws from its own random stream, see :py:func:`~httm.transformations.common.slice_seed_sequences`
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, add_shot_noise_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def add_shot_noise_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_shot_noise` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert electron_flux_converter.flags.shot_noise_present is False, "Shot noise must not be flagged as present"
     image_slices = electron_flux_converter.slices
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(add_shot_noise_to_slice(image_slice) for image_slice in image_slices),
-        flags=electron_flux_converter.flags._replace(shot_noise_present=True))
+    return RowStage(row_function=add_shot_noise_to_rows,
+                    per_slice_arguments={
+                        'seed_sequence': slice_seed_sequences(electron_flux_converter.parameters, SHOT_NOISE_STREAM,
+                                                              len(image_slices)),
+                    },
+                    flags=electron_flux_converter.flags._replace(shot_noise_present=True))
 
 
-def simulate_blooming(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def simulate_blooming(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Simulate *blooming* on for each column for each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
 
     Calls
     :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_blooming_on_slice`
-    over each slice.
+    over each slice, or
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_charge_spill_blooming_on_slice`
+    if the ``blooming_model`` parameter is ``charge_spill``.
 
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
     assert electron_flux_converter.flags.blooming_present is False, "Blooming must not be flagged as present"
     full_well = electron_flux_converter.parameters.full_well
     blooming_threshold = electron_flux_converter.parameters.blooming_threshold
     number_of_exposures = electron_flux_converter.parameters.number_of_exposures
+    blooming_model = electron_flux_converter.parameters.blooming_model
+    blooming_functions = {
+        'diffusion': simulate_blooming_on_slice,
+        'charge_spill': simulate_charge_spill_blooming_on_slice,
+    }
+    assert blooming_model in blooming_functions, \
+        "Blooming model must be one of {}, not {}".format(sorted(blooming_functions), blooming_model)
     image_slices = electron_flux_converter.slices
     # noinspection PyProtectedMember
     return electron_flux_converter._replace(
-        slices=tuple(simulate_blooming_on_slice(full_well, blooming_threshold, number_of_exposures, image_slice)
-                     for image_slice in image_slices),
+        slices=map_slices(partial(blooming_functions[blooming_model], full_well, blooming_threshold,
+                                  number_of_exposures, in_place=in_place),
+                          image_slices, executor=executor, profiler=profiler),
         flags=electron_flux_converter.flags._replace(blooming_present=True))
 
 
-def add_baseline(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def add_baseline(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Add a random scalar *baseline electron count* to a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter` for
@@ -127,8 +183,30 @@ def add_baseline(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently; \
+    each slice draws from its own random stream, see :py:func:`~httm.transformations.common.slice_seed_sequences`
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, add_baseline_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def add_baseline_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_baseline` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert electron_flux_converter.flags.baseline_present is False, "Baseline must not be flagged as present"
     image_slices = electron_flux_converter.slices
     single_frame_baseline_adus = electron_flux_converter.parameters.single_frame_baseline_adus
@@ -139,16 +217,20 @@ def add_baseline(electron_flux_converter):
     video_scales = electron_flux_converter.parameters.video_scales
     assert len(video_scales) >= len(image_slices), "There should be at least as many video scales as slices"
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(add_baseline_to_slice(single_frame_baseline_adu, single_frame_baseline_adu_drift_term,
-                                           number_of_exposures, video_scale, image_slice)
-                     for (single_frame_baseline_adu, video_scale, image_slice)
-                     in zip(single_frame_baseline_adus, video_scales, image_slices)),
-        flags=electron_flux_converter.flags._replace(baseline_present=True))
-
-
-def add_readout_noise(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+    return RowStage(row_function=partial(add_baseline_to_rows,
+                                         single_frame_baseline_adu_drift_term=single_frame_baseline_adu_drift_term,
+                                         number_of_exposures=number_of_exposures),
+                    per_slice_arguments={
+                        'single_frame_baseline_adu': single_frame_baseline_adus,
+                        'video_scale': video_scales,
+                        'seed_sequence': slice_seed_sequences(electron_flux_converter.parameters, BASELINE_STREAM,
+                                                              len(image_slices)),
+                    },
+                    flags=electron_flux_converter.flags._replace(baseline_present=True))
+
+
+def add_readout_noise(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Add *readout noise* to each pixel in each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -160,21 +242,103 @@ def add_readout_noise(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently; \
+    each slice draws from its own random stream, see :py:func:`~httm.transformations.common.slice_seed_sequences`
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, add_readout_noise_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def add_readout_noise_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_readout_noise` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert electron_flux_converter.flags.readout_noise_present is False, "Readout noise must not be flagged as present"
     readout_noise_parameters = electron_flux_converter.parameters.readout_noise_parameters
     image_slices = electron_flux_converter.slices
     number_of_exposures = electron_flux_converter.parameters.number_of_exposures
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(add_readout_noise_to_slice(readout_noise_parameter, number_of_exposures, image_slice)
-                     for (readout_noise_parameter, image_slice) in zip(readout_noise_parameters, image_slices)),
-        flags=electron_flux_converter.flags._replace(readout_noise_present=True))
+    return RowStage(row_function=partial(add_readout_noise_to_rows, number_of_exposures=number_of_exposures),
+                    per_slice_arguments={
+                        'readout_noise_parameter': readout_noise_parameters,
+                        'seed_sequence': slice_seed_sequences(electron_flux_converter.parameters,
+                                                              READOUT_NOISE_STREAM, len(image_slices)),
+                    },
+                    flags=electron_flux_converter.flags._replace(readout_noise_present=True))
+
+
+def add_shot_and_readout_noise(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
+    """
+    Add *shot noise* and *readout noise* to each pixel in each slice in a
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`, with a single draw.
+
+    Calls
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_shot_and_readout_noise_to_slice`
+    over each slice.
+
+    When run by :py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter`,
+    this transformation replaces :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_shot_noise`
+    and :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_readout_noise`, and runs after blooming,
+    so the shot noise is drawn from the bloomed expected electron counts.
+
+    :param electron_flux_converter: Should have electrons for units for each of its slices
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently; \
+    each slice draws from its own random stream, see :py:func:`~httm.transformations.common.slice_seed_sequences`
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    """
+    return transform_converter_rows(electron_flux_converter, add_shot_and_readout_noise_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def add_shot_and_readout_noise_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_shot_and_readout_noise` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
+    assert electron_flux_converter.flags.shot_noise_present is False, "Shot noise must not be flagged as present"
+    assert electron_flux_converter.flags.readout_noise_present is False, "Readout noise must not be flagged as present"
+    readout_noise_parameters = electron_flux_converter.parameters.readout_noise_parameters
+    image_slices = electron_flux_converter.slices
+    number_of_exposures = electron_flux_converter.parameters.number_of_exposures
+    # noinspection PyProtectedMember
+    return RowStage(row_function=partial(add_shot_and_readout_noise_to_rows, number_of_exposures=number_of_exposures),
+                    per_slice_arguments={
+                        'readout_noise_parameter': readout_noise_parameters,
+                        'seed_sequence': slice_seed_sequences(electron_flux_converter.parameters,
+                                                              SHOT_AND_READOUT_NOISE_STREAM, len(image_slices)),
+                    },
+                    flags=electron_flux_converter.flags._replace(shot_noise_present=True, readout_noise_present=True))
 
 
-def simulate_undershoot(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def simulate_undershoot(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Simulate *undershoot* on each row of each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -186,19 +350,39 @@ def simulate_undershoot(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, simulate_undershoot_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def simulate_undershoot_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.simulate_undershoot` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert electron_flux_converter.flags.undershoot_present is False, "Undershoot must not be flagged as present"
     undershoot_parameter = electron_flux_converter.parameters.undershoot_parameter
-    image_slices = electron_flux_converter.slices
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(simulate_undershoot_on_slice(undershoot_parameter, image_slice) for image_slice in image_slices),
-        flags=electron_flux_converter.flags._replace(undershoot_present=True))
+    return RowStage(row_function=partial(simulate_undershoot_on_rows, undershoot_parameter),
+                    per_slice_arguments={},
+                    flags=electron_flux_converter.flags._replace(undershoot_present=True))
 
 
-def simulate_start_of_line_ringing(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def simulate_start_of_line_ringing(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Simulate *start of line ringing* on each row of each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -210,24 +394,42 @@ def simulate_start_of_line_ringing(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, simulate_start_of_line_ringing_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def simulate_start_of_line_ringing_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.simulate_start_of_line_ringing` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     from .. import resource_utilities
     assert electron_flux_converter.flags.start_of_line_ringing_present is False, \
         "Start of line ringing must not be flagged as present"
-    start_of_line_ringing_patterns = resource_utilities.load_npz(electron_flux_converter
-                                                                 .parameters
-                                                                 .start_of_line_ringing)
-    image_slices = electron_flux_converter.slices
+    start_of_line_ringing_patterns = resource_utilities.load_shared_resource(
+        resource_utilities.load_npz, electron_flux_converter.parameters.start_of_line_ringing)
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(simulate_start_of_line_ringing_to_slice(start_of_line_ringing, image_slice)
-                     for (start_of_line_ringing, image_slice) in zip(start_of_line_ringing_patterns, image_slices)),
-        flags=electron_flux_converter.flags._replace(start_of_line_ringing_present=True))
+    return RowStage(row_function=simulate_start_of_line_ringing_on_rows,
+                    per_slice_arguments={'start_of_line_ringing': start_of_line_ringing_patterns},
+                    flags=electron_flux_converter.flags._replace(start_of_line_ringing_present=True))
 
 
-def add_pattern_noise(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def add_pattern_noise(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Add *pattern noise* to each slice in a
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`.
@@ -238,21 +440,41 @@ def add_pattern_noise(electron_flux_converter):
     :param electron_flux_converter: Should have *Analogue to Digital Converter Units* (ADU) for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, add_pattern_noise_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def add_pattern_noise_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_pattern_noise` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     from .. import resource_utilities
     assert electron_flux_converter.flags.pattern_noise_present is False, "Pattern noise must not be flagged as present"
-    pattern_noises = resource_utilities.load_pattern_noise(electron_flux_converter.parameters.pattern_noise)
-    image_slices = electron_flux_converter.slices
+    pattern_noises = resource_utilities.load_shared_resource(resource_utilities.load_pattern_noise,
+                                                             electron_flux_converter.parameters.pattern_noise)
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(add_pattern_noise_to_slice(pattern_noise, image_slice)
-                     for (pattern_noise, image_slice) in zip(pattern_noises, image_slices)),
-        flags=electron_flux_converter.flags._replace(pattern_noise_present=True))
+    return RowStage(row_function=add_pattern_noise_to_rows,
+                    per_slice_arguments={'pattern_noise': pattern_noises},
+                    flags=electron_flux_converter.flags._replace(pattern_noise_present=True))
 
 
-def convert_electrons_to_adu(electron_flux_converter):
-    # type: (SingleCCDElectronFluxConverter) -> SingleCCDElectronFluxConverter
+def convert_electrons_to_adu(electron_flux_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDElectronFluxConverter, bool, object, object) -> SingleCCDElectronFluxConverter
     """
     Converts a :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     from having electrons to *Analogue to Digital Converter Units* (ADU).
@@ -263,8 +485,29 @@ def convert_electrons_to_adu(electron_flux_converter):
     :param electron_flux_converter: Should have electrons for units for each of its slices
     :type electron_flux_converter: \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
+    return transform_converter_rows(electron_flux_converter, convert_electrons_to_adu_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def convert_electrons_to_adu_row_stage(electron_flux_converter):
+    # type: (SingleCCDElectronFluxConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.electron_flux_converters_to_raw.convert_electrons_to_adu` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param electron_flux_converter: The converter to transform
+    :type electron_flux_converter: \
+    :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert electron_flux_converter.flags.in_adu is False, \
         "Image must not be in Analogue to Digital Converter Units (ADU)"
     video_scales = electron_flux_converter.parameters.video_scales
@@ -275,20 +518,40 @@ def convert_electrons_to_adu(electron_flux_converter):
     assert len(video_scales) >= len(image_slices), \
         "There should be at least as many video scales as there are slices"
     # noinspection PyProtectedMember
-    return electron_flux_converter._replace(
-        slices=tuple(convert_slice_electrons_to_adu(gain_loss, number_of_exposures, video_scale,
-                                                    clip_level_adu, image_slice)
-                     for (video_scale, image_slice) in zip(video_scales, image_slices)),
-        flags=electron_flux_converter.flags._replace(in_adu=True))
+    return RowStage(row_function=partial(convert_rows_electrons_to_adu, gain_loss, number_of_exposures,
+                                         clip_level_adu=clip_level_adu),
+                    per_slice_arguments={'video_scale': video_scales},
+                    flags=electron_flux_converter.flags._replace(in_adu=True))
 
 
 def transform_electron_flux_converter(single_ccd_electron_flux_converter,
-                                      transformation_settings=None):
-    # type: (SingleCCDElectronFluxConverter, object) -> SingleCCDElectronFluxConverter
+                                      transformation_settings=None,
+                                      in_place=False,
+                                      executor=None,
+                                      profiler=None,
+                                      cache=None,
+                                      fuse=True):
+    # type: (...) -> SingleCCDElectronFluxConverter
     """
     Take a :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter` and run specified
     transformations over it.
 
+    If ``in_place`` is ``True``, the pixels are copied once into a working buffer which every transformation then
+    updates in place, rather than each transformation allocating new pixels. The input converter is not modified.
+
+    If an ``executor`` is given, each transformation dispatches the slices to it, see
+    :py:func:`~httm.transformations.common.map_slices`. Transformations that draw random numbers draw from an
+    independent stream for each CCD, slice and frame, see :py:func:`~httm.transformations.common.slice_seed_sequences`,
+    so the results are identical for the same ``random_seed`` however the slices are scheduled.
+
+    If :py:func:`~httm.transformations.electron_flux_converters_to_raw.add_shot_and_readout_noise` is selected,
+    it replaces the separate shot noise and readout noise transformations.
+
+    The transformations are run by a :py:class:`~httm.transformations.plans.TransformationPlan`, which fuses
+    neighbouring transformations acting on each row on their own into a single pass over the pixels, and skips those
+    that would leave the pixels unchanged, such as adding pattern noise that is zero. If ``fuse`` is ``False``, each
+    transformation runs in its own pass over the pixels, so that a ``profiler`` records each one under its own name.
+
     :param single_ccd_electron_flux_converter: A \
     :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter` to run a series of \
     transformations over
@@ -297,20 +560,34 @@ def transform_electron_flux_converter(single_ccd_electron_flux_converter,
     :param transformation_settings: An object specifying which transformations to run; if not specified defaults are \
     used
     :type transformation_settings: object
+    :param in_place: Whether to run the transformations in place on a single working buffer
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices of each transformation
+    :type executor: object
+    :param profiler: An optional profiler recording each transformation and the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :param cache: An optional cache of the intermediate states of the converter to resume from, \
+    see :py:mod:`~httm.transformations.caching`
+    :type cache: :py:class:`~httm.transformations.caching.TransformationCache`
+    :param fuse: Whether to fuse neighbouring transformations into single passes over the pixels
+    :type fuse: bool
     :rtype: :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter`
     """
-    from functools import reduce
     from .metadata import electron_flux_transformations
-    import numpy.random
-    random_seed = single_ccd_electron_flux_converter.parameters.random_seed
-    numpy.random.seed(random_seed if random_seed is not -1 else None)
-    return reduce(
-        lambda converter, transformation_function:
-        transformation_function(converter),
-        derive_transformation_function_list(
-            transformation_settings,
-            OrderedDict((key, electron_flux_transformations[key]['default'])
-                        for key in electron_flux_transformations.keys()),
-            {key: electron_flux_transformations[key]['function']
-             for key in electron_flux_transformations.keys()}),
-        single_ccd_electron_flux_converter)
+    from .plans import transformation_plan
+    if in_place:
+        # noinspection PyProtectedMember
+        single_ccd_electron_flux_converter = single_ccd_electron_flux_converter._replace(
+            slices=copy_slices(single_ccd_electron_flux_converter.slices))
+    transformation_names = derive_transformation_function_list(
+        transformation_settings,
+        OrderedDict((key, electron_flux_transformations[key]['default'])
+                    for key in electron_flux_transformations.keys()),
+        {key: key for key in electron_flux_transformations.keys()})
+    if 'add_shot_and_readout_noise' in transformation_names:
+        transformation_names = tuple(name for name in transformation_names
+                                     if name not in ('add_shot_noise', 'add_readout_noise'))
+    return transformation_plan(single_ccd_electron_flux_converter, transformation_names,
+                               electron_flux_transformations, fuse=fuse).run(
+        single_ccd_electron_flux_converter, electron_flux_transformations, in_place=in_place, executor=executor,
+        profiler=profiler, cache=cache)
@@ -23,19 +23,37 @@ Transformation functions for processing slices contained in a
 :py:class:`~httm.data_structures.electron_flux_converter.SingleCCDElectronFluxConverter` so that they are suitable
 for writing to a simulated raw FITS file.
 
+The pixels of a slice may carry leading axes, such as the slice axis of a
+:py:class:`~httm.data_structures.common.SliceStack`; rows and columns are always the last two axes.
+
+Each slice transformation can also update its input in place, passing ``in_place=True``, in which case the
+pixels of the input slice must be a writable floating point array.
+
+Transformations that draw random numbers take the seed of the slice as ``seed_sequence``, and draw from a separate
+counter based generator for each frame, see :py:func:`~httm.transformations.common.frame_random_generators`,
+so their results do not depend on the order slices and frames are transformed in. Noise is drawn in single precision
+into a reused buffer a block of rows at a time, see :py:func:`~httm.transformations.common.standard_normal_drawer`.
+
+Each slice transformation that acts on each row on its own is implemented by a row function returning a
+:py:class:`~httm.transformations.common.RowTransformation`, such as
+:py:func:`~httm.transformations.electron_flux_slices_to_raw.add_readout_noise_to_rows`, so that it can be fused with
+its neighbours into a single pass over the pixels, see :py:func:`~httm.transformations.common.transform_slice_rows`.
+
 """
+from functools import partial
 
 import numpy
 
-from .constants import FPE_MAX_ADU
-from ..data_structures.common import Slice
+from .common import block_values, block_pixel_values, output_pixels, frame_random_generators, \
+    standard_normal_drawer, RowTransformation, transform_slice_rows
+from .constants import FPE_MAX_ADU, BLOOMING_MARGIN
 
 
 # noinspection PyProtectedMember
 
 
-def simulate_start_of_line_ringing_to_slice(start_of_line_ringing, image_slice):
-    # type: (numpy.ndarray, Slice) -> Slice
+def simulate_start_of_line_ringing_to_slice(start_of_line_ringing, image_slice, in_place=False):
+    # type: (numpy.ndarray, Slice, bool) -> Slice
     """
     Every row of electron flux pixels (dark or otherwise) in a CCD slice
     has been empirically observed to start with a fixed pattern.
@@ -54,17 +72,41 @@ def simulate_start_of_line_ringing_to_slice(start_of_line_ringing, image_slice):
     :type start_of_line_ringing: row: :py:class:`numpy.ndarray`
     :param image_slice: input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice` units: electrons
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype:  :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(simulate_start_of_line_ringing_on_rows, start_of_line_ringing),),
+                                in_place=in_place)
+
+
+def simulate_start_of_line_ringing_on_rows(start_of_line_ringing, image_slice):
+    # type: (numpy.ndarray, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_start_of_line_ringing_to_slice`.
+
+    :param start_of_line_ringing: One dimensional array of floats, representing a fixed pattern \
+    disturbance in each row of a slice
+    :type start_of_line_ringing: row: :py:class:`numpy.ndarray`
+    :param image_slice: input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    row_len = len(image_slice.pixels[0])
-    ringing_row = numpy.resize(numpy.concatenate((start_of_line_ringing, numpy.zeros(row_len))), row_len)
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=image_slice.pixels + ringing_row)
+    row_len = image_slice.pixels.shape[-1]
+    ringing_row = numpy.concatenate((start_of_line_ringing,
+                                     numpy.zeros(numpy.shape(start_of_line_ringing)[:-1] + (row_len,))),
+                                    axis=-1)[..., :row_len]
+
+    def add_ringing(values, window, out):
+        return numpy.add(values, block_pixel_values(ringing_row, window), out=out)
 
+    return RowTransformation(units="electrons", transform_rows=add_ringing)
 
-def add_pattern_noise_to_slice(pattern_noise, image_slice):
-    # type: (numpy.ndarray, Slice) -> Slice
+
+def add_pattern_noise_to_slice(pattern_noise, image_slice, in_place=False):
+    # type: (numpy.ndarray, Slice, bool) -> Slice
     """
     This transformation adds a fixed pattern of noise to a slice.
 
@@ -79,17 +121,37 @@ def add_pattern_noise_to_slice(pattern_noise, image_slice):
     :type pattern_noise: :py:class:`numpy.ndarray`
     :param image_slice: The input slice. Units: ADU
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype:  :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(add_pattern_noise_to_rows, pattern_noise),), in_place=in_place)
+
+
+def add_pattern_noise_to_rows(pattern_noise, image_slice):
+    # type: (numpy.ndarray, Slice) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_pattern_noise_to_slice`.
+
+    :param pattern_noise: A two dimensional array of floats, representing a fixed pattern \
+    disturbance in a slice.
+    :type pattern_noise: :py:class:`numpy.ndarray`
+    :param image_slice: The input slice. Units: ADU
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "ADU", "pixel units must be in ADU"
-    assert image_slice.pixels.shape == pattern_noise.shape, \
+    assert image_slice.pixels.shape[-2:] == pattern_noise.shape[-2:], \
         "Image slice and pattern noise must be the same shape; " \
         "image slice shape was {image_shape} and pattern noise shape was {pattern_noise_shape}".format(
             image_shape=image_slice.pixels.shape,
             pattern_noise_shape=pattern_noise.shape
         )
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=image_slice.pixels + pattern_noise)
+
+    def add_pattern(values, window, out):
+        return numpy.add(values, block_pixel_values(pattern_noise, window), out=out)
+
+    return RowTransformation(units="ADU", transform_rows=add_pattern)
 
 
 def introduce_smear_rows_to_slice(smear_ratio,
@@ -97,8 +159,9 @@ def introduce_smear_rows_to_slice(smear_ratio,
                                   late_dark_pixel_columns,
                                   final_dark_pixel_rows,
                                   smear_rows,
-                                  image_slice):
-    # type: (float, Slice) -> Slice
+                                  image_slice,
+                                  in_place=False):
+    # type: (float, int, int, int, int, Slice, bool) -> Slice
     """
     This function takes a slice with empty smear rows and populates them, and adds smear to every image pixel
     (but not dark pixels). See :ref:`ccd-and-slice-layout` for more details.
@@ -129,26 +192,30 @@ def introduce_smear_rows_to_slice(smear_ratio,
     :type smear_rows: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
     assert image_slice.units == "electrons", "units must be electrons"
     top = (final_dark_pixel_rows + smear_rows)
-    smear_pixels = image_slice.pixels[-top:-final_dark_pixel_rows, early_dark_pixel_columns:-late_dark_pixel_columns]
+    smear_pixels = image_slice.pixels[..., -top:-final_dark_pixel_rows,
+                                      early_dark_pixel_columns:-late_dark_pixel_columns]
 
     # noinspection PyTypeChecker
     assert numpy.all(smear_pixels == 0), "Smear rows are already introduced (should be set to 0)"
-    image_pixels = image_slice.pixels[0:-top, early_dark_pixel_columns:-late_dark_pixel_columns]
-    estimated_smear = smear_ratio * numpy.sum(image_pixels, 0)
+    image_pixels = image_slice.pixels[..., 0:-top, early_dark_pixel_columns:-late_dark_pixel_columns]
+    estimated_smear = smear_ratio * numpy.sum(image_pixels, axis=-2, keepdims=True, dtype=numpy.float64)
 
-    working_pixels = numpy.copy(image_slice.pixels)
-    working_pixels[-top:-final_dark_pixel_rows, early_dark_pixel_columns:-late_dark_pixel_columns] = estimated_smear
-    working_pixels[0:-top, early_dark_pixel_columns:-late_dark_pixel_columns] += estimated_smear
+    working_pixels = image_slice.pixels if in_place else numpy.copy(image_slice.pixels)
+    working_pixels[..., -top:-final_dark_pixel_rows, early_dark_pixel_columns:-late_dark_pixel_columns] = \
+        estimated_smear
+    working_pixels[..., 0:-top, early_dark_pixel_columns:-late_dark_pixel_columns] += estimated_smear
     # noinspection PyProtectedMember
     return image_slice._replace(pixels=working_pixels)
 
 
-def add_shot_noise_to_slice(image_slice):
-    # type: (Slice) -> Slice
+def add_shot_noise_to_slice(image_slice, in_place=False, seed_sequence=None):
+    # type: (Slice, bool, numpy.random.SeedSequence) -> Slice
     """
     This transformation adds `shot noise <https://en.wikipedia.org/wiki/Shot_noise>`_ to every pixel.
 
@@ -163,17 +230,43 @@ def add_shot_noise_to_slice(image_slice):
     :param image_slice: An image slice which has electrons as its units.  Pixel data should be the *expected* electron \
     counts for each pixel.
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :param seed_sequence: The seed of the random numbers drawn for this slice, see \
+    :py:func:`~httm.transformations.common.slice_seed_sequences`; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(add_shot_noise_to_rows, seed_sequence=seed_sequence),),
+                                in_place=in_place)
+
+
+def add_shot_noise_to_rows(image_slice, seed_sequence=None):
+    # type: (Slice, numpy.random.SeedSequence) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_shot_noise_to_slice`.
+    Its blocks of rows must be transformed in order.
+
+    :param image_slice: An image slice which has electrons as its units.
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param seed_sequence: The seed of the random numbers drawn for this slice; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    pixels = image_slice.pixels
-    # noinspection PyProtectedMember
-    return image_slice._replace(
-        pixels=pixels + numpy.sqrt(pixels) * numpy.random.normal(loc=0, scale=1, size=pixels.shape))
+    shape = image_slice.pixels.shape
+    draw_standard_normals = standard_normal_drawer(frame_random_generators(seed_sequence, shape), shape)
+
+    def add_noise(values, block, out):
+        noise = draw_standard_normals(block)
+        noise *= numpy.sqrt(values)
+        return numpy.add(values, noise, out=out)
 
+    return RowTransformation(units="electrons", transform_rows=add_noise)
 
-def simulate_blooming_on_slice(full_well, blooming_threshold, number_of_exposures, image_slice):
-    # type: (float, float, int, Slice) -> Slice
+
+def simulate_blooming_on_slice(full_well, blooming_threshold, number_of_exposures, image_slice, in_place=False):
+    # type: (float, float, int, Slice, bool) -> Slice
     """
     This function simulates `blooming <http://hamamatsu.magnet.fsu.edu/articles/ccdsatandblooming.html>`_ along columns
     in the image pixel array.
@@ -202,6 +295,11 @@ def simulate_blooming_on_slice(full_well, blooming_threshold, number_of_exposure
     The single step is repeated until all pixels are below
     :math:`\\mathtt{number\_of\_exposures} \\times \\mathtt{full\_well}`.
 
+    Each column blooms independently, so the diffusion process is run on all of the columns together, and only those
+    columns still above the full well are stepped again. Pixels far from any pixel above the blooming threshold, or
+    negative, are unchanged by a diffusion step, so each column is only stepped over windows of rows around the
+    segments of rows holding excess charge, and columns with none are skipped.
+
     This transformation does not have an inverse.
 
     :param full_well: The maximum number of electrons in a pixel.
@@ -212,31 +310,168 @@ def simulate_blooming_on_slice(full_well, blooming_threshold, number_of_exposure
     :type number_of_exposures: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
     assert image_slice.units == "electrons", "units must be electrons"
-    convolutional_kernel = numpy.array([0.3, 0.4, 0.3])
-
-    def diffusion_step(column):
-        diffusion_proof_part = numpy.clip(column, 0, number_of_exposures * blooming_threshold)
-        excess = column - diffusion_proof_part
-        # implicitly lose charge from top and bottom
-        diffused_excess = numpy.convolve(excess, convolutional_kernel, mode='same')
+    exposure_blooming_threshold = number_of_exposures * blooming_threshold
+    exposure_full_well = number_of_exposures * full_well
+
+    def diffusion_step(columns):
+        # columns are along the last axis
+        diffusion_proof_part = numpy.clip(columns, 0, exposure_blooming_threshold)
+        excess = columns - diffusion_proof_part
+        # convolve with the kernel <0.3, 0.4, 0.3>, implicitly losing charge from top and bottom
+        diffused_excess = 0.4 * excess
+        diffused_excess[..., 1:] += 0.3 * excess[..., :-1]
+        diffused_excess[..., :-1] += 0.3 * excess[..., 1:]
         return diffusion_proof_part + diffused_excess
 
-    def bloom_column(column):
-        column = diffusion_step(column)
-        while numpy.amax(column) > number_of_exposures * full_well:
-            column = diffusion_step(column)
-        return column
+    def excess_segments(columns, column_indices):
+        # The column, first row and one past the last row of each segment of rows holding excess charge in the
+        # indexed columns, joining segments closer than two margins, so that their windows do not overlap
+        excess = (columns[column_indices] > exposure_blooming_threshold) | (columns[column_indices] < 0)
+        edges = numpy.diff(numpy.pad(excess, ((0, 0), (1, 1)), 'constant').astype(numpy.int8), axis=-1)
+        segment_columns, tops = numpy.nonzero(edges == 1)
+        bottoms = numpy.nonzero(edges == -1)[1]
+        first = numpy.ones(len(tops), dtype=bool)
+        first[1:] = (segment_columns[1:] != segment_columns[:-1]) | (tops[1:] - bottoms[:-1] >= 2 * BLOOMING_MARGIN)
+        last = numpy.roll(first, -1)
+        return column_indices[segment_columns[first]], tops[first], bottoms[last]
+
+    def bloom_columns(columns):
+        # Blooms the columns, along the last axis, in place. Only pixels with excess charge and their neighbours
+        # change in a diffusion step, and excess charge spreads by at most one row per step, so each segment of
+        # rows holding excess charge is stepped over a window of rows around it, and the windows of all of the
+        # segments are stepped together as the rows of a single array. Windows narrower than the array are padded
+        # on the side away from the end of the column with zeros, which hold no excess charge, so stay zero. The
+        # segments are found again once excess charge might reach an edge of a window that is not an end of the
+        # column, past which it would be lost, and those left with no excess charge, which a step leaves
+        # unchanged, are dropped
+        row_count = columns.shape[-1]
+
+        def keep_segments(kept):
+            # Writes the windows of the segments that are not kept back to the columns
+            dropped = in_window & ~kept[:, numpy.newaxis]
+            columns[numpy.broadcast_to(owners[:, numpy.newaxis], dropped.shape)[dropped], window_rows[dropped]] = \
+                windows[dropped]
+            return owners[kept], starts[kept], ends[kept], window_rows[kept], in_window[kept], windows[kept]
+
+        unsettled_columns = numpy.arange(len(columns))
+        while len(unsettled_columns) > 0:
+            owners, tops, bottoms = excess_segments(columns, unsettled_columns)
+            starts = numpy.maximum(tops - BLOOMING_MARGIN, 0)
+            ends = numpy.minimum(bottoms + BLOOMING_MARGIN, row_count)
+            width = int(numpy.amax(ends - starts))
+            offsets = numpy.where(ends == row_count, width - (ends - starts), 0)
+            window_rows = (starts - offsets)[:, numpy.newaxis] + numpy.arange(width)
+            in_window = (window_rows >= starts[:, numpy.newaxis]) & (window_rows < ends[:, numpy.newaxis])
+            window_rows = numpy.clip(window_rows, 0, row_count - 1)
+            windows = numpy.where(in_window, columns[owners[:, numpy.newaxis], window_rows], 0)
+
+            while len(owners) > 0:
+                # The number of steps before excess charge could reach an edge of a window
+                steps = numpy.amin(numpy.minimum(numpy.where(starts > 0, tops - starts, numpy.inf),
+                                                 numpy.where(ends < row_count, ends - bottoms, numpy.inf)))
+                if steps < BLOOMING_MARGIN // 2:
+                    break
+                while steps > 0 and len(owners) > 0:
+                    windows = diffusion_step(windows)
+                    steps -= 1
+                    unsettled = numpy.zeros(len(columns), dtype=bool)
+                    unsettled[owners[numpy.amax(windows, axis=-1) > exposure_full_well]] = True
+                    if not numpy.all(unsettled[owners]):
+                        owners, starts, ends, window_rows, in_window, windows = keep_segments(unsettled[owners])
+                excess = (windows > exposure_blooming_threshold) | (windows < 0)
+                owners, starts, ends, window_rows, in_window, windows = keep_segments(numpy.any(excess, axis=-1))
+                excess = excess[numpy.any(excess, axis=-1)]
+                tops = window_rows[numpy.arange(len(owners)), numpy.argmax(excess, axis=-1)]
+                bottoms = window_rows[numpy.arange(len(owners)), width - 1 - numpy.argmax(excess[:, ::-1], axis=-1)] + 1
+            keep_segments(numpy.zeros(len(owners), dtype=bool))
+            unsettled_columns = numpy.unique(owners)
+
+    pixels = image_slice.pixels
+    bloomed_pixels = output_pixels(pixels, in_place)
+    if not in_place:
+        bloomed_pixels[...] = pixels
+    # noinspection PyTypeChecker
+    active = (numpy.amax(bloomed_pixels, axis=-2) > exposure_blooming_threshold) | \
+             (numpy.amin(bloomed_pixels, axis=-2) < 0)
+    if numpy.any(active):
+        transposed_pixels = numpy.swapaxes(bloomed_pixels, -2, -1)
+        active_columns = transposed_pixels[active]
+        bloom_columns(active_columns)
+        transposed_pixels[active] = active_columns
+    # noinspection PyProtectedMember
+    return image_slice._replace(pixels=bloomed_pixels)
+
+
+def simulate_charge_spill_blooming_on_slice(full_well, blooming_threshold, number_of_exposures, image_slice,
+                                            in_place=False):
+    # type: (float, float, int, Slice, bool) -> Slice
+    """
+    This function simulates `blooming <http://hamamatsu.magnet.fsu.edu/articles/ccdsatandblooming.html>`_ along columns
+    in the image pixel array by spilling charge, as a bounded cost alternative to the diffusion process in
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_blooming_on_slice`.
+
+    Each pixel holding more than :math:`\\mathtt{number\_of\_exposures} \\times \\mathtt{full\_well}` electrons
+    keeps that many, and its excess charge spills half up and half down its column. Spilled charge passes over
+    full pixels and fills the first pixels with room for it, up to the full well. Charge spilling past the top or the
+    bottom of a column is lost.
+
+    Unlike the diffusion process, the cost does not depend on how much charge is in excess: each spill is a
+    running sum and a running minimum along the columns, so it takes a fixed number of passes over the slice.
+    Columns without any pixel above the full well are unchanged, so they are skipped.
+
+    The ``blooming_threshold`` is not used by this model, it is accepted so that both models take the same parameters.
+
+    This transformation does not have an inverse.
+
+    :param full_well: The maximum number of electrons in a pixel.
+    :type full_well: float
+    :param blooming_threshold: The number of electrons in the pixel that suffices to drive significant diffusion.
+    :type blooming_threshold: float
+    :param number_of_exposures: The number of stacked images in the slice
+    :type number_of_exposures: int
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    assert image_slice.units == "electrons", "units must be electrons"
+    exposure_full_well = number_of_exposures * full_well
+
+    def spill_down(held_charge, spilled_charge):
+        # Columns are along the last axis. The charge carried out of each pixel is c[k] = max(c[k - 1] + d[k], 0),
+        # with d[k] = held_charge[k] + spilled_charge[k] - full well, which is the running sum of d minus its
+        # running minimum, clipped at zero
+        carried_charge = numpy.cumsum(held_charge + spilled_charge - exposure_full_well, axis=-1, dtype=numpy.float64)
+        carried_charge -= numpy.minimum(numpy.minimum.accumulate(carried_charge, axis=-1), 0)
+        filled_pixels = held_charge + spilled_charge - carried_charge
+        filled_pixels[..., 1:] += carried_charge[..., :-1]
+        return filled_pixels
 
-    working_pixels = numpy.copy(image_slice.pixels)
-    bloomed_pixels = numpy.apply_along_axis(bloom_column, 0, working_pixels)
+    pixels = image_slice.pixels
+    bloomed_pixels = output_pixels(pixels, in_place)
+    if not in_place:
+        bloomed_pixels[...] = pixels
+    # Columns without any pixel above the full well do not spill
+    active = numpy.amax(bloomed_pixels, axis=-2) > exposure_full_well
+    if numpy.any(active):
+        transposed_pixels = numpy.swapaxes(bloomed_pixels, -2, -1)
+        columns = transposed_pixels[active]
+        excess = numpy.maximum(columns - exposure_full_well, 0)
+        half_excess = 0.5 * excess
+        spilled_down = spill_down(columns - excess, half_excess)
+        transposed_pixels[active] = spill_down(spilled_down[..., ::-1], half_excess[..., ::-1])[..., ::-1]
     # noinspection PyProtectedMember
     return image_slice._replace(pixels=bloomed_pixels)
 
 
-def add_readout_noise_to_slice(readout_noise_parameter, number_of_exposures, image_slice):
+def add_readout_noise_to_slice(readout_noise_parameter, number_of_exposures, image_slice, in_place=False,
+                               seed_sequence=None):
     """
     This transformation a Gaussian random *readout* noise to every pixel.
 
@@ -253,20 +488,116 @@ def add_readout_noise_to_slice(readout_noise_parameter, number_of_exposures, ima
     :type number_of_exposures: int
     :param image_slice: input slice
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :param seed_sequence: The seed of the random numbers drawn for this slice, see \
+    :py:func:`~httm.transformations.common.slice_seed_sequences`; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(add_readout_noise_to_rows, readout_noise_parameter,
+                                                      number_of_exposures, seed_sequence=seed_sequence),),
+                                in_place=in_place)
+
+
+def add_readout_noise_to_rows(readout_noise_parameter, number_of_exposures, image_slice, seed_sequence=None):
+    # type: (float, int, Slice, numpy.random.SeedSequence) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_readout_noise_to_slice`.
+    Its blocks of rows must be transformed in order.
+
+    :param readout_noise_parameter: noise standard deviation for one image
+    :type readout_noise_parameter: float
+    :param number_of_exposures: number of stacked images in the slice
+    :type number_of_exposures: int
+    :param image_slice: input slice
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param seed_sequence: The seed of the random numbers drawn for this slice; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
     assert number_of_exposures > 0, "number of exposures must be positive"
-    assert readout_noise_parameter >= 0, "readout noise parameter must be non-negative"
-    if readout_noise_parameter <= 0.0:
-        return image_slice
-    # noinspection PyProtectedMember
-    return image_slice._replace(
-        pixels=numpy.random.normal(loc=image_slice.pixels,
-                                   scale=readout_noise_parameter * numpy.sqrt(number_of_exposures)))
+    assert numpy.all(readout_noise_parameter >= 0), "readout noise parameter must be non-negative"
+    if numpy.all(readout_noise_parameter <= 0.0):
+        return RowTransformation(units="electrons", transform_rows=None)
+    scale = readout_noise_parameter * numpy.sqrt(number_of_exposures)
+    shape = image_slice.pixels.shape
+    draw_standard_normals = standard_normal_drawer(frame_random_generators(seed_sequence, shape), shape)
+
+    def add_noise(values, block, out):
+        noise = draw_standard_normals(block)
+        noise *= block_values(scale, block)
+        return numpy.add(values, noise, out=out)
+
+    return RowTransformation(units="electrons", transform_rows=add_noise)
+
+
+def add_shot_and_readout_noise_to_slice(readout_noise_parameter, number_of_exposures, image_slice, in_place=False,
+                                        seed_sequence=None):
+    """
+    This transformation adds both *shot noise* and *readout noise* to every pixel, with a single Gaussian draw.
+
+    Shot noise and readout noise are independent zero mean Gaussian errors, so their sum is a zero mean Gaussian
+    error whose variance :math:`\\sigma^2` is the sum of their variances,
+    :math:`n + \\mathtt{readout\_noise\_parameter}^2 \\times \\mathtt{number\_of\_exposures}`, where :math:`n` is
+    the expected electron count in the pixel. It is the same in distribution as
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_shot_noise_to_slice` followed by
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_readout_noise_to_slice`,
+    while drawing half as many random numbers.
+
+    :param readout_noise_parameter: readout noise standard deviation for one image
+    :type readout_noise_parameter: float
+    :param number_of_exposures: number of stacked images in the slice
+    :type number_of_exposures: int
+    :param image_slice: An image slice which has electrons as its units.  Pixel data should be the *expected* electron \
+    counts for each pixel.
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :param seed_sequence: The seed of the random numbers drawn for this slice, see \
+    :py:func:`~httm.transformations.common.slice_seed_sequences`; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    return transform_slice_rows(image_slice, (partial(add_shot_and_readout_noise_to_rows, readout_noise_parameter,
+                                                      number_of_exposures, seed_sequence=seed_sequence),),
+                                in_place=in_place)
 
 
-def simulate_undershoot_on_slice(undershoot_parameter, image_slice):
+def add_shot_and_readout_noise_to_rows(readout_noise_parameter, number_of_exposures, image_slice, seed_sequence=None):
+    # type: (float, int, Slice, numpy.random.SeedSequence) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_shot_and_readout_noise_to_slice`.
+    Its blocks of rows must be transformed in order.
+
+    :param readout_noise_parameter: readout noise standard deviation for one image
+    :type readout_noise_parameter: float
+    :param number_of_exposures: number of stacked images in the slice
+    :type number_of_exposures: int
+    :param image_slice: An image slice which has electrons as its units.
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param seed_sequence: The seed of the random numbers drawn for this slice; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
+    assert image_slice.units == "electrons", "units must be electrons"
+    assert number_of_exposures > 0, "number of exposures must be positive"
+    assert numpy.all(readout_noise_parameter >= 0), "readout noise parameter must be non-negative"
+    readout_variance = numpy.square(readout_noise_parameter) * number_of_exposures
+    shape = image_slice.pixels.shape
+    draw_standard_normals = standard_normal_drawer(frame_random_generators(seed_sequence, shape), shape)
+
+    def add_noise(values, block, out):
+        noise = draw_standard_normals(block)
+        noise *= numpy.sqrt(values + block_values(readout_variance, block))
+        return numpy.add(values, noise, out=out)
+
+    return RowTransformation(units="electrons", transform_rows=add_noise)
+
+
+def simulate_undershoot_on_slice(undershoot_parameter, image_slice, in_place=False):
     """
     When a CCD reads out a bright pixel, the pixel to the right of it appears artificially dimmer.
 
@@ -286,24 +617,49 @@ def simulate_undershoot_on_slice(undershoot_parameter, image_slice):
     :type undershoot_parameter: float
     :param image_slice: input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(simulate_undershoot_on_rows, undershoot_parameter),),
+                                in_place=in_place)
+
+
+def simulate_undershoot_on_rows(undershoot_parameter, image_slice):
+    # type: (float, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_undershoot_on_slice`.
+
+    :param undershoot_parameter: Typically `~0.001`, dimensionless
+    :type undershoot_parameter: float
+    :param image_slice: input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    convolutional_kernel = numpy.array([1.0, -undershoot_parameter])
 
-    def convolve_row(row):
-        return numpy.convolve(row, convolutional_kernel, mode='same')
+    def convolve_rows(values, window, out):
+        assert window[-1] == slice(None), "Undershoot is simulated on whole rows"
+        # Each pixel loses the previous pixel in its row times the undershoot parameter;
+        # the first pixel in each row has no predecessor
+        shifted_pixels = -undershoot_parameter * values[..., :-1]
+        if out is None:
+            out = numpy.empty(values.shape, dtype=numpy.result_type(values, 1.0))
+        out[..., :1] = values[..., :1]
+        numpy.add(values[..., 1:], shifted_pixels, out=out[..., 1:])
+        return out
 
-    # noinspection PyProtectedMember
-    return image_slice._replace(
-        pixels=numpy.apply_along_axis(convolve_row, 1, image_slice.pixels))
+    return RowTransformation(units="electrons", transform_rows=convolve_rows)
 
 
 def add_baseline_to_slice(single_frame_baseline_adu,
                           single_frame_baseline_adu_drift_term,
                           number_of_exposures,
                           video_scale,
-                          image_slice):
+                          image_slice,
+                          in_place=False,
+                          seed_sequence=None):
     """
     This transformation adds a scalar random variate, the *baseline electron count*, to every pixel.
 
@@ -334,21 +690,63 @@ def add_baseline_to_slice(single_frame_baseline_adu,
     :type video_scale: float
     :param image_slice: input slice
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :param seed_sequence: The seed of the random numbers drawn for this slice, see \
+    :py:func:`~httm.transformations.common.slice_seed_sequences`; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(add_baseline_to_rows, single_frame_baseline_adu,
+                                                      single_frame_baseline_adu_drift_term, number_of_exposures,
+                                                      video_scale, seed_sequence=seed_sequence),),
+                                in_place=in_place)
+
+
+def add_baseline_to_rows(single_frame_baseline_adu,
+                         single_frame_baseline_adu_drift_term,
+                         number_of_exposures,
+                         video_scale,
+                         image_slice,
+                         seed_sequence=None):
+    """
+    The row transformation of :py:func:`~httm.transformations.electron_flux_slices_to_raw.add_baseline_to_slice`.
+
+    :param single_frame_baseline_adu: The expected video bias in ADU for a single frame exposure.
+    :type single_frame_baseline_adu: float
+    :param single_frame_baseline_adu_drift_term: A standard deviation in ADU of the baseline electron count random \
+    variate.
+    :type single_frame_baseline_adu_drift_term: float
+    :param number_of_exposures: Number of stacked images in the slice
+    :type number_of_exposures: int
+    :param video_scale: Constant for converting electron counts to \
+    *Analogue to Digital Converter Units* (ADU). Units: electrons per ADU
+    :type video_scale: float
+    :param image_slice: input slice
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param seed_sequence: The seed of the random numbers drawn for this slice; if ``None``, fresh entropy is drawn
+    :type seed_sequence: :py:class:`numpy.random.SeedSequence`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
     assert number_of_exposures > 0, "number of exposures must be positive"
     assert single_frame_baseline_adu_drift_term >= 0, "readout noise parameter must be non-negative"
     baseline_electrons = single_frame_baseline_adu * number_of_exposures * video_scale
+    pixels = image_slice.pixels
     if single_frame_baseline_adu_drift_term <= 0.0:
         local_baseline_electron_estimate = baseline_electrons  # type: float
     else:
+        # Stacked slices and cubes of frames draw a separate baseline for each slice and frame
+        generators = frame_random_generators(seed_sequence, pixels.shape)
+        standard_normals = numpy.array([generator.standard_normal() for generator in generators.flat])
         local_baseline_electron_estimate = \
-            numpy.random.normal(loc=baseline_electrons,
-                                scale=single_frame_baseline_adu_drift_term * video_scale)  # type: float
+            baseline_electrons + single_frame_baseline_adu_drift_term * video_scale * \
+            standard_normals.reshape(pixels.shape[:-2] + (1, 1))  # type: numpy.ndarray
 
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=image_slice.pixels + local_baseline_electron_estimate)
+    def add_baseline(values, window, out):
+        return numpy.add(values, block_pixel_values(local_baseline_electron_estimate, window), out=out)
+
+    return RowTransformation(units="electrons", transform_rows=add_baseline)
 
 
 # noinspection PyUnresolvedReferences
@@ -356,8 +754,9 @@ def convert_slice_electrons_to_adu(gain_loss,
                                    number_of_exposures,
                                    video_scale,
                                    clip_level_adu,
-                                   image_slice):
-    # type: (float, int, float, float, int, Slice) -> Slice
+                                   image_slice,
+                                   in_place=False):
+    # type: (float, int, float, int, Slice, bool) -> Slice
     """
     This functions simulate various nonlinear effects in the measurement of electrons, before finally yielding output
     in *Analogue To Digital Converter Units* (ADU).
@@ -404,21 +803,45 @@ def convert_slice_electrons_to_adu(gain_loss,
     :type clip_level_adu: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(convert_rows_electrons_to_adu, gain_loss, number_of_exposures,
+                                                      video_scale, clip_level_adu),),
+                                in_place=in_place)
 
+
+def convert_rows_electrons_to_adu(gain_loss, number_of_exposures, video_scale, clip_level_adu, image_slice):
+    # type: (float, int, float, int, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.convert_slice_electrons_to_adu`.
+
+    :param gain_loss: The relative decrease in video gain over the total ADC range
+    :type gain_loss: float
+    :param number_of_exposures: The number of exposures the image comprises.
+    :type number_of_exposures: int
+    :param video_scale: Constant for converting electron counts to \
+    *Analogue to Digital Converter Units* (ADU). Units: electrons per ADU
+    :type video_scale: float
+    :param clip_level_adu: Maximum analog to digital converter output. Units: ADU
+    :type clip_level_adu: int
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
     gain_loss_per_adu = gain_loss / (number_of_exposures * FPE_MAX_ADU)  # type: float
     gain_loss_per_electron = gain_loss_per_adu / video_scale  # type: float
     exposure_clip_level = clip_level_adu * number_of_exposures  # type: float
 
-    def transform_electron_to_adu(electron):
-        from numpy import clip
+    def convert_electrons(electrons, window, adu):
+        denominator = numpy.multiply(block_values(gain_loss_per_electron, window), electrons)
+        numpy.add(1.0, denominator, out=denominator)
+        numpy.multiply(block_values(video_scale, window), denominator, out=denominator)
+        adu = numpy.divide(electrons, denominator, out=adu)
         # noinspection PyTypeChecker
-        return clip(
-            electron / (video_scale * (1.0 + gain_loss_per_electron * electron)),
-            0, exposure_clip_level)
+        return numpy.clip(adu, 0, exposure_clip_level, out=adu)
 
-    return Slice(index=image_slice.index,
-                 units='ADU',
-                 pixels=transform_electron_to_adu(image_slice.pixels))
+    return RowTransformation(units="ADU", transform_rows=convert_electrons)
@@ -25,62 +25,108 @@ This module contains metadata related to transformation functions.
     electron counts to simulated raw images in *Analogue to Digital Converter Units* (ADU).
   - ``raw_transformations`` is metadata describing transformation functions from raw images in
     *Analogue to Digital Converter Units* (ADU) to calibrated images in electron counts.
+
+Each transformation has a ``default`` setting, its ``documentation``, its converter ``function`` and the names of the
+converter ``parameters`` its result depends on, see :py:mod:`~httm.transformations.caching`. A transformation
+that acts on each row on its own also has a ``rows`` function returning its
+:py:class:`~httm.transformations.common.RowStage`, and may have a ``skip`` function telling whether it would leave the
+pixels of a converter unchanged, and a ``whole_frame_estimate`` setting, see :py:mod:`~httm.transformations.plans`.
 """
 
 from collections import OrderedDict
 
 from .raw_converters_to_calibrated import remove_pattern_noise, convert_adu_to_electrons, remove_baseline, \
-    remove_start_of_line_ringing, remove_undershoot, remove_smear
+    remove_start_of_line_ringing, remove_undershoot, remove_smear, remove_pattern_noise_row_stage, \
+    convert_adu_to_electrons_row_stage, remove_baseline_row_stage, remove_start_of_line_ringing_row_stage, \
+    remove_undershoot_row_stage, remove_smear_row_stage
 from .electron_flux_converters_to_raw import introduce_smear_rows, add_shot_noise, simulate_blooming, \
-    add_readout_noise, simulate_undershoot, simulate_start_of_line_ringing, add_baseline, convert_electrons_to_adu, \
-    add_pattern_noise
+    add_readout_noise, add_shot_and_readout_noise, simulate_undershoot, simulate_start_of_line_ringing, add_baseline, \
+    convert_electrons_to_adu, add_pattern_noise, add_shot_noise_row_stage, add_readout_noise_row_stage, \
+    add_shot_and_readout_noise_row_stage, simulate_undershoot_row_stage, simulate_start_of_line_ringing_row_stage, \
+    add_baseline_row_stage, convert_electrons_to_adu_row_stage, add_pattern_noise_row_stage
+from .plans import undershoot_is_zero, pattern_noise_is_zero, readout_noise_is_zero, start_of_line_ringing_is_zero, \
+    baseline_is_zero
 
 electron_flux_transformations = OrderedDict([
     ('introduce_smear_rows', {
         'default': True,
         'documentation': 'Introduce *smear rows* to each slice of the image.',
         'function': introduce_smear_rows,
+        'parameters': ('smear_ratio', 'smear_rows', 'final_dark_pixel_rows', 'early_dark_pixel_columns',
+                       'late_dark_pixel_columns',),
     }),
     ('add_shot_noise', {
         'default': True,
         'documentation': 'Add *shot noise* to each pixel in each slice of the image.',
         'function': add_shot_noise,
+        'parameters': ('random_seed', 'camera_number', 'ccd_number',),
+        'rows': add_shot_noise_row_stage,
     }),
     ('simulate_blooming', {
         'default': True,
         'documentation': 'Simulate *blooming* on for each column for each slice of the image.',
         'function': simulate_blooming,
+        'parameters': ('full_well', 'blooming_threshold', 'number_of_exposures', 'blooming_model',),
     }),
     ('add_readout_noise', {
         'default': True,
         'documentation': 'Add *readout noise* to each pixel in each slice of the image.',
         'function': add_readout_noise,
+        'parameters': ('readout_noise_parameters', 'number_of_exposures', 'random_seed', 'camera_number',
+                       'ccd_number',),
+        'rows': add_readout_noise_row_stage,
+        'skip': readout_noise_is_zero,
+    }),
+    ('add_shot_and_readout_noise', {
+        'default': False,
+        'documentation': 'Add *shot noise* and *readout noise* to each pixel in each slice of the image with a single '
+                         'random draw, after blooming, in place of the separate shot noise and readout noise '
+                         'transformations.',
+        'function': add_shot_and_readout_noise,
+        'parameters': ('readout_noise_parameters', 'number_of_exposures', 'random_seed', 'camera_number',
+                       'ccd_number',),
+        'rows': add_shot_and_readout_noise_row_stage,
     }),
     ('simulate_undershoot', {
         'default': True,
         'documentation': 'Simulate *undershoot* on each row of each slice in the image.',
         'function': simulate_undershoot,
+        'parameters': ('undershoot_parameter',),
+        'rows': simulate_undershoot_row_stage,
+        'skip': undershoot_is_zero,
     }),
     ('simulate_start_of_line_ringing', {
         'default': True,
         'documentation': 'Simulate *start of line ringing* on each row of each slice in the image.',
         'function': simulate_start_of_line_ringing,
+        'parameters': ('start_of_line_ringing',),
+        'rows': simulate_start_of_line_ringing_row_stage,
+        'skip': start_of_line_ringing_is_zero,
     }),
     ('add_baseline', {
         'default': True,
         'documentation': 'Add a *baseline electron count* to each slice in the image.',
         'function': add_baseline,
+        'parameters': ('single_frame_baseline_adus', 'single_frame_baseline_adu_drift_term', 'number_of_exposures',
+                       'video_scales', 'random_seed', 'camera_number', 'ccd_number',),
+        'rows': add_baseline_row_stage,
+        'skip': baseline_is_zero,
     }),
     ('convert_electrons_to_adu', {
         'default': True,
         'documentation': 'Convert the image from having pixel units in electron counts to '
                          '*Analogue to Digital Converter Units* (ADU).',
         'function': convert_electrons_to_adu,
+        'parameters': ('gain_loss', 'number_of_exposures', 'video_scales', 'clip_level_adu',),
+        'rows': convert_electrons_to_adu_row_stage,
     }),
     ('add_pattern_noise', {
         'default': True,
         'documentation': 'Add a fixed *pattern noise* to each slice in the image.',
         'function': add_pattern_noise,
+        'parameters': ('pattern_noise',),
+        'rows': add_pattern_noise_row_stage,
+        'skip': pattern_noise_is_zero,
     }),
 ])
 
@@ -89,6 +135,9 @@ raw_transformations = OrderedDict([
         'default': True,
         'documentation': 'Compensate for a fixed *pattern noise* on each slice of the image.',
         'function': remove_pattern_noise,
+        'parameters': ('pattern_noise',),
+        'rows': remove_pattern_noise_row_stage,
+        'skip': pattern_noise_is_zero,
     }),
     ('convert_adu_to_electrons', {
         'default': True,
@@ -96,27 +145,39 @@ raw_transformations = OrderedDict([
                          '*Analogue to Digital Converter Units* (ADU) '
                          'to electron counts.',
         'function': convert_adu_to_electrons,
+        'parameters': ('gain_loss', 'number_of_exposures', 'video_scales',),
+        'rows': convert_adu_to_electrons_row_stage,
     }),
     ('remove_baseline', {
         'default': True,
         'documentation': 'Average the pixels in the dark columns and subtract '
                          'the result from each pixel in the image.',
         'function': remove_baseline,
+        'parameters': ('early_dark_pixel_columns', 'late_dark_pixel_columns',),
+        'rows': remove_baseline_row_stage,
     }),
     ('remove_start_of_line_ringing', {
         'default': True,
         'documentation': 'Compensate for *start of line ringing* on each row of each slice of the image.',
         'function': remove_start_of_line_ringing,
+        'parameters': ('final_dark_pixel_rows',),
+        'rows': remove_start_of_line_ringing_row_stage,
+        'whole_frame_estimate': True,
     }),
     ('remove_undershoot', {
         'default': True,
         'documentation': 'Compensate for *undershoot* for each row of each slice of the image.',
         'function': remove_undershoot,
+        'parameters': ('undershoot_parameter', 'undershoot_inverse',),
+        'rows': remove_undershoot_row_stage,
+        'skip': undershoot_is_zero,
     }),
     ('remove_smear', {
         'default': True,
         'documentation': 'Compensate for *smear* in the image by reading it from the '
                          '*smear rows* each slice and removing it from the rest of the slice.',
         'function': remove_smear,
+        'parameters': ('final_dark_pixel_rows', 'smear_rows', 'early_dark_pixel_columns', 'late_dark_pixel_columns',),
+        'rows': remove_smear_row_stage,
     }),
 ])
@@ -0,0 +1,274 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.transformations.plans``
+==============================
+
+Plans for running a sequence of converter transformations, such as those selected by
+:py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter`, with as few passes over the
+pixels as possible.
+
+A transformation whose metadata, see :py:mod:`~httm.transformations.metadata`, has a ``rows`` entry is described by
+a :py:class:`~httm.transformations.common.RowStage`, and acts on each row of a slice on its own once the parameters
+it estimates, such as the mean of the dark pixel columns or of the smear rows, are known. Neighbouring
+transformations of this kind are fused into a single pass over the pixels, a block of rows at a time, with the
+parameters each one needs estimated from the few rows or columns they are estimated from before the pass,
+see :py:func:`~httm.transformations.common.transform_slice_rows`. A transformation whose metadata has a true
+``whole_frame_estimate`` entry estimates its parameters from nearly every pixel, so it starts a new pass.
+
+Fusing can be turned off, so that each transformation runs in its own pass over the pixels and is recorded under
+its own name by a :py:class:`~httm.transformations.profiling.Profiler`; the results are identical.
+
+A transformation whose metadata has a ``skip`` entry is skipped if that function, passed the converter, returns
+``True``, as it would leave the pixels unchanged; only its flags are updated. The ``skip`` functions of this module
+depend only on the parameters of the converter.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from .common import map_slice_rows, copy_slices
+
+
+# noinspection PyUnresolvedReferences,PyClassHasNoInit
+class TransformationPlan(namedtuple('TransformationPlan', ['steps', 'skipped'])):
+    """
+    A plan for running a sequence of converter transformations, see
+    :py:func:`~httm.transformations.plans.transformation_plan`.
+
+    :param steps: The names of the transformations run in each pass over the pixels, in order, including any \
+    skipped transformations between them
+    :type steps: tuple of tuples of str
+    :param skipped: The names of the transformations that are skipped
+    :type skipped: tuple of str
+    """
+    __slots__ = ()
+
+    def run(self, converter, transformations, in_place=False, executor=None, profiler=None, cache=None):
+        """
+        Run the transformations of the plan over a converter.
+
+        Each step of more than one transformation that is not skipped is run as a single transformation named
+        after them, such as ``remove_pattern_noise+convert_adu_to_electrons+remove_baseline``, which is how a
+        ``profiler`` records it.
+
+        If a ``cache`` is given, the run resumes from the state after the latest step that is cached, and the state
+        after each step but the last is cached.
+
+        :param converter: The converter to transform
+        :type converter: :py:class:`object`
+        :param transformations: The metadata of the transformations, see :py:mod:`~httm.transformations.metadata`
+        :type transformations: dict
+        :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+        :type in_place: bool
+        :param executor: An optional thread or process pool used to transform the slices of each step
+        :type executor: object
+        :param profiler: An optional profiler recording each step and the transformation of each slice
+        :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+        :param cache: An optional cache of the states of the converter after each step
+        :type cache: :py:class:`~httm.transformations.caching.TransformationCache`
+        :rtype: :py:class:`object`
+        """
+        first_step = 0
+        if cache is not None:
+            step_keys = cache.step_keys(converter, self.steps, transformations)
+            first_step, converter = cache.resume(step_keys[:-1], converter)
+            if first_step > 0 and in_place:
+                # The cached pixels are memory mapped read only
+                # noinspection PyProtectedMember
+                converter = converter._replace(slices=copy_slices(converter.slices))
+        for step_index in range(first_step, len(self.steps)):
+            step = self.steps[step_index]
+            if len([name for name in step if name not in self.skipped]) > 1:
+                converter = run_transformation(fused_transformation(step, self.skipped, transformations), converter,
+                                               in_place, executor, profiler)
+            else:
+                for name in step:
+                    if name in self.skipped:
+                        # noinspection PyProtectedMember
+                        converter = converter._replace(flags=transformations[name]['rows'](converter).flags)
+                    else:
+                        converter = run_transformation(transformations[name]['function'], converter, in_place,
+                                                       executor, profiler)
+            if cache is not None and step_index < len(self.steps) - 1:
+                cache.store(step_keys[step_index], converter)
+        return converter
+
+
+def transformation_plan(converter, names, transformations, fuse=True):
+    """
+    Plan to run a sequence of converter transformations over a converter, fusing neighbouring transformations that
+    act on each row on their own into a single step and skipping those that would leave the pixels unchanged.
+
+    :param converter: The converter to be transformed
+    :type converter: :py:class:`object`
+    :param names: The names of the transformations to run, in order, such as those derived by \
+    :py:func:`~httm.transformations.common.derive_transformation_function_list`
+    :type names: tuple of str
+    :param transformations: The metadata of the transformations, see :py:mod:`~httm.transformations.metadata`
+    :type transformations: dict
+    :param fuse: Whether to fuse neighbouring transformations; if ``False``, each transformation that is not \
+    skipped is a step of its own
+    :type fuse: bool
+    :rtype: :py:class:`~httm.transformations.plans.TransformationPlan`
+    """
+    steps = []
+    skipped = ()
+    fusing = False
+    for name in names:
+        transformation = transformations[name]
+        if 'skip' in transformation and transformation['skip'](converter):
+            assert 'rows' in transformation, "Only transformations described by a row stage can be skipped"
+            skipped += (name,)
+            if steps:
+                steps[-1] += (name,)
+            else:
+                steps.append((name,))
+            continue
+        fusible = 'rows' in transformation
+        if fusible and fusing and not transformation.get('whole_frame_estimate', False):
+            steps[-1] += (name,)
+        else:
+            steps.append((name,))
+        fusing = fusible and fuse
+    return TransformationPlan(steps=tuple(steps), skipped=skipped)
+
+
+def fused_transformation(step, skipped, transformations):
+    """
+    Internal helper function returning a converter transformation that runs the row stages of a step in a single
+    pass over the pixels, see :py:func:`~httm.transformations.common.map_slice_rows`.
+
+    :param step: The names of the transformations in the step, in order
+    :type step: tuple of str
+    :param skipped: The names of the transformations that are skipped, which only update the flags
+    :type skipped: tuple of str
+    :param transformations: The metadata of the transformations
+    :type transformations: dict
+    :rtype: function
+    """
+
+    def transform_converter(converter, in_place=False, executor=None, profiler=None):
+        row_stages = ()
+        for name in step:
+            row_stage = transformations[name]['rows'](converter)
+            if name not in skipped:
+                row_stages += (row_stage,)
+            # noinspection PyProtectedMember
+            converter = converter._replace(flags=row_stage.flags)
+        # noinspection PyProtectedMember
+        return converter._replace(slices=map_slice_rows(row_stages, converter.slices, in_place=in_place,
+                                                        executor=executor, profiler=profiler))
+
+    transform_converter.__name__ = str('+'.join(name for name in step if name not in skipped))
+    return transform_converter
+
+
+def run_transformation(transformation_function, converter, in_place, executor, profiler):
+    """
+    Internal helper function that runs a converter transformation, recording it with ``profiler`` if one is given.
+
+    :param transformation_function: A converter transformation
+    :type transformation_function: function
+    :param converter: The converter to transform
+    :type converter: :py:class:`object`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices
+    :type executor: object
+    :param profiler: An optional profiler
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :rtype: :py:class:`object`
+    """
+    if profiler is None:
+        return transformation_function(converter, in_place=in_place, executor=executor)
+    return profiler.profile_transformation(transformation_function, converter, in_place=in_place, executor=executor)
+
+
+def undershoot_is_zero(converter):
+    """
+    Whether the undershoot parameter of a converter is zero, so that simulating or removing undershoot would leave
+    the pixels unchanged.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: bool
+    """
+    return not numpy.any(converter.parameters.undershoot_parameter)
+
+
+def pattern_noise_is_zero(converter):
+    """
+    Whether the pattern noise of each slice of a converter is zero, so that adding or removing it would leave the
+    pixels unchanged. Pattern noise given as a file object rather than a file name is not read ahead of the
+    transformation, and is taken not to be zero.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: bool
+    """
+    from .. import resource_utilities
+    if not isinstance(converter.parameters.pattern_noise, str):
+        return False
+    pattern_noises = resource_utilities.load_shared_resource(resource_utilities.load_pattern_noise,
+                                                             converter.parameters.pattern_noise)
+    return not any(numpy.any(pattern_noise) for pattern_noise in pattern_noises[:len(converter.slices)])
+
+
+def readout_noise_is_zero(converter):
+    """
+    Whether the readout noise parameter of each slice of a converter is zero, so that adding readout noise would
+    leave the pixels unchanged.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: bool
+    """
+    return not numpy.any(converter.parameters.readout_noise_parameters[:len(converter.slices)])
+
+
+def start_of_line_ringing_is_zero(converter):
+    """
+    Whether the start of line ringing pattern of each slice of a converter is zero, so that simulating it would
+    leave the pixels unchanged. A pattern given as a file object rather than a file name is not read ahead of the
+    transformation, and is taken not to be zero.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: bool
+    """
+    from .. import resource_utilities
+    if not isinstance(converter.parameters.start_of_line_ringing, str):
+        return False
+    start_of_line_ringing_patterns = resource_utilities.load_shared_resource(
+        resource_utilities.load_npz, converter.parameters.start_of_line_ringing)
+    return not numpy.any(start_of_line_ringing_patterns[:len(converter.slices)])
+
+
+def baseline_is_zero(converter):
+    """
+    Whether the baseline of each slice of a converter, and its drift, are zero, so that adding the baseline
+    would leave the pixels unchanged.
+
+    :param converter: A converter
+    :type converter: :py:class:`object`
+    :rtype: bool
+    """
+    return not numpy.any(converter.parameters.single_frame_baseline_adus[:len(converter.slices)]) and \
+        not converter.parameters.single_frame_baseline_adu_drift_term
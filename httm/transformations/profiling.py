@@ -0,0 +1,340 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.transformations.profiling``
+==================================
+
+Tools for recording the wall time, CPU time, peak allocated memory and resulting pixel shapes and data types of each
+transformation run over a converter, and of each of its slices.
+
+A :py:class:`~httm.transformations.profiling.Profiler` is passed as the ``profiler`` argument of
+:py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter` or
+:py:func:`~httm.transformations.electron_flux_converters_to_raw.transform_electron_flux_converter`.
+When no profiler is given nothing is measured.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import namedtuple, OrderedDict
+
+from astropy.io.fits import Header
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# noinspection PyUnresolvedReferences,PyClassHasNoInit
+class TransformationProfile(namedtuple('TransformationProfile',
+                                       ['transformation', 'slice_index', 'wall_seconds', 'cpu_seconds',
+                                        'allocated_bytes', 'shape', 'dtype'])):
+    """
+    The measurements of a transformation, or of a transformation of a single slice.
+
+    :param transformation: The name of the transformation, such as ``remove_smear``
+    :type transformation: str
+    :param slice_index: The index of the slice, a tuple of indices for stacked slices, \
+    or ``None`` for the whole transformation
+    :type slice_index: :py:class:`int`, :py:class:`tuple` or ``NoneType``
+    :param wall_seconds: The elapsed time
+    :type wall_seconds: float
+    :param cpu_seconds: The CPU time of the thread transforming the slice, \
+    or of the whole process for the whole transformation
+    :type cpu_seconds: float
+    :param allocated_bytes: The peak memory allocated while transforming, above the memory allocated before, \
+    if memory is being traced with :py:mod:`tracemalloc`, so that temporary arrays freed by the end are counted. \
+    Allocations of concurrently transformed slices are counted together.
+    :type allocated_bytes: :py:class:`int` or ``NoneType``
+    :param shape: The shape of the transformed pixels of the slice
+    :type shape: :py:class:`tuple` or ``NoneType``
+    :param dtype: The data type of the transformed pixels of the slice
+    :type dtype: :py:class:`str` or ``NoneType``
+    """
+    __slots__ = ()
+
+
+def process_cpu_time():
+    # type: () -> float
+    """
+    Internal helper function returning the CPU time of the process.
+
+    :rtype: float
+    """
+    return time.process_time() if hasattr(time, 'process_time') else time.clock()
+
+
+def thread_cpu_time():
+    # type: () -> float
+    """
+    Internal helper function returning the CPU time of the calling thread, or of the process where that is not
+    available.
+
+    :rtype: float
+    """
+    return time.thread_time() if hasattr(time, 'thread_time') else process_cpu_time()
+
+
+# The memory measurements in progress, each a list of the traced memory it is measured above and the highest traced
+# memory above that seen so far, which is kept up to date as other measurements reset the peak traced memory
+memory_measurements = []
+memory_measurements_lock = threading.Lock()
+
+
+def start_memory_measurement():
+    # type: () -> list
+    """
+    Internal helper function that starts measuring the peak memory allocated, by resetting the peak memory traced by
+    :py:mod:`tracemalloc`, see :py:func:`~httm.transformations.profiling.stop_memory_measurement`.
+
+    :return: The measurement, or ``None`` if memory is not being traced
+    :rtype: :py:class:`list` or ``NoneType``
+    """
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None
+    with memory_measurements_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        for measurement in memory_measurements:
+            measurement[1] = max(measurement[1], peak - measurement[0])
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        else:
+            # Before Python 3.9, the peak can only be reset by no longer tracing the memory allocated so far
+            tracemalloc.clear_traces()
+        reset = tracemalloc.get_traced_memory()[0]
+        for measurement in memory_measurements:
+            measurement[0] += reset - current
+        measurement = [reset, 0]
+        memory_measurements.append(measurement)
+    return measurement
+
+
+def stop_memory_measurement(measurement):
+    # type: (list) -> int
+    """
+    Internal helper function that stops measuring the peak memory allocated,
+    see :py:func:`~httm.transformations.profiling.start_memory_measurement`.
+
+    :param measurement: The measurement
+    :type measurement: :py:class:`list` or ``NoneType``
+    :return: The peak memory allocated since the measurement started, above the memory allocated before, \
+    or ``None`` if memory was not being traced
+    :rtype: :py:class:`int` or ``NoneType``
+    """
+    if measurement is None:
+        return None
+    with memory_measurements_lock:
+        memory_measurements[:] = [other for other in memory_measurements if other is not measurement]
+        if not tracemalloc.is_tracing():
+            return None
+        return max(measurement[1], tracemalloc.get_traced_memory()[1] - measurement[0])
+
+
+def measure_call(cpu_time, function, *arguments, **keyword_arguments):
+    """
+    Internal helper function that calls a function and measures the call.
+
+    It is defined at module level and returns its measurements, rather than recording them, so that it can run in the
+    workers of a process pool.
+
+    :param cpu_time: Returns the CPU time to measure, such as :py:func:`~httm.transformations.profiling.thread_cpu_time`
+    :type cpu_time: function
+    :param function: The function to call
+    :type function: function
+    :rtype: tuple of the result, the wall time, the CPU time and the peak allocated bytes
+    """
+    memory_measurement = start_memory_measurement()
+    cpu_start = cpu_time()
+    wall_start = time.time()
+    try:
+        result = function(*arguments, **keyword_arguments)
+    finally:
+        wall_seconds = time.time() - wall_start
+        cpu_seconds = cpu_time() - cpu_start
+        allocated_bytes = stop_memory_measurement(memory_measurement)
+    return result, wall_seconds, cpu_seconds, allocated_bytes
+
+
+class Profiler(object):
+    """
+    Records a :py:class:`~httm.transformations.profiling.TransformationProfile` for each transformation
+    run over a converter, and for each of its slices.
+
+    Each profile is appended to ``profiles``, and passed to each of the ``callbacks`` as it is recorded.
+    Memory is only measured while :py:mod:`tracemalloc` is tracing, see
+    :py:meth:`~httm.transformations.profiling.Profiler.trace_memory`.
+
+    :param callbacks: Functions called with each profile as it is recorded
+    :type callbacks: list of function
+    """
+
+    def __init__(self, callbacks=()):
+        self.profiles = []
+        self.callbacks = tuple(callbacks)
+        self.transformation = None
+        self.started_tracing = False
+        self.lock = threading.Lock()
+
+    def record(self, profile):
+        # type: (TransformationProfile) -> None
+        """
+        Record a profile, and pass it to each of the callbacks.
+
+        :param profile: The profile to record
+        :type profile: :py:class:`~httm.transformations.profiling.TransformationProfile`
+        :rtype: NoneType
+        """
+        with self.lock:
+            self.profiles.append(profile)
+        for callback in self.callbacks:
+            callback(profile)
+
+    def record_slice(self, image_slice, wall_seconds, cpu_seconds, allocated_bytes):
+        """
+        Record the measurements of a slice transformation of the current transformation.
+
+        :param image_slice: The transformed slice
+        :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+        :param wall_seconds: The elapsed time
+        :type wall_seconds: float
+        :param cpu_seconds: The CPU time
+        :type cpu_seconds: float
+        :param allocated_bytes: The peak memory allocated
+        :type allocated_bytes: :py:class:`int` or ``NoneType``
+        :return: The transformed slice
+        :rtype: :py:class:`~httm.data_structures.common.Slice`
+        """
+        self.record(TransformationProfile(transformation=self.transformation,
+                                          slice_index=image_slice.index,
+                                          wall_seconds=wall_seconds,
+                                          cpu_seconds=cpu_seconds,
+                                          allocated_bytes=allocated_bytes,
+                                          shape=image_slice.pixels.shape,
+                                          dtype=str(image_slice.pixels.dtype)))
+        return image_slice
+
+    def profile_transformation(self, transformation_function, converter, **keyword_arguments):
+        """
+        Run a transformation over a converter, recording the whole transformation and each of its slices.
+
+        :param transformation_function: A converter transformation, such as \
+        :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_smear`
+        :type transformation_function: function
+        :param converter: The converter to transform
+        :type converter: :py:class:`object`
+        :param keyword_arguments: Keyword arguments passed on to ``transformation_function``
+        :return: The transformed converter
+        :rtype: :py:class:`object`
+        """
+        self.transformation = transformation_function.__name__
+        transformed_converter, wall_seconds, cpu_seconds, allocated_bytes = measure_call(
+            process_cpu_time, transformation_function, converter, profiler=self, **keyword_arguments)
+        self.record(TransformationProfile(transformation=self.transformation,
+                                          slice_index=None,
+                                          wall_seconds=wall_seconds,
+                                          cpu_seconds=cpu_seconds,
+                                          allocated_bytes=allocated_bytes,
+                                          shape=None,
+                                          dtype=None))
+        return transformed_converter
+
+    def trace_memory(self, trace=True):
+        # type: (bool) -> None
+        """
+        Start tracing memory with :py:mod:`tracemalloc` if it is available and not already tracing,
+        or, if ``trace`` is ``False``, stop tracing if this profiler started it.
+
+        :param trace: Whether to start or stop tracing
+        :type trace: bool
+        :rtype: NoneType
+        """
+        if tracemalloc is None:
+            return
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        elif not trace and self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def to_json(self, **fields):
+        # type: (...) -> str
+        """
+        Serialize the profiles as a single line of JSON.
+
+        :param fields: Additional fields to record, such as the input and output file names
+        :rtype: str
+        """
+        return json.dumps(OrderedDict(sorted(fields.items()) +
+                                      [('profiles', [profile._asdict() for profile in self.profiles])]))
+
+    def write_json(self, json_file_name, **fields):
+        # type: (str, ...) -> None
+        """
+        Append the profiles as a line of JSON to a file, so that the profiles of many runs can be
+        collected in the same file.
+
+        :param json_file_name: The name of the file, or ``-`` for the standard output
+        :type json_file_name: str
+        :param fields: Additional fields to record, such as the input and output file names
+        :rtype: NoneType
+        """
+        line = self.to_json(**fields) + '\n'
+        if json_file_name == '-':
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            with open(json_file_name, 'a') as json_file:
+                json_file.write(line)
+
+    def header_with_profiles(self, fits_header):
+        # type: (Header) -> Header
+        """
+        Copy a FITS header, adding a ``HISTORY`` card for each profile.
+
+        :param fits_header: The header to copy
+        :type fits_header: :py:class:`astropy.io.fits.Header`
+        :rtype: :py:class:`astropy.io.fits.Header`
+        """
+        profiled_header = Header(fits_header, copy=True)
+        for profile in self.profiles:
+            profiled_header.add_history(
+                '{transformation}[{part}]: {wall:.4f} s, {cpu:.4f} s CPU{allocated}{pixels}'.format(
+                    transformation=profile.transformation,
+                    part='all' if profile.slice_index is None else str(profile.slice_index).replace(' ', ''),
+                    wall=profile.wall_seconds,
+                    cpu=profile.cpu_seconds,
+                    allocated='' if profile.allocated_bytes is None else ', {} B'.format(profile.allocated_bytes),
+                    pixels='' if profile.shape is None else ', {} {}'.format('x'.join(map(str, profile.shape)),
+                                                                             profile.dtype)))
+        return profiled_header
+
+    def converter_with_profiled_header(self, converter):
+        """
+        Copy a converter, adding a ``HISTORY`` card for each profile to the header it will be written out with,
+        see :py:meth:`~httm.transformations.profiling.Profiler.header_with_profiles`.
+
+        :param converter: The converter to copy
+        :type converter: :py:class:`object`
+        :rtype: :py:class:`object`
+        """
+        # noinspection PyProtectedMember
+        return converter._replace(conversion_metadata=converter.conversion_metadata._replace(
+            header=self.header_with_profiles(converter.conversion_metadata.header)))
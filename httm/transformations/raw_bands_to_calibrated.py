@@ -0,0 +1,281 @@
+# HTTM: A transformation library for RAW and Electron Flux TESS Images
+# Copyright (C) 2016, 2017 John Doty and Matthew Wampler-Doty of Noqsi Aerospace, Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+``httm.transformations.raw_bands_to_calibrated``
+================================================
+
+Transformation functions for calibrating a raw image a band of rows at a time, so that the memory used is set by
+the number of rows in a band rather than by the size of the image.
+
+*Baseline*, *start of line ringing* and *smear* are estimated from sums over rows spread across each slice,
+but every correction is local to a row. Calibration therefore takes two passes over the bands of an image:
+
+  - The first pass removes *pattern noise* from each band and converts it to electrons, as these transformations
+    act on each pixel on its own, and accumulates the column sums over all of the rows, over the rows start of
+    line ringing is estimated from, and over the smear rows.
+  - The transformations that follow act the same way on every row and are affine, so the mean of the transformed
+    rows is the transformed mean row. The estimates are therefore made by running these transformations over the
+    three mean rows of each slice, rather than over each of its rows.
+  - The second pass runs the transformations over each band, subtracting the estimates, and generates the
+    calibrated bands in order.
+
+The calibrated pixels agree with those of
+:py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter` up to rounding.
+"""
+from collections import OrderedDict
+from functools import partial
+
+import numpy
+
+from .common import derive_transformation_function_list, map_slices, copy_slices
+from .constants import ROW_BAND_SIZE
+from .raw_slices_to_calibrated import remove_pattern_noise_from_slice
+
+# Transformations which act on each pixel on its own, and so must run before any estimate is made
+pixel_transformations = ('remove_pattern_noise', 'convert_adu_to_electrons')
+
+
+def row_bands(number_of_rows, row_band_size=ROW_BAND_SIZE):
+    # type: (int, int) -> list
+    """
+    Partition the rows of an image into consecutive bands.
+
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param row_band_size: The number of rows in each band; the last band may have fewer
+    :type row_band_size: int
+    :rtype: list of :py:class:`slice` objects
+    """
+    assert row_band_size > 0, "There must be at least one row in a band"
+    return [slice(start, min(start + row_band_size, number_of_rows))
+            for start in range(0, number_of_rows, row_band_size)]
+
+
+def mean_row_ranges(parameters, number_of_rows):
+    # type: (SingleCCDRawConverterParameters, int) -> tuple
+    """
+    The rows of a slice averaged into each of its mean rows: all of the rows, the rows before the final dark
+    pixel rows, from which start of line ringing is estimated, and the smear rows.
+
+    :param parameters: The parameters of the image
+    :type parameters: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverterParameters`
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :rtype: tuple of ``(start, stop)`` pairs
+    """
+    final_dark_start = number_of_rows - parameters.final_dark_pixel_rows
+    return (0, number_of_rows), (0, final_dark_start), (final_dark_start - parameters.smear_rows, final_dark_start)
+
+
+def estimate_baseline(parameters, number_of_rows, mean_rows):
+    # type: (SingleCCDRawConverterParameters, int, numpy.ndarray) -> numpy.ndarray
+    """
+    Estimate *baseline* from the mean rows of a slice, as the mean of the dark pixels,
+    as :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_baseline_from_slice` does.
+
+    :param parameters: The parameters of the image
+    :type parameters: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverterParameters`
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param mean_rows: The mean rows of the slice, see :py:func:`mean_row_ranges`. Units: electrons
+    :type mean_rows: :py:class:`numpy.ndarray`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    dark_pixels = numpy.concatenate((mean_rows[0, :parameters.early_dark_pixel_columns],
+                                     mean_rows[0, -parameters.late_dark_pixel_columns:]))
+    return numpy.mean(dark_pixels).reshape((1, 1))
+
+
+def estimate_start_of_line_ringing(parameters, number_of_rows, mean_rows):
+    # type: (SingleCCDRawConverterParameters, int, numpy.ndarray) -> numpy.ndarray
+    """
+    Estimate *start of line ringing* from the mean rows of a slice, as
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_start_of_line_ringing_from_slice` does:
+    the sum of the rows before the final dark pixel rows, divided by the number of final dark pixel rows.
+
+    :param parameters: The parameters of the image
+    :type parameters: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverterParameters`
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param mean_rows: The mean rows of the slice, see :py:func:`mean_row_ranges`. Units: electrons
+    :type mean_rows: :py:class:`numpy.ndarray`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    final_dark_pixel_rows = parameters.final_dark_pixel_rows
+    return mean_rows[1:2] * (number_of_rows - final_dark_pixel_rows) / final_dark_pixel_rows
+
+
+def estimate_smear(parameters, number_of_rows, mean_rows):
+    # type: (SingleCCDRawConverterParameters, int, numpy.ndarray) -> numpy.ndarray
+    """
+    Estimate *smear* from the mean rows of a slice, as the mean of the smear rows,
+    as :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_smear_from_slice` does.
+
+    :param parameters: The parameters of the image
+    :type parameters: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverterParameters`
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param mean_rows: The mean rows of the slice, see :py:func:`mean_row_ranges`. Units: electrons
+    :type mean_rows: :py:class:`numpy.ndarray`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    # noinspection PyTypeChecker
+    assert numpy.any(mean_rows[2, parameters.early_dark_pixel_columns:-parameters.late_dark_pixel_columns] != 0), \
+        "Smear rows should not be zero"
+    return numpy.array(mean_rows[2:3])
+
+
+# The estimate made for each estimated transformation, and the flag the transformation clears
+estimated_transformations = OrderedDict([
+    ('remove_baseline', {
+        'estimate': estimate_baseline,
+        'flag': 'baseline_present',
+    }),
+    ('remove_start_of_line_ringing', {
+        'estimate': estimate_start_of_line_ringing,
+        'flag': 'start_of_line_ringing_present',
+    }),
+    ('remove_smear', {
+        'estimate': estimate_smear,
+        'flag': 'smear_rows_present',
+    }),
+])
+
+
+def transform_raw_band(raw_converter, rows, transformation_names, estimates, read_pattern_noise=None):
+    # type: (SingleCCDRawConverter, slice, tuple, dict, object) -> SingleCCDRawConverter
+    """
+    Run transformations in place over a :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    holding a band of rows of each slice.
+
+    Estimated transformations subtract their per-slice estimates, and pattern noise is removed using the same band
+    of rows of the pattern; the other transformations are run as they are on a whole image.
+
+    :param raw_converter: A converter whose slices hold the pixels of a band of rows. \
+    Its pixels must be writable floating point arrays
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param rows: The band of rows held
+    :type rows: slice
+    :param transformation_names: The names of the transformations to run, in order
+    :type transformation_names: tuple of str
+    :param estimates: Per-slice estimates for each estimated transformation that is run
+    :type estimates: dict
+    :param read_pattern_noise: A function taking a band of rows and returning the pattern noise of each slice \
+    over those rows, required if pattern noise is removed
+    :type read_pattern_noise: function
+    :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    """
+    from .metadata import raw_transformations
+    for name in transformation_names:
+        if name == 'remove_pattern_noise':
+            assert raw_converter.flags.pattern_noise_present, "Pattern noise must be flagged as present"
+            # noinspection PyProtectedMember
+            raw_converter = raw_converter._replace(
+                slices=map_slices(partial(remove_pattern_noise_from_slice, in_place=True),
+                                  raw_converter.slices, pattern_noise=read_pattern_noise(rows)),
+                flags=raw_converter.flags._replace(pattern_noise_present=False))
+        elif name in estimated_transformations:
+            flag = estimated_transformations[name]['flag']
+            assert getattr(raw_converter.flags, flag), "{} must be flagged as present".format(flag)
+            assert all(image_slice.units == "electrons" for image_slice in raw_converter.slices), \
+                "units must be electrons"
+            # noinspection PyProtectedMember
+            raw_converter = raw_converter._replace(
+                slices=tuple(image_slice._replace(pixels=numpy.subtract(image_slice.pixels, estimate,
+                                                                        out=image_slice.pixels))
+                             for image_slice, estimate in zip(raw_converter.slices, estimates[name])),
+                flags=raw_converter.flags._replace(**{flag: False}))
+        else:
+            raw_converter = raw_transformations[name]['function'](raw_converter, in_place=True)
+    return raw_converter
+
+
+def calibrate_raw_bands(read_band, number_of_rows, transformation_settings=None, row_band_size=ROW_BAND_SIZE):
+    """
+    Calibrate a raw image a band of rows at a time, generating a calibrated
+    :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` for each band in order.
+
+    The image is read twice, a band at a time: once to estimate baseline, start of line ringing and smear,
+    and once to calibrate each band. The second pass starts as the first band is requested. Only one band, and
+    the estimates, are held in memory at a time.
+
+    :param read_band: A function taking a :py:class:`slice` of rows and returning a \
+    :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` holding those rows of each slice, \
+    such as :py:func:`~httm.fits_utilities.raw_fits.raw_converter_from_hdulist` with ``rows`` specified
+    :type read_band: function
+    :param number_of_rows: The number of rows in the image
+    :type number_of_rows: int
+    :param transformation_settings: An object specifying which transformations to run; if not specified defaults \
+    are used
+    :type transformation_settings: object
+    :param row_band_size: The number of rows in each band
+    :type row_band_size: int
+    :rtype: generator of :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` objects
+    """
+    from .. import resource_utilities
+    from .metadata import raw_transformations
+    transformation_names = derive_transformation_function_list(
+        transformation_settings,
+        OrderedDict((key, raw_transformations[key]['default']) for key in raw_transformations.keys()),
+        {key: key for key in raw_transformations.keys()})
+    first_estimate = min([transformation_names.index(name) for name in transformation_names
+                          if name in estimated_transformations] + [len(transformation_names)])
+    assert all(name not in pixel_transformations for name in transformation_names[first_estimate:]), \
+        "Transformations acting on each pixel must run before baseline, start of line ringing or smear are estimated"
+
+    # An empty band, read for the parameters of the image
+    parameters = read_band(slice(0, 0)).parameters
+    read_pattern_noise = resource_utilities.pattern_noise_row_reader(parameters.pattern_noise) \
+        if 'remove_pattern_noise' in transformation_names else None
+    bands = row_bands(number_of_rows, row_band_size)
+
+    estimates = {}
+    if first_estimate < len(transformation_names):
+        ranges = mean_row_ranges(parameters, number_of_rows)
+        row_sums = None
+        band_converter = None
+        for rows in bands:
+            band_converter = read_band(rows)
+            # noinspection PyProtectedMember
+            band_converter = transform_raw_band(band_converter._replace(slices=copy_slices(band_converter.slices)),
+                                                rows, transformation_names[:first_estimate], {}, read_pattern_noise)
+            if row_sums is None:
+                row_sums = [numpy.zeros((len(ranges), image_slice.pixels.shape[-1]))
+                            for image_slice in band_converter.slices]
+            for sums, image_slice in zip(row_sums, band_converter.slices):
+                for sum_index, (start, stop) in enumerate(ranges):
+                    sums[sum_index] += numpy.sum(
+                        image_slice.pixels[max(start - rows.start, 0):max(stop - rows.start, 0)], axis=0,
+                        dtype=numpy.float64)
+        row_counts = numpy.array([[stop - start] for start, stop in ranges])
+        # noinspection PyProtectedMember
+        mean_rows_converter = band_converter._replace(
+            slices=tuple(image_slice._replace(pixels=sums / row_counts)
+                         for sums, image_slice in zip(row_sums, band_converter.slices)))
+        for name in transformation_names[first_estimate:]:
+            if name in estimated_transformations:
+                estimates[name] = tuple(estimated_transformations[name]['estimate'](parameters, number_of_rows,
+                                                                                    image_slice.pixels)
+                                        for image_slice in mean_rows_converter.slices)
+            mean_rows_converter = transform_raw_band(mean_rows_converter, None, (name,), estimates)
+
+    for rows in bands:
+        band_converter = read_band(rows)
+        # noinspection PyProtectedMember
+        yield transform_raw_band(band_converter._replace(slices=copy_slices(band_converter.slices)),
+                                 rows, transformation_names, estimates, read_pattern_noise)
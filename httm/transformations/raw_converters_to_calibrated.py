@@ -23,18 +23,24 @@ Transformation functions for processing
 :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` objects so that
 they are suitable for writing to a calibrated FITS file.
 
+Each transformation is described by a :py:class:`~httm.transformations.common.RowStage`, such as
+:py:func:`~httm.transformations.raw_converters_to_calibrated.remove_baseline_row_stage`, so that
+:py:func:`~httm.transformations.raw_converters_to_calibrated.transform_raw_converter` can fuse neighbouring
+transformations into a single pass over the pixels, see :py:mod:`~httm.transformations.plans`.
+
 """
 from collections import OrderedDict
+from functools import partial
 
-from .common import derive_transformation_function_list
-from .raw_slices_to_calibrated import convert_slice_adu_to_electrons, remove_pattern_noise_from_slice, \
-    remove_undershoot_from_slice, remove_smear_from_slice, remove_baseline_from_slice, \
-    remove_start_of_line_ringing_from_slice
+from .common import derive_transformation_function_list, copy_slices, RowStage, transform_converter_rows
+from .raw_slices_to_calibrated import convert_rows_adu_to_electrons, remove_pattern_noise_from_rows, \
+    remove_undershoot_from_rows, remove_undershoot_exactly_from_rows, remove_smear_from_rows, \
+    remove_baseline_from_rows, remove_start_of_line_ringing_from_rows
 from ..data_structures.raw_converter import SingleCCDRawConverter
 
 
-def convert_adu_to_electrons(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def convert_adu_to_electrons(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     Converts a :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` from
     having *Analogue to Digital Converter Units* (ADU) to estimated electron counts by calling
@@ -43,8 +49,28 @@ def convert_adu_to_electrons(raw_converter):
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have electrons for units for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, convert_adu_to_electrons_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def convert_adu_to_electrons_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.convert_adu_to_electrons` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert raw_converter.flags.in_adu, "Input should be in *Analogue to Digital Converter Units* (ADU)"
     image_slices = raw_converter.slices
     video_scales = raw_converter.parameters.video_scales
@@ -52,14 +78,13 @@ def convert_adu_to_electrons(raw_converter):
     number_of_exposures = raw_converter.parameters.number_of_exposures
     gain_loss = raw_converter.parameters.gain_loss
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(convert_slice_adu_to_electrons(gain_loss, number_of_exposures, video_scale, image_slice)
-                     for (video_scale, image_slice) in zip(video_scales, image_slices)),
-        flags=raw_converter.flags._replace(in_adu=True))
+    return RowStage(row_function=partial(convert_rows_adu_to_electrons, gain_loss, number_of_exposures),
+                    per_slice_arguments={'video_scale': video_scales},
+                    flags=raw_converter.flags._replace(in_adu=True))
 
 
-def remove_baseline(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def remove_baseline(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     This function estimates *baseline* from the *dark pixels* for each slice in a
     :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
@@ -72,21 +97,39 @@ def remove_baseline(raw_converter):
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have *Analogue to Digital Converter Units* (ADU) for units for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, remove_baseline_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def remove_baseline_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_baseline` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert raw_converter.flags.baseline_present, "Baseline must be flagged as present"
-    image_slices = raw_converter.slices
     early_dark_pixel_columns = raw_converter.parameters.early_dark_pixel_columns
     late_dark_pixel_columns = raw_converter.parameters.late_dark_pixel_columns
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(remove_baseline_from_slice(early_dark_pixel_columns, late_dark_pixel_columns, image_slice)
-                     for image_slice in image_slices),
-        flags=raw_converter.flags._replace(baseline_present=False))
+    return RowStage(row_function=partial(remove_baseline_from_rows, early_dark_pixel_columns, late_dark_pixel_columns),
+                    per_slice_arguments={},
+                    flags=raw_converter.flags._replace(baseline_present=False))
 
 
-def remove_pattern_noise(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def remove_pattern_noise(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     Compensates for a fixed pattern noise, that varies from slice to slice, on a
     :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
@@ -96,22 +139,42 @@ def remove_pattern_noise(raw_converter):
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have *Analogue to Digital Converter Units* (ADU) for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, remove_pattern_noise_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def remove_pattern_noise_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_pattern_noise` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     from .. import resource_utilities
     assert raw_converter.flags.pattern_noise_present, "Pattern noise must be flagged as present"
-    pattern_noises = resource_utilities.load_pattern_noise(raw_converter.parameters.pattern_noise)
+    pattern_noises = resource_utilities.load_shared_resource(resource_utilities.load_pattern_noise,
+                                                             raw_converter.parameters.pattern_noise)
     image_slices = raw_converter.slices
     assert len(pattern_noises) >= len(image_slices), "There should be at least as many noise patterns as slices"
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(remove_pattern_noise_from_slice(pattern_noise, image_slice)
-                     for (pattern_noise, image_slice) in zip(pattern_noises, image_slices)),
-        flags=raw_converter.flags._replace(pattern_noise_present=False))
+    return RowStage(row_function=remove_pattern_noise_from_rows,
+                    per_slice_arguments={'pattern_noise': pattern_noises},
+                    flags=raw_converter.flags._replace(pattern_noise_present=False))
 
 
-def remove_start_of_line_ringing(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def remove_start_of_line_ringing(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     Compensates for *start of line ringing* on each row in a
     :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
@@ -121,45 +184,90 @@ def remove_start_of_line_ringing(raw_converter):
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have electrons for units for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, remove_start_of_line_ringing_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def remove_start_of_line_ringing_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_start_of_line_ringing` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert raw_converter.flags.start_of_line_ringing_present, "Start of line ringing must be flagged as present"
     final_dark_pixel_rows = raw_converter.parameters.final_dark_pixel_rows  # type: int
-    image_slices = raw_converter.slices
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(remove_start_of_line_ringing_from_slice(final_dark_pixel_rows, image_slice)
-                     for image_slice in image_slices),
-        flags=raw_converter.flags._replace(start_of_line_ringing_present=False))
+    return RowStage(row_function=partial(remove_start_of_line_ringing_from_rows, final_dark_pixel_rows),
+                    per_slice_arguments={},
+                    flags=raw_converter.flags._replace(start_of_line_ringing_present=False))
 
 
-def remove_undershoot(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def remove_undershoot(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     Removes *undershoot* from each row in a
     :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     by calling :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_undershoot_from_slice`
-    over each slice.
+    over each slice, or
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_undershoot_exactly_from_slice`
+    if the ``undershoot_inverse`` parameter is ``exact``.
 
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have electrons for units for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, remove_undershoot_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def remove_undershoot_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_undershoot` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert raw_converter.flags.undershoot_present, "Undershoot must be flagged as present"
     assert raw_converter.flags.baseline_present is False, "Baseline should be removed before removing undershoot"
 
     undershoot_parameter = raw_converter.parameters.undershoot_parameter
-    image_slices = raw_converter.slices
+    undershoot_inverse = raw_converter.parameters.undershoot_inverse
+    undershoot_removal_functions = {
+        'approximate': remove_undershoot_from_rows,
+        'exact': remove_undershoot_exactly_from_rows,
+    }
+    assert undershoot_inverse in undershoot_removal_functions, \
+        "Undershoot inverse must be one of {}, not {}".format(sorted(undershoot_removal_functions), undershoot_inverse)
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(remove_undershoot_from_slice(undershoot_parameter, image_slice)
-                     for image_slice in image_slices),
-        flags=raw_converter.flags._replace(undershoot_present=False))
+    return RowStage(row_function=partial(undershoot_removal_functions[undershoot_inverse], undershoot_parameter),
+                    per_slice_arguments={},
+                    flags=raw_converter.flags._replace(undershoot_present=False))
 
 
-def remove_smear(raw_converter):
-    # type: (SingleCCDRawConverter) -> SingleCCDRawConverter
+def remove_smear(raw_converter, in_place=False, executor=None, profiler=None):
+    # type: (SingleCCDRawConverter, bool, object, object) -> SingleCCDRawConverter
     """
     Removes *smear* and zeroes the *smear rows* in a
     :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
@@ -169,44 +277,86 @@ def remove_smear(raw_converter):
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` which should \
     have electrons for units for each of its slices
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :param in_place: If ``True``, overwrite the pixels of each slice rather than allocating new pixels
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices concurrently
+    :type executor: object
+    :param profiler: An optional profiler recording the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
+    return transform_converter_rows(raw_converter, remove_smear_row_stage,
+                                    in_place=in_place, executor=executor, profiler=profiler)
+
+
+def remove_smear_row_stage(raw_converter):
+    # type: (SingleCCDRawConverter) -> RowStage
+    """
+    Describes :py:func:`~httm.transformations.raw_converters_to_calibrated.remove_smear` as a
+    :py:class:`~httm.transformations.common.RowStage`.
+
+    :param raw_converter: The converter to transform
+    :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
+    :rtype: :py:class:`~httm.transformations.common.RowStage`
+    """
     assert raw_converter.flags.smear_rows_present, "Smear rows must be flagged as present"
     final_dark_pixel_rows = raw_converter.parameters.final_dark_pixel_rows
     smear_rows = raw_converter.parameters.smear_rows
     late_dark_pixel_columns = raw_converter.parameters.late_dark_pixel_columns
     early_dark_pixel_columns = raw_converter.parameters.early_dark_pixel_columns
-    image_slices = raw_converter.slices
     # noinspection PyProtectedMember
-    return raw_converter._replace(
-        slices=tuple(remove_smear_from_slice(early_dark_pixel_columns, late_dark_pixel_columns,
-                                             final_dark_pixel_rows, smear_rows, image_slice)
-                     for image_slice in image_slices),
-        flags=raw_converter.flags._replace(smear_rows_present=False))
+    return RowStage(row_function=partial(remove_smear_from_rows, early_dark_pixel_columns, late_dark_pixel_columns,
+                                         final_dark_pixel_rows, smear_rows),
+                    per_slice_arguments={},
+                    flags=raw_converter.flags._replace(smear_rows_present=False))
 
 
-def transform_raw_converter(raw_converter, transformation_settings=None):
-    # type: (SingleCCDRawConverter, object) -> SingleCCDRawConverter
+def transform_raw_converter(raw_converter, transformation_settings=None, in_place=False, executor=None,
+                            profiler=None, cache=None, fuse=True):
+    # type: (SingleCCDRawConverter, object, bool, object, object, object, bool) -> SingleCCDRawConverter
     """
     Take a :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` and run specified transformations
     over it.
 
+    If ``in_place`` is ``True``, the pixels are copied once into a working buffer which every transformation then
+    updates in place, rather than each transformation allocating new pixels. The input converter is not modified.
+
+    If an ``executor`` is given, each transformation dispatches the slices to it, see
+    :py:func:`~httm.transformations.common.map_slices`.
+
+    The transformations are run by a :py:class:`~httm.transformations.plans.TransformationPlan`, which fuses
+    neighbouring transformations acting on each row on their own into a single pass over the pixels, and skips those
+    that would leave the pixels unchanged, such as removing undershoot when the undershoot parameter is zero. If
+    ``fuse`` is ``False``, each transformation runs in its own pass over the pixels, so that a ``profiler`` records
+    each one under its own name.
+
     :param raw_converter: A :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` to run a series of \
     transformations over
     :type raw_converter: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     :param transformation_settings: An object specifying which transformations to run; if not specified defaults are \
     used
     :type transformation_settings: object
+    :param in_place: Whether to run the transformations in place on a single working buffer
+    :type in_place: bool
+    :param executor: An optional thread or process pool used to transform the slices of each transformation
+    :type executor: object
+    :param profiler: An optional profiler recording each transformation and the transformation of each slice
+    :type profiler: :py:class:`~httm.transformations.profiling.Profiler`
+    :param cache: An optional cache of the intermediate states of the converter to resume from, \
+    see :py:mod:`~httm.transformations.caching`
+    :type cache: :py:class:`~httm.transformations.caching.TransformationCache`
+    :param fuse: Whether to fuse neighbouring transformations into single passes over the pixels
+    :type fuse: bool
     :rtype: :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter`
     """
-    from functools import reduce
     from .metadata import raw_transformations
-    return reduce(
-        lambda converter, transformation_function:
-        transformation_function(converter),
-        derive_transformation_function_list(transformation_settings,
-                                            OrderedDict((key, raw_transformations[key]['default'])
-                                                        for key in raw_transformations.keys()),
-                                            {key: raw_transformations[key]['function']
-                                             for key in raw_transformations.keys()}),
-        raw_converter)
+    from .plans import transformation_plan
+    if in_place:
+        # noinspection PyProtectedMember
+        raw_converter = raw_converter._replace(slices=copy_slices(raw_converter.slices))
+    transformation_names = derive_transformation_function_list(
+        transformation_settings,
+        OrderedDict((key, raw_transformations[key]['default']) for key in raw_transformations.keys()),
+        {key: key for key in raw_transformations.keys()})
+    return transformation_plan(raw_converter, transformation_names, raw_transformations, fuse=fuse).run(
+        raw_converter, raw_transformations, in_place=in_place, executor=executor, profiler=profiler, cache=cache)
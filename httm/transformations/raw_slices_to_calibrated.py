@@ -23,15 +23,28 @@ Transformation functions for processing slices contained in a
 :py:class:`~httm.data_structures.raw_converter.SingleCCDRawConverter` so that they are suitable
 for writing to a calibrated FITS file.
 
+The pixels of a slice may carry leading axes, such as the slice axis of a
+:py:class:`~httm.data_structures.common.SliceStack`; rows and columns are always the last two axes.
+
+Each slice transformation can also update its input in place, passing ``in_place=True``, in which case the
+pixels of the input slice must be a writable floating point array.
+
+Each slice transformation that acts on each row on its own, given estimates made beforehand, is implemented by a
+row function returning a :py:class:`~httm.transformations.common.RowTransformation`, such as
+:py:func:`~httm.transformations.raw_slices_to_calibrated.remove_baseline_from_rows`, so that it can be fused with
+its neighbours into a single pass over the pixels, see :py:func:`~httm.transformations.common.transform_slice_rows`.
+
 """
+from functools import partial
+
 import numpy
 
-from .constants import FPE_MAX_ADU
-from ..data_structures.common import Slice
+from .common import block_values, block_pixel_values, RowTransformation, transform_slice_rows
+from .constants import FPE_MAX_ADU, UNDERSHOOT_SCAN_SIZE, ADU_LOOKUP_TABLE_SIZE
 
 
-def remove_start_of_line_ringing_from_slice(final_dark_pixel_rows, image_slice):
-    # type: (int, Slice) -> Slice
+def remove_start_of_line_ringing_from_slice(final_dark_pixel_rows, image_slice, in_place=False):
+    # type: (int, Slice, bool) -> Slice
     """
     This function estimates *start of line ringing* from the upper dark rows of a slice and compensates for this
     effect.
@@ -46,22 +59,43 @@ def remove_start_of_line_ringing_from_slice(final_dark_pixel_rows, image_slice):
     :type final_dark_pixel_rows: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(remove_start_of_line_ringing_from_rows, final_dark_pixel_rows),),
+                                in_place=in_place)
+
+
+def remove_start_of_line_ringing_from_rows(final_dark_pixel_rows, image_slice):
+    # type: (int, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_start_of_line_ringing_from_slice`.
+
+    :param final_dark_pixel_rows: Number of top dark pixel rows
+    :type final_dark_pixel_rows: int
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    working_pixels = numpy.copy(image_slice.pixels)
-    mean_ringing = numpy.sum(working_pixels[:-final_dark_pixel_rows], 0) / final_dark_pixel_rows
-    working_pixels -= mean_ringing
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=working_pixels)
+    mean_ringing = numpy.sum(image_slice.pixels[..., :-final_dark_pixel_rows, :], axis=-2, keepdims=True,
+                             dtype=numpy.float64) / final_dark_pixel_rows
+
+    def subtract_ringing(values, window, out):
+        return numpy.subtract(values, block_pixel_values(mean_ringing, window), out=out)
+
+    return RowTransformation(units="electrons", transform_rows=subtract_ringing)
 
 
 def remove_smear_from_slice(early_dark_pixel_columns,
                             late_dark_pixel_columns,
                             final_dark_pixel_rows,
                             smear_rows,
-                            image_slice):
-    # type: (int, int, int, int, Slice) -> Slice
+                            image_slice,
+                            in_place=False):
+    # type: (int, int, int, int, Slice, bool) -> Slice
     """
     This function estimates *smear* from the *smear rows* of a slice and compensates for this
     effect.
@@ -82,23 +116,49 @@ def remove_smear_from_slice(early_dark_pixel_columns,
     :type smear_rows: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(remove_smear_from_rows, early_dark_pixel_columns,
+                                                      late_dark_pixel_columns, final_dark_pixel_rows, smear_rows),),
+                                in_place=in_place)
+
+
+def remove_smear_from_rows(early_dark_pixel_columns, late_dark_pixel_columns, final_dark_pixel_rows, smear_rows,
+                           image_slice):
+    # type: (int, int, int, int, Slice) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_smear_from_slice`.
+
+    :param early_dark_pixel_columns: The number of dark pixel columns on the left side of the slice
+    :type early_dark_pixel_columns: int
+    :param late_dark_pixel_columns: The number of dark pixel columns on the right side of the slice
+    :type late_dark_pixel_columns: int
+    :param final_dark_pixel_rows: The number of top dark pixel rows
+    :type final_dark_pixel_rows: int
+    :param smear_rows: The number of smear rows
+    :type smear_rows: int
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
     top = (final_dark_pixel_rows + smear_rows)
-    smear_pixels = image_slice.pixels[-top:-final_dark_pixel_rows, early_dark_pixel_columns:-late_dark_pixel_columns]
+    smear_pixels = image_slice.pixels[..., -top:-final_dark_pixel_rows, :]
     # noinspection PyTypeChecker
-    assert numpy.any(smear_pixels != 0), "Smear rows should not be zero"
-    working_pixels = numpy.copy(image_slice.pixels)
-    mean_smear = numpy.sum(
-        working_pixels[-top:-final_dark_pixel_rows], 0) / smear_rows
-    working_pixels -= mean_smear
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=working_pixels)
+    assert numpy.any(smear_pixels[..., early_dark_pixel_columns:-late_dark_pixel_columns] != 0), \
+        "Smear rows should not be zero"
+    mean_smear = numpy.sum(smear_pixels, axis=-2, keepdims=True, dtype=numpy.float64) / smear_rows
+
+    def subtract_smear(values, window, out):
+        return numpy.subtract(values, block_pixel_values(mean_smear, window), out=out)
 
+    return RowTransformation(units="electrons", transform_rows=subtract_smear)
 
-def remove_baseline_from_slice(early_dark_pixel_columns, late_dark_pixel_columns, image_slice):
-    # type: (int, int, Slice) -> Slice
+
+def remove_baseline_from_slice(early_dark_pixel_columns, late_dark_pixel_columns, image_slice, in_place=False):
+    # type: (int, int, Slice, bool) -> Slice
     """
     This function estimates *baseline* from the *dark pixels* of a slice and compensates for this
     effect.
@@ -111,34 +171,89 @@ def remove_baseline_from_slice(early_dark_pixel_columns, late_dark_pixel_columns
     :type late_dark_pixel_columns: int
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(remove_baseline_from_rows, early_dark_pixel_columns,
+                                                      late_dark_pixel_columns),),
+                                in_place=in_place)
+
+
+def remove_baseline_from_rows(early_dark_pixel_columns, late_dark_pixel_columns, image_slice):
+    # type: (int, int, Slice) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_baseline_from_slice`.
+
+    :param early_dark_pixel_columns: The number of dark pixel columns on the left side of the slice
+    :type early_dark_pixel_columns: int
+    :param late_dark_pixel_columns: The number of dark pixel columns on the right side of the slice
+    :type late_dark_pixel_columns: int
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    early = numpy.ravel(image_slice.pixels[:, :early_dark_pixel_columns])
-    late = numpy.ravel(image_slice.pixels[:, -late_dark_pixel_columns:])
-    mean = numpy.mean(numpy.concatenate((early, late)))
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=image_slice.pixels - mean)
+    leading_shape = image_slice.pixels.shape[:-2]
+    early = numpy.reshape(image_slice.pixels[..., :early_dark_pixel_columns], leading_shape + (-1,))
+    late = numpy.reshape(image_slice.pixels[..., -late_dark_pixel_columns:], leading_shape + (-1,))
+    mean = numpy.mean(numpy.concatenate((early, late), axis=-1), axis=-1,
+                      dtype=numpy.float64)[..., numpy.newaxis, numpy.newaxis]
 
+    def subtract_baseline(values, window, out):
+        return numpy.subtract(values, block_pixel_values(mean, window), out=out)
 
-def remove_pattern_noise_from_slice(pattern_noise, image_slice):
-    # type: (numpy.ndarray, Slice) -> Slice
+    return RowTransformation(units="electrons", transform_rows=subtract_baseline)
+
+
+def remove_pattern_noise_from_slice(pattern_noise, image_slice, in_place=False):
+    # type: (numpy.ndarray, Slice, bool) -> Slice
     """
     This transformation corrects for a fixed pattern of noise on a :py:class:`~httm.data_structures.common.Slice`.
 
+    If both the pixels and the pattern noise are integers, the result is kept as signed integers, so that
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.convert_slice_adu_to_electrons` can still look
+    the electron counts up in a table.
+
     :param pattern_noise: 2d array of dimensions matching the pixel array of a slice
     :type pattern_noise: :py:class:`numpy.ndarray`
     :param image_slice: Input slice. Units: ADU
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(remove_pattern_noise_from_rows, pattern_noise),),
+                                in_place=in_place)
+
+
+def remove_pattern_noise_from_rows(pattern_noise, image_slice):
+    # type: (numpy.ndarray, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_pattern_noise_from_slice`.
+
+    :param pattern_noise: 2d array of dimensions matching the pixel array of a slice
+    :type pattern_noise: :py:class:`numpy.ndarray`
+    :param image_slice: Input slice. Units: ADU
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "ADU", "pixel units must be in ADU"
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=image_slice.pixels - pattern_noise)
+    keep_integers = is_integer(image_slice.pixels) and is_integer(pattern_noise)
+
+    def subtract_pattern_noise(values, window, out):
+        block_pattern_noise = block_pixel_values(pattern_noise, window)
+        if keep_integers:
+            return numpy.subtract(values, block_pattern_noise,
+                                  dtype=numpy.result_type(values, block_pattern_noise, numpy.int8))
+        return numpy.subtract(values, block_pattern_noise, out=out)
+
+    return RowTransformation(units="ADU", transform_rows=subtract_pattern_noise)
 
 
-def remove_undershoot_from_slice(undershoot_parameter, image_slice):
-    # type: (float, Slice) -> Slice
+def remove_undershoot_from_slice(undershoot_parameter, image_slice, in_place=False):
+    # type: (float, Slice, bool) -> Slice
     """
     When a CCD reads out a bright pixel, the pixel to the right of it appears artificially dimmer.
 
@@ -152,26 +267,120 @@ def remove_undershoot_from_slice(undershoot_parameter, image_slice):
     exhibit for the signal in the previous pixel.
 
     This transformation is the (approximate) inverse of
-    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_undershoot_on_slice`.
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_undershoot_on_slice`;
+    see :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_undershoot_exactly_from_slice`
+    for the exact inverse.
 
     :param undershoot_parameter: Undershoot parameter from parameter structure, typically ~0.001, dimensionless
     :type undershoot_parameter: float
     :param image_slice: Input slice. Units: electrons
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(remove_undershoot_from_rows, undershoot_parameter),),
+                                in_place=in_place)
+
+
+def remove_undershoot_from_rows(undershoot_parameter, image_slice):
+    # type: (float, Slice) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_undershoot_from_slice`.
+
+    :param undershoot_parameter: Undershoot parameter from parameter structure, typically ~0.001, dimensionless
+    :type undershoot_parameter: float
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "electrons", "units must be electrons"
-    convolutional_kernel = numpy.array([1.0, undershoot_parameter])
 
-    def convolve_row(row):
-        return numpy.convolve(row, convolutional_kernel, mode='same')
+    def convolve_rows(values, window, out):
+        assert window[-1] == slice(None), "Undershoot is removed from whole rows"
+        # Each pixel gains the previous pixel in its row times the undershoot parameter;
+        # the first pixel in each row has no predecessor
+        shifted_pixels = undershoot_parameter * values[..., :-1]
+        if out is None:
+            out = numpy.empty(values.shape, dtype=numpy.result_type(values, 1.0))
+        out[..., :1] = values[..., :1]
+        numpy.add(values[..., 1:], shifted_pixels, out=out[..., 1:])
+        return out
+
+    return RowTransformation(units="electrons", transform_rows=convolve_rows)
+
+
+def remove_undershoot_exactly_from_slice(undershoot_parameter, image_slice, in_place=False):
+    # type: (float, Slice, bool) -> Slice
+    """
+    This function compensates for *undershoot* on a slice by exactly inverting
+    :py:func:`~httm.transformations.electron_flux_slices_to_raw.simulate_undershoot_on_slice`.
 
-    # noinspection PyProtectedMember
-    return image_slice._replace(pixels=numpy.apply_along_axis(convolve_row, 1, image_slice.pixels))
+    Simulating undershoot maps each row :math:`r` to :math:`s_k = r_k - \\mathtt{undershoot\\_parameter}
+    \\times r_{k-1}`, so this function solves the first order recursion
+    :math:`r_k = s_k + \\mathtt{undershoot\\_parameter} \\times r_{k-1}` along each row, with :math:`r_{-1} = 0`.
 
+    Rather than stepping through each row pixel by pixel, rows are split into runs of
+    ``UNDERSHOOT_SCAN_SIZE`` columns. The recursion within each run is solved for every row at once by
+    multiplying by a lower triangular matrix of powers of the undershoot parameter, and the value at the end of each
+    run is then carried into the next run.
 
-def convert_slice_adu_to_electrons(gain_loss, number_of_exposures, video_scale, image_slice):
-    # type: (float, int, float, Slice) -> Slice
+    :param undershoot_parameter: Undershoot parameter from parameter structure, typically ~0.001, dimensionless. \
+    Its magnitude must be less than one.
+    :type undershoot_parameter: float
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
+    :rtype: :py:class:`~httm.data_structures.common.Slice`
+    """
+    return transform_slice_rows(image_slice, (partial(remove_undershoot_exactly_from_rows, undershoot_parameter),),
+                                in_place=in_place)
+
+
+def remove_undershoot_exactly_from_rows(undershoot_parameter, image_slice):
+    # type: (float, Slice) -> RowTransformation
+    """
+    The row transformation of
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.remove_undershoot_exactly_from_slice`.
+
+    :param undershoot_parameter: Undershoot parameter from parameter structure, typically ~0.001, dimensionless. \
+    Its magnitude must be less than one.
+    :type undershoot_parameter: float
+    :param image_slice: Input slice. Units: electrons
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
+    assert image_slice.units == "electrons", "units must be electrons"
+    assert abs(undershoot_parameter) < 1, "undershoot parameter must have magnitude less than one"
+    columns = image_slice.pixels.shape[-1]
+    scan_size = min(UNDERSHOOT_SCAN_SIZE, columns)
+    number_of_scans = -(-columns // scan_size)
+    offsets = numpy.arange(scan_size)
+    # scan_matrix[i, j] is the weight of column j on column i within a run, undershoot_parameter ** (i - j)
+    scan_matrix = numpy.tril(undershoot_parameter ** numpy.clip(numpy.subtract.outer(offsets, offsets), 0, None))
+    carry_weights = undershoot_parameter ** (offsets + 1)
+
+    def solve_rows(values, window, out):
+        assert window[-1] == slice(None), "Undershoot is removed from whole rows"
+        padded_pixels = numpy.zeros(values.shape[:-1] + (number_of_scans * scan_size,),
+                                    dtype=numpy.result_type(values, 1.0) if out is None else out.dtype)
+        padded_pixels[..., :columns] = values
+        scans = numpy.matmul(padded_pixels.reshape(padded_pixels.shape[:-1] + (number_of_scans, scan_size)),
+                             scan_matrix.T)
+        for scan in range(1, number_of_scans):
+            scans[..., scan, :] += carry_weights * scans[..., scan - 1, -1:]
+        restored_pixels = scans.reshape(padded_pixels.shape)[..., :columns]
+        if out is None:
+            return restored_pixels
+        out[...] = restored_pixels
+        return out
+
+    return RowTransformation(units="electrons", transform_rows=solve_rows)
+
+
+def convert_slice_adu_to_electrons(gain_loss, number_of_exposures, video_scale, image_slice, in_place=False):
+    # type: (float, int, float, Slice, bool) -> Slice
     """
     Converts a slice from *Analogue to Digital Converter Units* (ADU) to electron counts.
 
@@ -193,6 +402,10 @@ def convert_slice_adu_to_electrons(gain_loss, number_of_exposures, video_scale,
     This function is the inverse transform of
     :py:func:`~httm.transformations.electron_flux_slices_to_raw.convert_slice_electrons_to_adu`.
 
+    Integer pixels are converted by looking them up in a table of this transformation, see
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.adu_lookup_table_range`. Other pixels are converted by
+    evaluating the transformation for each pixel, with the same result.
+
     :param gain_loss: The relative decrease in video gain over the total ADC range
     :type gain_loss: float
     :param number_of_exposures: The number of exposures the image comprises.
@@ -202,16 +415,112 @@ def convert_slice_adu_to_electrons(gain_loss, number_of_exposures, video_scale,
     :type video_scale: float
     :param image_slice: Input slice. Units: ADU
     :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :param in_place: If ``True``, overwrite the pixels of ``image_slice`` rather than allocating new pixels
+    :type in_place: bool
     :rtype: :py:class:`~httm.data_structures.common.Slice`
     """
+    return transform_slice_rows(image_slice, (partial(convert_rows_adu_to_electrons, gain_loss, number_of_exposures,
+                                                      video_scale),),
+                                in_place=in_place)
+
+
+def convert_rows_adu_to_electrons(gain_loss, number_of_exposures, video_scale, image_slice):
+    # type: (float, int, float, Slice) -> RowTransformation
+    """
+    The row transformation of :py:func:`~httm.transformations.raw_slices_to_calibrated.convert_slice_adu_to_electrons`.
+
+    :param gain_loss: The relative decrease in video gain over the total ADC range
+    :type gain_loss: float
+    :param number_of_exposures: The number of exposures the image comprises.
+    :type number_of_exposures: int
+    :param video_scale: Constant for converting electron counts to \
+    *Analogue to Digital Converter Units* (ADU). Units: electrons per ADU
+    :type video_scale: float
+    :param image_slice: Input slice. Units: ADU
+    :type image_slice: :py:class:`~httm.data_structures.common.Slice`
+    :rtype: :py:class:`~httm.transformations.common.RowTransformation`
+    """
     assert image_slice.units == "ADU", "pixel units must be in ADU"
     gain_loss_per_adu = gain_loss / (number_of_exposures * FPE_MAX_ADU)  # type: float
     gain_loss_per_electron = gain_loss_per_adu / video_scale  # type: float
+    table_adu = adu_lookup_table_range(image_slice.pixels)
+    tables = {}
+
+    def convert_adu(adu, window, electrons):
+        window_video_scale = block_values(video_scale, window)
+        window_gain_loss_scale = block_values(gain_loss_per_electron * video_scale, window)
+        # A window spanning stacked slices may have a video scale for each
+        if table_adu is None or numpy.size(window_video_scale) > 1:
+            return adu_to_electrons(window_gain_loss_scale, window_video_scale, adu, electrons)
+        table_key = numpy.ravel(window_video_scale)[0]
+        if table_key not in tables:
+            tables[table_key] = adu_to_electrons(window_gain_loss_scale, window_video_scale, table_adu,
+                                                 numpy.empty(table_adu.shape))
+        return numpy.take(tables[table_key], adu, out=electrons, mode='wrap')
+
+    return RowTransformation(units="electrons", transform_rows=convert_adu)
+
+
+def adu_to_electrons(gain_loss_scale, video_scale, adu, electrons):
+    # type: (float, float, numpy.ndarray, numpy.ndarray) -> numpy.ndarray
+    """
+    Internal helper function evaluating the transformation of
+    :py:func:`~httm.transformations.raw_slices_to_calibrated.convert_slice_adu_to_electrons` for each pixel.
+
+    :param gain_loss_scale: The product of ``gain_loss_per_electron`` and ``video_scale``
+    :type gain_loss_scale: float
+    :param video_scale: Constant for converting electron counts to \
+    *Analogue to Digital Converter Units* (ADU). Units: electrons per ADU
+    :type video_scale: float
+    :param adu: Input pixels. Units: ADU
+    :type adu: :py:class:`numpy.ndarray`
+    :param electrons: The floating point array to write the result to, or ``None`` to allocate it. Units: electrons
+    :type electrons: :py:class:`numpy.ndarray`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    denominator = numpy.multiply(gain_loss_scale, adu)
+    numpy.subtract(1, denominator, out=denominator)
+    electrons = numpy.multiply(video_scale, adu, out=electrons)
+    return numpy.divide(electrons, denominator, out=electrons)
 
-    def transform_adu_to_electron(adu):
-        # type: (float) -> float
-        return (video_scale * adu) / (1 - gain_loss_per_electron * video_scale * adu)
 
-    return Slice(index=image_slice.index,
-                 units="electrons",
-                 pixels=transform_adu_to_electron(image_slice.pixels))
+def adu_lookup_table_range(adu):
+    # type: (numpy.ndarray) -> numpy.ndarray
+    """
+    Internal helper function returning the ADU to tabulate so that integer pixels can be converted by looking them
+    up in a table, or ``None`` if the pixels are not integers or the table would be too large.
+
+    The table spans every value of the data type of the pixels if that has no more than
+    :py:const:`~httm.transformations.constants.ADU_LOOKUP_TABLE_SIZE` values, otherwise the range of values in the
+    pixels. Either way it may have no more entries than there are pixels. Each value :math:`v` is placed at index
+    :math:`v` modulo the size of the table, so that the pixels index the table directly, wrapping around.
+
+    :param adu: The pixels. Units: ADU
+    :type adu: :py:class:`numpy.ndarray` or :py:class:`~httm.transformations.common.TransformedPixels`
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    if not is_integer(adu) or adu.size == 0:
+        return None
+    type_info = numpy.iinfo(adu.dtype)
+    if int(type_info.max) - int(type_info.min) < ADU_LOOKUP_TABLE_SIZE:
+        minimum_adu, maximum_adu = type_info.min, type_info.max
+    else:
+        observed_adu = adu[...]
+        minimum_adu, maximum_adu = observed_adu.min(), observed_adu.max()
+    table_size = int(maximum_adu) - int(minimum_adu) + 1
+    if table_size > min(ADU_LOOKUP_TABLE_SIZE, adu.size):
+        return None
+    return numpy.roll(numpy.arange(int(minimum_adu), int(maximum_adu) + 1, dtype=numpy.float64),
+                      int(minimum_adu) % table_size)
+
+
+def is_integer(pixels):
+    # type: (numpy.ndarray) -> bool
+    """
+    Internal helper function returning whether an array of pixels, or a pattern of noise, holds integers.
+
+    :param pixels: The pixels
+    :type pixels: :py:class:`numpy.ndarray` or :py:class:`~httm.transformations.common.TransformedPixels`
+    :rtype: bool
+    """
+    return numpy.issubdtype(pixels.dtype, numpy.integer)
@@ -15,7 +15,8 @@ setup(
     url='https://github.com/TESScience/httm',
     download_url='https://github.com/TESScience/httm/tarball/{VERSION}'.format(VERSION=VERSION),
     packages=find_packages('.'),
-    package_data={'httm': ['data/*.npz', 'data/*.fits']},
-    install_requires=['numpy', 'astropy>=1.3', 'toml'],
+    package_data={'httm': ['data/*.npz', 'data/*.fits', 'data/*.fits.gz', 'data/*.fits.fz']},
+    python_requires='>=3.5',
+    install_requires=['numpy>=1.17', 'astropy>=1.3', 'toml'],
     scripts=glob('scripts/*'),
 )